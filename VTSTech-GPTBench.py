@@ -9,11 +9,28 @@ import sys
 import argparse
 import importlib
 import site
+import statistics
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Import modules
-from prompts import INSTRUCT_SYSTEM_PROMPT, INSTRUCT_FEW_SHOT, TOOL_SYSTEM_PROMPT, TOOL_FEW_SHOT, PLANNER_SYSTEM_PROMPT, PLANNER_FEW_SHOT, AGENT_SYSTEM_PROMPT
-from tests import INSTRUCT_TEST_SUITE, TOOL_TEST_SUITE, AGENT_TEST_SUITE
-from tools import ToolRegistry, execute_tool, validate_tool_call, is_tool_call
+from prompts import (INSTRUCT_SYSTEM_PROMPT, INSTRUCT_FEW_SHOT, TOOL_SYSTEM_PROMPT, TOOL_FEW_SHOT, PLANNER_SYSTEM_PROMPT,
+                     PLANNER_DAG_SYSTEM_PROMPT, PLANNER_FEW_SHOT, AGENT_SYSTEM_PROMPT)
+from tests import INSTRUCT_TEST_SUITE, TOOL_TEST_SUITE, AGENT_TEST_SUITE, json_value_complete
+from sanitizer import sanitize_output, StreamSanitizer
+from toolbench import run_tool_benchmark
+from agentcontext import AgentContext, estimate_tokens
+from toolretrieval import select_tools, tool_recall, restrict_tool_list
+from tracing import TRACER, span, current_span, annotate, iter_spans, export_trace, print_trace_summary
+from profiling import PROFILE_KINDS, profile_run, socket_wait, wait_iter, profiled_thread
+from hostmonitor import start_monitor, stop_monitor, host_mark, host_window, print_host_summary
+from sweep import (RECOMMENDATIONS_FILE, SWEEP_SLACK, SWEEP_REPEATS, SWEEP_RETRIES, DEFAULT_BATCHES, parse_grid, default_threads, quant_tag,
+                   representative_tests, sweep_grid, sweep_options, allowed_failures, ctx_ruled_out, describe,
+                   sweep_finalists, print_sweep_report, print_recommendations, save_recommendations)
+from ablation import instruct_variants, tool_variants, prompt_size, pareto_frontier, smallest_keeping_accuracy, ascii_plot
+from calibration import (HISTORY_FILE, CALIBRATION_FILE, test_category, record_generation, load_history, calibrate,
+                         load_calibration, save_calibration, calibrated_options, calibration_report)
+from tools import (ToolRegistry, execute_tool, validate_tool_call, is_tool_call, configure_network, tool_context,
+                   tool_call_schema, plan_schema)
 
 # ============ CONFIGURATION ============
 MODEL_NUM_PREDICT = {
@@ -50,7 +67,9 @@ BENCHMARK_CONFIG = {
         "repeat_penalty": 1.0,
         "num_gpu": 0,
         "seed": 420,
-    }
+    },
+    # Frozen clock for tool outputs (timestamps, message IDs); None = wall clock
+    "tool_clock": "2026-02-14T12:00:00"
 }
 PLANNER_MODEL = "qwen2.5-coder:0.5b-instruct-q4_k_m"
 EXEC_MODEL = "qwen2.5-coder:0.5b-instruct-q4_k_m"
@@ -66,6 +85,7 @@ TOOL_SCHEMAS = {
     
     # 2. MATHEMATICS & CALCULATIONS
     "calculator": '{"name": "calculator", "arguments": {"expression": "string"}}',
+    "calculator_batch": '{"name": "calculator_batch", "arguments": {"expressions": "array of strings"}}',
     "convert_units": '{"name": "convert_units", "arguments": {"value": "number", "from_unit": "string", "to_unit": "string"}}',
     "generate_random_number": '{"name": "generate_random_number", "arguments": {"min_val": "integer", "max_val": "integer"}}',
     "calculate_stats": '{"name": "calculate_stats", "arguments": {"numbers": "array of numbers"}}',
@@ -97,6 +117,8 @@ TOOL_SCHEMAS = {
     # 7. SECURITY & HASHING
     "hash_text": '{"name": "hash_text", "arguments": {"text": "string", "algorithm": "string"}}',
     "generate_password": '{"name": "generate_password", "arguments": {"length": "integer"}}',
+    "hash_file": '{"name": "hash_file", "arguments": {"path": "string", "algorithm": "string"}}',
+    "hash_directory": '{"name": "hash_directory", "arguments": {"path": "string", "algorithm": "string"}}',
     
     # 8. TIME & DATE
     "current_time": '{"name": "current_time", "arguments": {"timezone": "string"}}',
@@ -127,8 +149,62 @@ def parse_arguments():
     parser.add_argument("--no-pull", action="store_true", help="Skip pulling models")
     parser.add_argument("--output", "-o", type=str, help="Save results to CSV file")
     parser.add_argument("--json-output", "-j", type=str, help="Save full results as JSON")
-    parser.add_argument("--mode", "-M", choices=["instruct", "tool", "agent", "run-tools", "all"], default="instruct",
-                       help="Benchmark mode: instruct, tool, agent, run-tools or all")
+    parser.add_argument("--mode", "-M",
+                       choices=["instruct", "tool", "agent", "conversation", "ablation", "sweep", "run-tools", "all"],
+                       default="instruct",
+                       help="Benchmark mode: instruct, tool, agent, conversation (KV-cache reuse), "
+                            "ablation (prompt size vs accuracy), sweep (num_thread/num_batch/num_ctx/quant), "
+                            "run-tools (tool microbenchmark) or all")
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream responses and stop generating once a test's result is decided")
+    parser.add_argument("--calibrate", action="store_true",
+                       help=f"Record eval_count history and use num_predict/stop learned from it ({HISTORY_FILE})")
+    parser.add_argument("--constrained", action="store_true",
+                       help="Constrain tool calls and agent plans with JSON Schemas built from ToolRegistry")
+    parser.add_argument("--planners", type=str,
+                       help=f"Comma-separated planner models for agent mode (default: {PLANNER_MODEL})")
+    parser.add_argument("--executors", type=str,
+                       help="Comma-separated executor models for agent mode (default: --models, else EXEC_MODEL)")
+    parser.add_argument("--tool-top-k", type=int, default=0,
+                       help="List only the k tools retrieved for each prompt in tool and planner prompts (0 = all)")
+    parser.add_argument("--agent-dag", action="store_true",
+                       help="Let the planner emit a dependency graph and run independent agent steps in parallel")
+    parser.add_argument("--agent-workers", type=int, default=4,
+                       help="Concurrent agent steps with --agent-dag")
+    parser.add_argument("--agent-context-budget", type=int, default=0,
+                       help="Token limit for tool results in agent prompts (0 = pass full results)")
+    parser.add_argument("--keep-alive", type=str, default="5m",
+                       help="Comma-separated keep_alive values to compare in conversation mode (e.g. 5m,0)")
+    parser.add_argument("--ablation-suites", type=str, default="instruct,tool",
+                       help="Suites to rerun with reduced prompts in ablation mode")
+    parser.add_argument("--sweep-threads", type=str, default=default_threads(),
+                       help="Comma-separated num_thread values for sweep mode")
+    parser.add_argument("--sweep-batch", type=str, default=DEFAULT_BATCHES,
+                       help="Comma-separated num_batch values for sweep mode")
+    parser.add_argument("--sweep-ctx", type=str, default="2048,4096,8192",
+                       help="Comma-separated num_ctx values for sweep mode")
+    parser.add_argument("--sweep-quants", type=str, default="",
+                       help="Comma-separated quantization tags to sweep besides the model itself "
+                            "(e.g. q4_K_M,q8_0 appended to the tag, or full model names)")
+    parser.add_argument("--sweep-per-category", type=int, default=2,
+                       help="Instruct tests per category in the sweep subset")
+    parser.add_argument("--sweep-tolerance", type=float, default=0.0,
+                       help="Pass-rate points a sweep configuration may lose against the default options")
+    parser.add_argument("--trace", type=str,
+                       help="Write a Chrome-trace/Perfetto JSON of every phase (model, test, turn, HTTP, tool...)")
+    parser.add_argument("--trace-otlp", type=str, help="Write the same spans as OTLP/JSON")
+    parser.add_argument("--profile", choices=PROFILE_KINDS,
+                       help="Profile harness code (time blocked on Ollama excluded) and write "
+                            "<json-output>_<mode>.prof/.folded/.tracemalloc.txt")
+    parser.add_argument("--monitor", action="store_true",
+                       help="Sample /proc (host CPU per core, Ollama CPU/RSS/faults, load, MHz) and /api/ps per test")
+    parser.add_argument("--monitor-interval", type=float, default=0.5, help="Seconds between --monitor samples")
+    parser.add_argument("--iterations", "-n", type=int, default=20,
+                       help="Calls per tool and input scale in run-tools mode")
+    parser.add_argument("--network", choices=["live", "record", "replay", "simulated"], default="live",
+                       help="Backend for network tools: live, record (live + save fixture), replay or simulated")
+    parser.add_argument("--network-fixture", type=str, default="network_fixture.json",
+                       help="Fixture file written by --network record and read by --network replay")
     return parser.parse_args()
 
 def check_server():
@@ -143,6 +219,18 @@ def ollama_list():
     resp.raise_for_status()
     return [m["name"] for m in resp.json()["models"]]
 
+def ollama_digest(model_name):
+    """Digest of a local model; falls back to the name if the server doesn't report one."""
+    try:
+        resp = requests.get("http://127.0.0.1:11434/api/tags")
+        resp.raise_for_status()
+        for m in resp.json()["models"]:
+            if m["name"] == model_name and m.get("digest"):
+                return m["digest"]
+    except Exception:
+        pass
+    return model_name
+
 def pull_if_missing(model_name):
     local_models = ollama_list()
     if model_name not in local_models:
@@ -150,12 +238,11 @@ def pull_if_missing(model_name):
         payload = {"name": model_name, "stream": False}
         requests.post("http://127.0.0.1:11434/api/pull", json=payload)
 
-def ollama_chat_http(model, messages, options=None, format=None):
-    url = "http://127.0.0.1:11434/api/chat"
+def chat_payload(model, messages, options=None, format=None, stream=False, keep_alive=None):
     payload = {
         "model": model,
         "messages": messages,
-        "stream": False,
+        "stream": stream,
         "raw": False,
         "options": {
             "temperature": 0,
@@ -166,48 +253,138 @@ def ollama_chat_http(model, messages, options=None, format=None):
         payload["options"] = options
     if format:
         payload["format"] = format
-    resp = requests.post(url, json=payload)
-    resp.raise_for_status()
-    data = resp.json()
-    return data["message"]["content"]
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    return payload
 
-def sanitize_output(text):
-    """Clean model output of special tokens and formatting."""
-    # Remove think blocks (DeepSeek)
-    text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
-    
-    # Remove chat template tokens
-    stop_tokens = ["<|system|>", "<|user|>", "<|assistant|>", "<|end|>", "</s>"]
-    for token in stop_tokens:
-        text = text.replace(token, "")
-    
-    # Remove markdown code blocks
-    text = re.sub(r'```[a-z]*\n?', '', text)
-    text = text.replace('```', '')
-    
-    # Remove ANSI escape codes
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    text = ansi_escape.sub('', text)
+def reply_stats(data):
+    """Token counts and timings (ms) from the final /api/chat message."""
+    ms = lambda key: round(data[key] / 1e6, 2) if data.get(key) is not None else None
+    return {"tokens": data.get("eval_count"), "done_reason": data.get("done_reason"),
+            "prompt_tokens": data.get("prompt_eval_count"), "prompt_ms": ms("prompt_eval_duration"),
+            "load_ms": ms("load_duration"), "eval_ms": ms("eval_duration")}
+
+def ollama_chat_reply(model, messages, options=None, format=None, keep_alive=None):
+    """Non-streaming /api/chat; returns the full response body (content, eval_count, done_reason)."""
+    url = "http://127.0.0.1:11434/api/chat"
+    with span("POST /api/chat", "http", model=model):
+        with socket_wait():
+            resp = requests.post(url, json=chat_payload(model, messages, options, format, keep_alive=keep_alive))
+        resp.raise_for_status()
+        return resp.json()
+
+def ollama_chat_http(model, messages, options=None, format=None):
+    return ollama_chat_reply(model, messages, options, format)["message"]["content"]
+
+def ollama_chat_stream(model, messages, options=None, format=None, decide=None, sanitize=None, keep_alive=None):
+    """Stream /api/chat and hang up as soon as decide(sanitized_so_far) is True.
+
+    Closing the connection makes Ollama stop generating. Returns the raw
+    content, the tokens generated (eval_count, or streamed chunks when
+    aborted) and whether the stream was cut short.
+    """
+    url = "http://127.0.0.1:11434/api/chat"
+    sanitizer = StreamSanitizer(sanitize)
+    pieces = []
+    chunks = 0
+    final = {}
+    aborted = False
+    payload = chat_payload(model, messages, options, format, stream=True, keep_alive=keep_alive)
+    with span("POST /api/chat", "http", model=model, stream=True):
+        with socket_wait():
+            resp = requests.post(url, json=payload, stream=True)
+        with resp:
+            resp.raise_for_status()
+            for line in wait_iter(resp.iter_lines()):
+                if not line:
+                    continue
+                data = json.loads(line)
+                if "error" in data:
+                    raise RuntimeError(data["error"])
+                piece = data.get("message", {}).get("content", "")
+                if piece:
+                    chunks += 1
+                    pieces.append(piece)
+                    if sanitizer.feed(piece) and decide and decide(sanitizer.text):
+                        aborted = True
+                        break
+                if data.get("done"):
+                    final = data
+                    break
+    reply = reply_stats(final)
+    reply.update({"content": "".join(pieces), "tokens": reply["tokens"] or chunks, "aborted": aborted})
+    return reply
+
+def generate(model, messages, options, format=None, stream=False, decide=None, sanitize=None, keep_alive=None):
+    """One chat turn; with stream=True generation stops once decide() settles the result."""
+    with span("chat", "turn", model=model, messages=len(messages)):
+        if stream:
+            reply = ollama_chat_stream(model, messages, options, format, decide, sanitize, keep_alive)
+        else:
+            data = ollama_chat_reply(model, messages, options, format, keep_alive)
+            reply = reply_stats(data)
+            reply.update({"content": data["message"]["content"], "aborted": False})
+        annotate(tokens=reply["tokens"], prompt_tokens=reply.get("prompt_tokens"), aborted=reply["aborted"])
+        return reply
+
+def abort_note(*replies):
+    """Status suffix with the tokens generated by turns that were cut short."""
+    cut = [r for r in replies if r["aborted"]]
+    return f", ✂️ {sum(r['tokens'] for r in cut)} tok" if cut else ""
+
+def start_calibration(model, static_limit, categories):
+    """Learn this model's limits from its history, persist them by digest and print the savings."""
+    digest = ollama_digest(model)
+    samples = load_history(HISTORY_FILE, digest)
+    table = load_calibration(CALIBRATION_FILE)
+    learned = calibrate(samples, static_limit) if samples else table.get(digest, {}).get("categories", {})
+    table[digest] = {"model": model, "static_num_predict": static_limit, "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                     "categories": learned}
+    save_calibration(table, CALIBRATION_FILE)
+
+    r = calibration_report(samples, learned, static_limit, categories)
+    print(f"   🎯 Calibration ({digest[:19]}): {r['categories']} categories from {len(samples)} recorded turns")
+    if learned:
+        print(f"      ├─ num_predict: " + ", ".join(f"{c}={v['num_predict']}" for c, v in sorted(learned.items())))
+        print(f"      ├─ Budget per suite: {r['budget_static']} → {r['budget_calibrated']} tokens")
+        print(f"      └─ On recorded runs: {r['recorded_saving']} of {r['recorded_tokens']} tokens saved "
+              f"({r['hit_static_limit']} turns ran into the static limit)")
+    return digest, learned
+
+def build_instruct_messages(prompt, variant=None):
+    """Instruct-mode request: system prompt, few-shot pairs, then the test prompt.
+
+    'variant' (see ablation.py) swaps in a different system prompt and few-shot list.
+    """
+    system = variant["system"] if variant else INSTRUCT_SYSTEM_PROMPT
+    few_shot = variant["few_shot"] if variant else INSTRUCT_FEW_SHOT
+    return [{"role": "system", "content": system}] + few_shot + [
+        {"role": "user", "content": prompt}
+    ]
+
+def build_tool_messages(prompt, variant=None):
+    """Tool-mode turn 1: system prompt, few-shot pairs, then the test prompt."""
+    system = variant["system"] if variant else TOOL_SYSTEM_PROMPT
+    few_shot = variant["few_shot"] if variant else TOOL_FEW_SHOT
+    return [{"role": "system", "content": system}] + few_shot + [
+        {"role": "user", "content": prompt}
+    ]
+
+def build_tool_followup_messages(prompt, raw_content, tool_name, tool_result, variant=None):
+    """Tool-mode turn 2: the model's tool call plus the tool result, asking for a plain answer."""
+    return [
+        {"role": "system", "content": variant["system"] if variant else TOOL_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+        {"role": "assistant", "content": raw_content.strip()},
+        {
+            "role": "tool",
+            "content": json.dumps(tool_result) if isinstance(tool_result, dict) else str(tool_result),
+            "name": tool_name
+        },
+        # Force natural language response
+        {"role": "user", "content": "Now answer the original request in plain English using the tool result."}
+    ]
 
-    # Force decoding of unicode escapes if the model outputted literal backslashes
-    try:
-        # This converts literal \u00b0 strings into the actual character
-        text = text
-    except:
-        pass
-    return text    
-    # Keep only printable characters
-    text = "".join(char for char in text if char.isprintable())
-    text = text.strip()
-    
-    # Remove surrounding quotes
-    if (text.startswith('"') and text.endswith('"')) or \
-       (text.startswith("'") and text.endswith("'")) or \
-       (text.startswith('`') and text.endswith('`')):
-        text = text[1:-1]
-    
-    return text.strip()
-    
 def robust_execute(t_name, t_args):
     """Execute a tool with flexible argument mapping."""
     if t_args is None:
@@ -310,71 +487,25 @@ def robust_execute(t_name, t_args):
             t_args["days"] = int(t_args["days"])        
     return execute_tool(t_name, t_args)
 
+def seeded_tools(test_name):
+    """Per-test tool context: same seed + test name => identical tool outputs on every run."""
+    return tool_context(BENCHMARK_CONFIG["options"].get("seed"), test_name, BENCHMARK_CONFIG.get("tool_clock"))
+
+def step_format(step_tool):
+    """Constrained format for one planned step; unknown tools stay unconstrained."""
+    if isinstance(step_tool, str) and not step_tool.startswith("_") and callable(getattr(ToolRegistry, step_tool, None)):
+        return tool_call_schema([step_tool])
+    return None
+
 def get_available_tools_list():
     # Gets all static methods from ToolRegistry that don't start with _
     return [func for func in dir(ToolRegistry) if not func.startswith("_") 
             and callable(getattr(ToolRegistry, func))]
 
-def run_all_tools_logic():
-    """Iterates through ToolRegistry and executes every tool with sample data."""
-    print(f"\n🛠️  EXECUTING ALL REGISTERED TOOLS")
-    print("-" * 45)
-    
-    # Unified sample data mapping
-    sample_data = {
-        "get_weather": {"location": "London"},
-        "get_temperature": {"location": "London"}, # Alias
-        "get_forecast": {"location": "New York", "days": 3},
-        "get_air_quality": {"city": "Tokyo"},
-        "calculator": {"expression": "sqrt(144) + 10"},
-        "calc": {"expression": "10 + 10"}, # Alias
-        "convert_units": {"value": 100, "from_unit": "miles", "to_unit": "kilometers"},
-        "generate_random_number": {"min_val": 1, "max_val": 50},
-        "calculate_stats": {"numbers": [10, 20, 30, 40, 50]},
-        "create_directory": {"path": "test_bench_dir"},
-        "create_folder": {"path": "test_folder"}, # Alias
-        "mkdir": {"path": "test_mkdir"}, # Alias
-        "list_files": {"path": "."},
-        "read_file": {"path": "tools.py"},
-        "write_file": {"path": "test.txt", "content": "Hello Bench"},
-        "delete_file": {"path": "test.txt"},
-        "get_user": {"user_id": 1},
-        "find_user": {"name": "John Doe"}, # Changed from query
-        "create_user": {"name": "VTSTech", "email": "nospam@vts-tech.org"},
-        "send_email": {"to": "test@example.com", "subject": "Bench", "body": "Hello"},
-        "email": {"to": "test@example.com", "subject": "Bench", "body": "Hello"}, # Alias
-        "send_sms": {"phone_number": "555-0199", "message": "Test SMS"},
-        "current_time": {},
-        "date_calculator": {"base_date": "2026-02-13", "days": 30},
-        "timezone_converter": {"time_str": "14:30", "from_tz": "EST", "to_tz": "PST"},
-        "hash_text": {"text": "password123", "algorithm": "sha256"},
-        "generate_password": {"length": 12},
-        "decode_url": {"encoded": "https%3A%2F%2Fvts-tech.org"},
-        "encode_url": {"text": "https://vts-tech.org"},
-        "fetch_url": {"url": "https://wttr.in/London?format=3"},
-        "ping_host": {"host": "8.8.8.8"}
-    }
-
-    methods = [m for m in dir(ToolRegistry) if not m.startswith('_') and callable(getattr(ToolRegistry, m))]
-
-    for method_name in methods:
-        # Skip class methods or internal stuff
-        if method_name in ['execute_tool', 'validate_tool_call']: continue
-        
-        print(f"Running {method_name:<25}", end=" -> ", flush=True)
-        try:
-            func = getattr(ToolRegistry, method_name)
-            args = sample_data.get(method_name, {})
-            
-            # Use inspect to only pass valid arguments if you want to be extra safe
-            result = func(**args)
-            print(f"✅ SUCCESS\n{result}")
-        except Exception as e:
-            print(f"❌ FAILED: {str(e)}")    
 # ============ EVALUATION FUNCTIONS ============
-def evaluate_model_instruct(model, args):
+def evaluate_model_instruct(model, args, variant=None):
     print(f"\n{'='*40}")
-    print(f"🚀 EVALUATING: {model}")
+    print(f"🚀 EVALUATING: {model}" + (f" [{variant['name']}]" if variant else ""))
     print(f"{'='*40}")
     
     passed_count = 0
@@ -383,6 +514,9 @@ def evaluate_model_instruct(model, args):
     
     options = BENCHMARK_CONFIG["options"].copy()
     options["num_predict"] = MODEL_NUM_PREDICT.get(model, MODEL_NUM_PREDICT["default"])
+    if args.calibrate:
+        digest, learned = start_calibration(model, options["num_predict"],
+                                            [test_category(t['name']) for t in INSTRUCT_TEST_SUITE])
     
     if args.warmup:
         print(f"   🔥 Warmup ping...", end=" ", flush=True)
@@ -396,34 +530,46 @@ def evaluate_model_instruct(model, args):
         except Exception as e:
             print(f"failed ({e})")
     
-    for test in INSTRUCT_TEST_SUITE:
+    for test in iter_spans(INSTRUCT_TEST_SUITE, "test", lambda t: t['name']):
         print(f"Test: {test['name']:<22}", end=" ", flush=True)
         
         is_json_test = "JSON" in test['name'] or "JSON" in test['prompt']
-        messages = [{"role": "system", "content": INSTRUCT_SYSTEM_PROMPT}] + INSTRUCT_FEW_SHOT + [
-            {"role": "user", "content": test['prompt']}
-        ]
+        messages = build_instruct_messages(test['prompt'], variant)
         
         if args.delay > 0:
             print(f"(Wait {args.delay}s..)", end=" ", flush=True)
             time.sleep(args.delay)
         
+        host = host_mark()
         start = time.perf_counter()
         try:
             format_json = "json" if is_json_test else None
-            raw_content = ollama_chat_http(
+            decide = test.get("decide")
+            if is_json_test:
+                decide = lambda x, d=decide: json_value_complete(x) or bool(d and d(x))
+            category = test_category(test['name'])
+            test_options = calibrated_options(options, learned, category) if args.calibrate else options
+            reply = generate(
                 model=model,
                 messages=messages,
-                options=options,
-                format=format_json
+                options=test_options,
+                format=format_json,
+                stream=args.stream,
+                decide=decide,
+                sanitize=test.get("sanitize")
             )
+            raw_content = reply["content"]
+            if args.calibrate:
+                record_generation(HISTORY_FILE, model, digest, category, test_options["num_predict"], reply,
+                                  test_options.get("stop"))
             duration = time.perf_counter() - start
-            content = sanitize_output(raw_content)
+            content = sanitize_output(raw_content, test.get("sanitize"))
             
-            is_pass = test["validator"](content)
+            with span("validate", "validate"):
+                is_pass = test["validator"](content)
             
             status = "✅ PASS" if is_pass else "❌ FAIL"
-            print(f"{status} ({duration:.2f}s)")
+            print(f"{status} ({duration:.2f}s{abort_note(reply)})")
             
             if args.verbose:
                 raw_display = raw_content.replace('\n', ' ')
@@ -441,7 +587,10 @@ def evaluate_model_instruct(model, args):
                 "pass": is_pass,
                 "latency": duration,
                 "raw": raw_content,
-                "sanitized": content
+                "sanitized": content,
+                "tokens": reply["tokens"],
+                "aborted": reply["aborted"],
+                "host": host_window(host)
             })
             
             if args.output:
@@ -460,107 +609,247 @@ def evaluate_model_instruct(model, args):
     avg_lat = total_time / len(INSTRUCT_TEST_SUITE)
     
     print(f"\n📊 Model Summary: {model} - Score: {score:.2f}% - Avg Latency: {avg_lat:.2f}s")
+    if args.stream:
+        print(f"✂️  Stopped early: {sum(1 for r in results if r['aborted'])}/{len(results)} tests")
+    print_host_summary(results)
     
     return model, score, avg_lat, results
                 
-def evaluate_model_agent(model, planner, args):
-    """Executes a multi-step ReAct-style workflow."""    
+def parse_plan(raw_plan):
+    """Planner output -> [{"tool", "after"}]. Plain tool lists run in order, each step after the previous one."""
+    # THE LIST ENFORCER: Force the planner output into a clean list
+    try:
+        plan_data = json.loads(sanitize_output(raw_plan))
+        if isinstance(plan_data, dict):
+            steps = list(plan_data.keys())
+        elif isinstance(plan_data, list):
+            steps = plan_data
+        else:
+            steps = [str(plan_data)]
+    except:
+        steps = []
+
+    plan = []
+    for i, step in enumerate(steps):
+        if isinstance(step, dict) and ("tool" in step or "name" in step):
+            after = step.get("after", step.get("depends_on", []))
+            after = after if isinstance(after, list) else [after]
+            # Only earlier steps count, which also rules out cycles
+            plan.append({"tool": step.get("tool", step.get("name")),
+                         "after": sorted({a for a in after if isinstance(a, int) and 0 <= a < i})})
+        else:
+            plan.append({"tool": step, "after": [i - 1] if i else []})
+    return plan
+
+def run_agent_step(model, test, step_tool, step_index, agent_ctx, depends_on, args):
+    """Generate and execute one planned tool call given the results it depends on."""
+    context_str = agent_ctx.render(depends_on, step_tool)
+    # We feed the context so far into the next tool call
+    exec_msg = [
+    {"role": "system", "content": f"{TOOL_SYSTEM_PROMPT}\nREQUIRED SCHEMA: {TOOL_SCHEMAS.get(step_tool)}"},
+    {"role": "user", "content": f"TASK: {test['prompt']}\n\nPREVIOUS RESULTS: {context_str}\n\nAction: Generate the JSON call for '{step_tool}'. Use data from PREVIOUS RESULTS if needed."}
+    ]
+    
+    step_reply = generate(model, exec_msg, None, format=step_format(step_tool) if args.constrained else None)
+    tool_call_raw = step_reply["content"]
+    cleaned_call = sanitize_output(tool_call_raw)
+    if args.verbose: print(f"[debug] tool_call_raw: {cleaned_call}".encode('utf-8').decode('unicode_escape'))
+    
+    if is_tool_call(cleaned_call):
+        try:
+            call_data = json.loads(cleaned_call)
+            t_name = call_data.get("name", step_tool)
+            t_args = agent_ctx.resolve(call_data.get("arguments", {}))
+            
+            # Use our new robust mapping wrapper
+            with seeded_tools(f"{test['name']}:{step_index}"), span(t_name, "tool"):
+                output = robust_execute(t_name, t_args)
+            entry = {"tool": t_name, "result": output}
+        except Exception as e:
+            entry = {"tool": step_tool, "error": str(e)}
+    else:
+        entry = {"tool": step_tool, "response": cleaned_call}
+    return entry, step_reply, estimate_tokens(context_str)
+
+def execute_plan(model, test, plan, args, workers=1):
+    """Run each step once the steps it depends on are done, up to 'workers' at a time.
+
+    A step sees the results of all its ancestors in plan order, so a plain
+    list plan with one worker is the classic sequential agent loop.
+    Returns (AgentContext, tokens, step timings).
+    """
+    ancestors = []
+    for step in plan:
+        found = set(step["after"])
+        for a in step["after"]:
+            found |= ancestors[a]
+        ancestors.append(found)
+
+    agent_ctx = AgentContext(budget=args.agent_context_budget)
+    done = set()
+    timings = [None] * len(plan)
+    tokens = 0
+    pending = list(range(len(plan)))
+    origin = time.perf_counter()
+    parent_span = current_span()
+
+    def timed_step(i):
+        start = time.perf_counter() - origin
+        with span(f"#{i} {plan[i]['tool']}", "step", parent=parent_span, after=plan[i]["after"]), profiled_thread():
+            result = run_agent_step(model, test, plan[i]["tool"], i, agent_ctx, ancestors[i], args)
+        return result + (start, time.perf_counter() - origin)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            for i in [i for i in pending if all(a in done for a in plan[i]["after"])]:
+                if len(running) >= workers:
+                    break
+                running[pool.submit(timed_step, i)] = i
+                pending.remove(i)
+            with socket_wait():
+                # Steps in flight are waiting on Ollama; so is the main thread
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = running.pop(future)
+                entry, reply, context_tokens, start, end = future.result()
+                agent_ctx.add(i, entry)
+                done.add(i)
+                tokens += reply["tokens"] or 0
+                timings[i] = {"tool": entry["tool"], "after": plan[i]["after"],
+                              "start": round(start, 4), "end": round(end, 4), "duration": round(end - start, 4),
+                              "context_tokens": context_tokens, "prompt_tokens": reply.get("prompt_tokens")}
+    return agent_ctx, tokens, timings
+
+def critical_path(timings):
+    """Longest chain of step durations through the dependency graph."""
+    finish = []
+    for t in timings:
+        finish.append(t["duration"] + max((finish[a] for a in t["after"]), default=0))
+    return max(finish, default=0)
+
+def make_plans(planner, args):
+    """Run the planner once over every agent task: {task name: {raw, tokens, latency} or {error}}."""
+    plans = {}
+    for test in iter_spans(AGENT_TEST_SUITE, "plan", lambda t: t['name']):
+        system = PLANNER_DAG_SYSTEM_PROMPT if args.agent_dag else PLANNER_SYSTEM_PROMPT
+        selected, selection_ms = None, None
+        if args.tool_top_k:
+            selected, selection_ms = select_tools(test['prompt'], args.tool_top_k)
+            system = restrict_tool_list(system, selected)
+        plan_msg = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": test['prompt']}
+        ]
+        plan_format = plan_schema(selected or None, dag=args.agent_dag) if args.constrained else "json"
+        start = time.perf_counter()
+        try:
+            plan_reply = generate(planner, plan_msg, None, format=plan_format)
+            plans[test['name']] = {"raw": plan_reply["content"], "tokens": plan_reply["tokens"] or 0,
+                                   "latency": time.perf_counter() - start, "selected_tools": selected,
+                                   "selection_ms": selection_ms,
+                                   "tool_recall": tool_recall(selected, test.get("tools") or test.get("steps"))
+                                   if args.tool_top_k else None}
+        except Exception as e:
+            plans[test['name']] = {"error": str(e)}
+    return plans
+
+def evaluate_model_agent(model, planner, args, plans=None):
+    """Executes a multi-step ReAct-style workflow; with --agent-dag independent steps run in parallel.
+
+    'plans' from make_plans() lets several executors share one planner pass;
+    the cached planning latency is still counted in each task's latency.
+    """    
     passed_count = 0
     total_time = 0
     test_results = []
+    workers = max(1, args.agent_workers) if args.agent_dag else 1
     
     print(f"\n🚀 EVALUATING AGENT: [Planner: {planner}] [Tools/Synthesis: {model}]")
     print("-" * 55)
+    if plans is None:
+        plans = make_plans(planner, args)
 
-    for test in AGENT_TEST_SUITE:
+    for test in iter_spans(AGENT_TEST_SUITE, "test", lambda t: t['name']):
         print(f"Agent Task: {test['name']:<25}", end=" ", flush=True)
+        host = host_mark()
         start_time = time.perf_counter()
         
         try:
-            # --- STEP 1: PLANNING ---
-            plan_msg = [
-                {"role": "system", "content": PLANNER_SYSTEM_PROMPT},
-                {"role": "user", "content": test['prompt']}
-            ]
-            
-            raw_plan = ollama_chat_http(planner, plan_msg, format="json")
+            # --- STEP 1: PLANNING (cached per planner) ---
+            cached = plans[test['name']]
+            if "error" in cached:
+                raise RuntimeError(f"planner failed: {cached['error']}")
+            raw_plan = cached["raw"]
+            tokens = cached["tokens"]
+            start_time -= cached["latency"]
             if args.verbose: print(f"\n[debug] raw_plan: {raw_plan}".encode('utf-8').decode('unicode_escape'))
+            plan = parse_plan(raw_plan)
             
-            # THE LIST ENFORCER: Force the planner output into a clean list
-            try:
-                plan_data = json.loads(sanitize_output(raw_plan))
-                if isinstance(plan_data, dict):
-                    steps = list(plan_data.keys())
-                elif isinstance(plan_data, list):
-                    steps = plan_data
-                else:
-                    steps = [str(plan_data)]
-            except:
-                steps = []
-            
-            # --- STEP 2: PROGRESSIVE EXECUTION ---
-            context_so_far = []
-            
-            for step_tool in steps:
-                schema_hint = TOOL_SCHEMAS.get(step_tool, '{"name": "tool_name", "arguments": {}}')
-                context_str = json.dumps(context_so_far, ensure_ascii=False)
-                # We feed the context so far into the next tool call
-                exec_msg = [
-                {"role": "system", "content": f"{TOOL_SYSTEM_PROMPT}\nREQUIRED SCHEMA: {TOOL_SCHEMAS.get(step_tool)}"},
-                {"role": "user", "content": f"TASK: {test['prompt']}\n\nPREVIOUS RESULTS: {context_str}\n\nAction: Generate the JSON call for '{step_tool}'. Use data from PREVIOUS RESULTS if needed."}
-                ]
-                
-                tool_call_raw = ollama_chat_http(model, exec_msg)
-                cleaned_call = sanitize_output(tool_call_raw)
-                if args.verbose: print(f"[debug] tool_call_raw: {cleaned_call}".encode('utf-8').decode('unicode_escape'))
-                
-                if is_tool_call(cleaned_call):
-                    try:
-                        call_data = json.loads(cleaned_call)
-                        t_name = call_data.get("name", step_tool)
-                        t_args = call_data.get("arguments", {})
-                        
-                        # Use our new robust mapping wrapper
-                        output = robust_execute(t_name, t_args)
-                        context_so_far.append({"tool": t_name, "result": output})
-                    except Exception as e:
-                        context_so_far.append({"tool": step_tool, "error": str(e)})
-                else:
-                    context_so_far.append({"tool": step_tool, "response": cleaned_call})
+            # --- STEP 2: EXECUTION (dependency order) ---
+            step_start = time.perf_counter()
+            agent_ctx, step_tokens, timings = execute_plan(model, test, plan, args, workers)
+            step_wall = time.perf_counter() - step_start
+            tokens += step_tokens
 
             # --- STEP 3: FINAL SYNTHESIS ---
-            synthesis_input = f"User Request: {test['prompt']}\nExecution Results: {json.dumps(context_so_far)}"
+            synthesis_input = f"User Request: {test['prompt']}\nExecution Results: {agent_ctx.render(ensure_ascii=True)}"
             synthesis_msg = [
                 {"role": "system", "content": AGENT_SYSTEM_PROMPT},
                 {"role": "user", "content": synthesis_input}
             ]
             
-            final_answer = ollama_chat_http(model, synthesis_msg)
+            final_reply = generate(model, synthesis_msg, None)
+            final_answer = final_reply["content"]
+            tokens += final_reply["tokens"] or 0
             if args.verbose: print(f"[debug] final_answer: {final_answer}".encode('utf-8').decode('unicode_escape'))
             
             # --- STEP 4: VALIDATION ---
-            is_pass = test["validator"](final_answer)
+            with span("validate", "validate"):
+                is_pass = test["validator"](final_answer)
             
             duration = time.perf_counter() - start_time
             total_time += duration
             if is_pass: passed_count += 1
             
+            step_serial = sum(t["duration"] for t in timings)
             test_results.append({
-                "model": model, "test": test['name'], "pass": is_pass, "latency": duration
+                "model": model, "planner": planner, "test": test['name'], "pass": is_pass, "latency": duration,
+                "plan_latency": cached["latency"], "tokens": tokens,
+                # The plan was generated before this task's host window opened
+                "host_tokens": tokens - cached["tokens"],
+                "selected_tools": cached["selected_tools"], "selection_ms": cached["selection_ms"],
+                "tool_recall": cached["tool_recall"],
+                "steps": timings, "step_wall": step_wall, "step_serial": step_serial,
+                "critical_path": critical_path(timings),
+                "synthesis_context_tokens": estimate_tokens(synthesis_input),
+                "synthesis_prompt_tokens": final_reply.get("prompt_tokens"),
+                "host": host_window(host)
             })
             
-            print(f"{'✅ PASS' if is_pass else '❌ FAIL'} ({duration:.2f}s)")
+            dag_note = ""
+            if args.agent_dag and timings:
+                dag_note = (f" [{len(timings)} steps: serial {step_serial:.2f}s → wall {step_wall:.2f}s,"
+                            f" critical path {critical_path(timings):.2f}s]")
+            print(f"{'✅ PASS' if is_pass else '❌ FAIL'} ({duration:.2f}s){dag_note}")
+            if args.verbose:
+                for i, t in enumerate(timings):
+                    print(f"    ├─ #{i} {t['tool']} after {t['after']}: {t['start']:.2f}s → {t['end']:.2f}s, "
+                          f"context ~{t['context_tokens']} tok, prompt {t['prompt_tokens'] or '?'} tok")
+                print(f"    └─ synthesis: context ~{estimate_tokens(synthesis_input)} tok, "
+                      f"prompt {final_reply.get('prompt_tokens') or '?'} tok")
             
         except Exception as e:
             print(f"⚠️ ERROR: {e}")
 
     score = (passed_count / len(AGENT_TEST_SUITE)) * 100 if AGENT_TEST_SUITE else 0
     avg_lat = total_time / len(AGENT_TEST_SUITE) if AGENT_TEST_SUITE else 0
+    print_host_summary(test_results)
     return (model, score, avg_lat, test_results)
     
-def evaluate_model_tool(model, args):
+def evaluate_model_tool(model, args, variant=None):
     print(f"\n{'='*40}")
-    print(f"🚀 TOOL BENCHMARK: {model}")
+    print(f"🚀 TOOL BENCHMARK: {model}" + (f" [{variant['name']}]" if variant else ""))
     print(f"{'='*40}")
     
     passed_count = 0
@@ -569,6 +858,10 @@ def evaluate_model_tool(model, args):
     
     options = BENCHMARK_CONFIG["options"].copy()
     options["num_predict"] = MODEL_NUM_PREDICT.get(model, MODEL_NUM_PREDICT["default"])
+    if args.calibrate:
+        digest, learned = start_calibration(model, options["num_predict"],
+                                            [test_category(t['name'], turn) for t in TOOL_TEST_SUITE
+                                             for turn in (("call", "answer") if t.get("expects_tool") else ("call",))])
     
     if args.warmup:
         print(f"   🔥 Warmup ping...", end=" ", flush=True)
@@ -582,30 +875,49 @@ def evaluate_model_tool(model, args):
         except Exception as e:
             print(f"failed ({e})")
     
-    for test in TOOL_TEST_SUITE:
+    top_k = (variant or {}).get("tool_top_k") or args.tool_top_k
+    for test in iter_spans(TOOL_TEST_SUITE, "test", lambda t: t['name']):
         print(f"Test: {test['name']:<22}", end=" ", flush=True)
         
-        messages = [{"role": "system", "content": TOOL_SYSTEM_PROMPT}] + TOOL_FEW_SHOT + [
-            {"role": "user", "content": test['prompt']}
-        ]
+        test_variant, selected, selection_ms = variant, None, None
+        if top_k:
+            # Only the top-k retrieved signatures go into this request's tool list
+            selected, selection_ms = select_tools(test['prompt'], top_k)
+            test_variant = {
+                "name": variant["name"] if variant else "retrieved",
+                "system": restrict_tool_list(variant["system"] if variant else TOOL_SYSTEM_PROMPT, selected),
+                "few_shot": variant["few_shot"] if variant else TOOL_FEW_SHOT
+            }
+        messages = build_tool_messages(test['prompt'], test_variant)
         
         if args.delay > 0:
             print(f"(Wait {args.delay}s..)", end=" ", flush=True)
             time.sleep(args.delay)
         
+        host = host_mark()
         start = time.perf_counter()
         
         try:
-            # Turn 1: Model calls tool
-            raw_content = ollama_chat_http(
+            # Turn 1: Model calls tool (a finished JSON value is the whole call)
+            category = test_category(test['name'], "call")
+            test_options = calibrated_options(options, learned, category) if args.calibrate else options
+            reply = generate(
                 model=model,
                 messages=messages,
-                options=options,
-                format=None
+                options=test_options,
+                format=tool_call_schema(selected or None, allow_answer=True) if args.constrained else None,
+                stream=args.stream,
+                decide=json_value_complete
             )
+            raw_content = reply["content"]
+            if args.calibrate:
+                record_generation(HISTORY_FILE, model, digest, category, test_options["num_predict"], reply,
+                                  test_options.get("stop"))
+            replies = [reply]
             
             # Parse tool call
             tool_name, tool_args = None, None
+            answer = None
             try:
                 cleaned = raw_content.strip()
                 if cleaned.startswith("```"):
@@ -622,6 +934,9 @@ def evaluate_model_tool(model, args):
                 elif "function" in data and "params" in data:
                     tool_name = data["function"]
                     tool_args = data["params"]
+                elif "answer" in data:
+                    # Constrained mode's way of answering without a tool
+                    answer = str(data["answer"])
             except:
                 pass
             
@@ -635,34 +950,35 @@ def evaluate_model_tool(model, args):
                     continue
                 
                 # Execute the real tool
-                tool_result = robust_execute(tool_name, tool_args)
+                with seeded_tools(test['name']), span(tool_name, "tool"):
+                    tool_result = robust_execute(tool_name, tool_args)
                 
                 # Add tool call and result to conversation
-                messages = [
-                    {"role": "system", "content": TOOL_SYSTEM_PROMPT},
-                    {"role": "user", "content": test['prompt']},
-                    {"role": "assistant", "content": raw_content.strip()},
-                    {
-                        "role": "tool",
-                        "content": json.dumps(tool_result) if isinstance(tool_result, dict) else str(tool_result),
-                        "name": tool_name
-                    },
-                    # Force natural language response
-                    {"role": "user", "content": "Now answer the original request in plain English using the tool result."}
-                ]               
+                messages = build_tool_followup_messages(test['prompt'], raw_content, tool_name, tool_result, test_variant)
                 # Turn 2: Model responds with natural language
-                final_response = ollama_chat_http(
+                category = test_category(test['name'], "answer")
+                test_options = calibrated_options(options, learned, category) if args.calibrate else options
+                final_reply = generate(
                     model=model,
                     messages=messages,
-                    options=options,
-                    format=None
+                    options=test_options,
+                    format=None,
+                    stream=args.stream,
+                    decide=test.get("decide"),
+                    sanitize=test.get("sanitize")
                 )
+                final_response = final_reply["content"]
+                if args.calibrate:
+                    record_generation(HISTORY_FILE, model, digest, category, test_options["num_predict"], final_reply,
+                                      test_options.get("stop"))
+                replies.append(final_reply)
                 
                 duration = time.perf_counter() - start
-                content = sanitize_output(final_response)
+                content = sanitize_output(final_response, test.get("sanitize"))
                 
                 # Validate using test's validator
-                is_pass = test["validator"](content)
+                with span("validate", "validate"):
+                    is_pass = test["validator"](content)
                 
                 if args.verbose:
                     print(f"\n      ├─ Tool Call: {tool_name}({tool_args})")
@@ -672,11 +988,12 @@ def evaluate_model_tool(model, args):
             else:
                 # No tool expected - direct answer
                 duration = time.perf_counter() - start
-                content = sanitize_output(raw_content)
-                is_pass = test["validator"](content) and not is_tool_call(raw_content)
+                content = sanitize_output(raw_content if answer is None else answer, test.get("sanitize"))
+                with span("validate", "validate"):
+                    is_pass = test["validator"](content) and not is_tool_call(raw_content)
             
             status = "✅ PASS" if is_pass else "❌ FAIL"
-            print(f"{status} ({duration:.2f}s)")
+            print(f"{status} ({duration:.2f}s{abort_note(*replies)})")
             
             if is_pass:
                 passed_count += 1
@@ -687,10 +1004,16 @@ def evaluate_model_tool(model, args):
                 "test": test['name'],
                 "pass": is_pass,
                 "latency": duration,
+                "aborted": any(r["aborted"] for r in replies),
+                "tokens": sum(r["tokens"] or 0 for r in replies),
                 "tool_call": raw_content if test.get("expects_tool", False) else None,
                 "tool_result": tool_result if test.get("expects_tool", False) else None,
                 "final_response": final_response if test.get("expects_tool", False) else raw_content,
-                "sanitized": content
+                "sanitized": content,
+                "selected_tools": selected,
+                "selection_ms": selection_ms,
+                "tool_recall": tool_recall(selected, test.get("tools")) if top_k else None,
+                "host": host_window(host)
             })
             
             if args.output:
@@ -716,9 +1039,385 @@ def evaluate_model_tool(model, args):
     avg_lat = total_time / len(TOOL_TEST_SUITE)
     
     print(f"\n📊 Model Summary: {model} - Score: {score:.2f}% - Avg Latency: {avg_lat:.2f}s")
+    if args.stream:
+        print(f"✂️  Stopped early: {sum(1 for r in results if r['aborted'])}/{len(results)} tests")
+    print(f"🔢 Generated tokens: {sum(r['tokens'] for r in results)}"
+          f" ({'constrained' if args.constrained else 'unconstrained'} tool calls)")
+    if top_k:
+        print_retrieval_summary(results, top_k)
+    print_host_summary(results)
     
     return model, score, avg_lat, results
 
+def print_retrieval_summary(results, k):
+    """Recall of the expected tools and selection cost for --tool-top-k."""
+    recalls = [r["tool_recall"] for r in results if r.get("tool_recall") is not None]
+    timed = [r for r in results if r.get("selection_ms") is not None]
+    if not timed:
+        return
+    listed = sum(len(r["selected_tools"]) for r in timed) / len(timed)
+    recall = f"{sum(recalls) / len(recalls) * 100:.1f}%" if recalls else "n/a"
+    print(f"🔎 Tool retrieval (top-{k}): recall {recall} over {len(recalls)} tasks, "
+          f"{listed:.1f} tools listed on average, selection {sum(r['selection_ms'] for r in timed) / len(timed) * 1000:.0f}µs avg")
+
+# ============ CONVERSATION (KV-CACHE) BENCHMARK ============
+# session         - one growing chat: few-shot prefix, then every test turn and reply appended
+# fresh           - every test as its own chat behind the same stable prefix (what instruct mode sends)
+# volatile-prefix - like fresh, but a per-request line leads the system prompt, defeating prefix reuse
+CONVERSATION_VARIANTS = ("session", "fresh", "volatile-prefix")
+
+def conversation_messages(variant, history, prompt, turn):
+    if variant == "session":
+        return build_instruct_messages(INSTRUCT_TEST_SUITE[0]['prompt'])[:-1] + history + [
+            {"role": "user", "content": prompt}
+        ]
+    if variant == "volatile-prefix":
+        messages = build_instruct_messages(prompt)
+        messages[0] = {"role": "system", "content": f"Request #{turn} at {time.time():.6f}\n{INSTRUCT_SYSTEM_PROMPT}"}
+        return messages
+    return build_instruct_messages(prompt)
+
+def ollama_unload(model, timeout=30):
+    """Evict a model (and its KV cache) from memory; False if Ollama did not confirm it."""
+    try:
+        resp = requests.post("http://127.0.0.1:11434/api/generate", json={"model": model, "keep_alive": 0},
+                             timeout=timeout)
+        resp.raise_for_status()
+        return True
+    except Exception as e:
+        print(f"⚠️ unload failed: {e}")
+        return False
+
+def measure_uncached(model, message_lists, options):
+    """prompt_eval_count of each distinct message list with nothing cached.
+
+    The model is unloaded first and every request uses keep_alive=0, so each
+    one runs on a freshly loaded model with an empty cache.
+    """
+    counts = {}
+    if not ollama_unload(model):
+        # The first replay could hit a cached prefix: report no reference at all
+        return {json.dumps(messages): None for messages in message_lists}
+    for messages in message_lists:
+        key = json.dumps(messages)
+        if key in counts:
+            continue
+        try:
+            counts[key] = generate(model, messages, {**options, "num_predict": 1}, keep_alive=0)["prompt_tokens"]
+        except Exception as e:
+            print(f"⚠️ uncached reference failed: {e}")
+            counts[key] = None
+    return counts
+
+def evaluate_model_conversation(model, args):
+    """Chain the instruct suite as chat turns and measure how much of each prompt Ollama re-evaluates.
+
+    'evaluated' is Ollama's prompt_eval_count in the run, which leaves out the
+    prefix reused from the KV cache; 'uncached' is the same count for the same
+    messages replayed on a freshly loaded model. Reuse = 1 - evaluated / uncached.
+    """
+    print(f"\n{'='*40}")
+    print(f"🚀 CONVERSATION BENCHMARK: {model}")
+    print(f"{'='*40}")
+    
+    options = BENCHMARK_CONFIG["options"].copy()
+    options["num_predict"] = MODEL_NUM_PREDICT.get(model, MODEL_NUM_PREDICT["default"])
+    keep_alives = [k.strip() for k in args.keep_alive.split(",")]
+    runs = []
+    
+    for keep_alive in keep_alives:
+        for variant in iter_spans(CONVERSATION_VARIANTS, "variant"):
+            print(f"💬 {variant} (keep_alive={keep_alive})", end=" ", flush=True)
+            history = []
+            rows = []
+            for turn, test in enumerate(iter_spans(INSTRUCT_TEST_SUITE, "test", lambda t: t['name'])):
+                messages = conversation_messages(variant, history, test['prompt'], turn)
+                start = time.perf_counter()
+                try:
+                    reply = generate(model, messages, options, keep_alive=keep_alive)
+                except Exception as e:
+                    print(f"⚠️ ERROR: {e}")
+                    break
+                duration = time.perf_counter() - start
+                if variant == "session":
+                    history += [{"role": "user", "content": test['prompt']},
+                                {"role": "assistant", "content": reply["content"]}]
+                rows.append({
+                    "model": model, "variant": variant, "keep_alive": keep_alive, "turn": turn, "test": test['name'],
+                    "pass": test["validator"](sanitize_output(reply["content"], test.get("sanitize"))),
+                    "latency": duration, "prompt_tokens": reply["prompt_tokens"], "messages": messages,
+                    "prompt_ms": reply["prompt_ms"], "load_ms": reply["load_ms"], "eval_ms": reply["eval_ms"]
+                })
+            print(f"done ({len(rows)} turns)")
+            if rows:
+                runs.append(rows)
+    
+    print(f"📏 Measuring uncached prompt sizes...", end=" ", flush=True)
+    with span("uncached reference", "variant"):
+        uncached = measure_uncached(model, [r["messages"] for rows in runs for r in rows], options)
+    print(f"done ({len(uncached)} prompts)")
+    
+    summaries = []
+    turns = []
+    for rows in runs:
+        for r in rows:
+            r["uncached_tokens"] = uncached[json.dumps(r.pop("messages"))]
+            # No reuse figure when either count is missing rather than guessing one
+            r["reuse"] = 1 - r["prompt_tokens"] / r["uncached_tokens"] \
+                if r["prompt_tokens"] is not None and r["uncached_tokens"] else None
+            if args.verbose:
+                print(f"    {r['variant']} turn {r['turn']:>2}: uncached {r['uncached_tokens']} tok, "
+                      f"evaluated {r['prompt_tokens']} tok, prompt {r['prompt_ms'] or 0:.0f} ms, "
+                      f"load {r['load_ms'] or 0:.0f} ms")
+        measured = [r for r in rows if r["reuse"] is not None]
+        summary = {
+            "model": model, "variant": rows[0]["variant"], "keep_alive": rows[0]["keep_alive"], "turns": len(rows),
+            "pass_rate": sum(r["pass"] for r in rows) / len(rows) * 100,
+            "measured_turns": len(measured),
+            "uncached_tokens": sum(r["uncached_tokens"] for r in measured),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in measured),
+            "prompt_ms": sum(r["prompt_ms"] or 0 for r in rows),
+            "load_ms": sum(r["load_ms"] or 0 for r in rows),
+            "latency": sum(r["latency"] for r in rows)
+        }
+        summary["reuse"] = 1 - summary["prompt_tokens"] / summary["uncached_tokens"] if summary["uncached_tokens"] else None
+        summaries.append(summary)
+        turns.extend(rows)
+        reuse = f"{summary['reuse'] * 100:.0f}% prefix reuse" if summary["reuse"] is not None else "reuse n/a"
+        missing = f" ({len(rows) - len(measured)} turns without token counts)" if len(measured) < len(rows) else ""
+        print(f"   {summary['variant']} (keep_alive={summary['keep_alive']}) → {summary['pass_rate']:.0f}% pass, "
+              f"{reuse}{missing}, prompt eval {summary['prompt_ms'] / 1000:.2f}s")
+    
+    print_conversation_report(summaries)
+    return model, summaries, turns
+
+def print_conversation_report(summaries):
+    print("\n" + "📊 CONVERSATION / KV-CACHE REPORT".center(100))
+    print("-" * 100)
+    print(f"{'Model':<24} | {'Variant':<15} | {'keep_alive':<10} | {'Pass':>5} | {'Uncached':>8} | "
+          f"{'Evaluated':>9} | {'Reuse':>6} | {'Prompt s':>8} | {'Load s':>6}")
+    print("-" * 100)
+    for r in summaries:
+        reuse = f"{r['reuse'] * 100:.1f}%" if r["reuse"] is not None else "n/a"
+        print(f"{r['model'][:24]:<24} | {r['variant']:<15} | {r['keep_alive']:<10} | {r['pass_rate']:>4.0f}% | "
+              f"{r['uncached_tokens']:>8} | {r['prompt_tokens']:>9} | {reuse:>6} | "
+              f"{r['prompt_ms'] / 1000:>8.2f} | {r['load_ms'] / 1000:>6.2f}")
+    print("-" * 100)
+
+# ============ PROMPT-SIZE ABLATION ============
+# Instruct/tool suites rerun with smaller prompts (fewer few-shot pairs, a
+# compact tool list, compressed system prompts) to find the cheapest prompt
+# that keeps a model's pass rate.
+ABLATION_VARIANTS = {"instruct": instruct_variants, "tool": tool_variants}
+ABLATION_EVALUATORS = {"instruct": evaluate_model_instruct, "tool": evaluate_model_tool}
+
+def evaluate_model_ablation(model, args):
+    suites = [s.strip() for s in args.ablation_suites.split(",") if s.strip() in ABLATION_VARIANTS]
+    points = []
+    for suite in suites:
+        for variant in iter_spans(ABLATION_VARIANTS[suite](), "variant", lambda v: f"{suite}:{v['name']}"):
+            _, score, avg_lat, results = ABLATION_EVALUATORS[suite](model, args, variant=variant)
+            points.append({
+                "model": model,
+                "mode": suite,
+                "variant": variant["name"],
+                "prompt_tokens": prompt_size(variant),
+                "score": score,
+                "latency": avg_lat,
+                "tests": len(results)
+            })
+    frontiers = {suite: pareto_frontier([p for p in points if p["mode"] == suite]) for suite in suites}
+    for p in points:
+        p["pareto"] = p in frontiers[p["mode"]]
+    print_ablation_report(model, points, frontiers)
+    return model, points
+
+def print_ablation_report(model, points, frontiers):
+    for suite, frontier in frontiers.items():
+        rows = sorted((p for p in points if p["mode"] == suite), key=lambda p: p["prompt_tokens"])
+        print("\n" + f"📊 PROMPT ABLATION: {model} / {suite}".center(75))
+        print("-" * 75)
+        print(f"{'Variant':<22} | {'Prompt tok':>10} | {'Score':>8} | {'Avg Latency':>11} | {'Pareto':<8}")
+        print("-" * 75)
+        for p in rows:
+            print(f"{p['variant']:<22} | {p['prompt_tokens']:>10} | {p['score']:>7.2f}% | {p['latency']:>10.2f}s | "
+                  f"{'★' if p['pareto'] else ''}")
+        print("-" * 75)
+        print(ascii_plot(rows, frontier))
+        full = next((p for p in rows if p["variant"] == "full"), None)
+        best = smallest_keeping_accuracy(rows)
+        if full and best:
+            print(f"\n✂️  Smallest prompt at top score: {best['variant']} - {best['prompt_tokens']} tokens "
+                  f"({best['prompt_tokens'] / full['prompt_tokens'] * 100:.0f}% of full), "
+                  f"{best['score']:.2f}% @ {best['latency']:.2f}s")
+
+# ============ PARAMETER SWEEP ============
+# num_thread x num_batch x num_ctx x quantization tag over a representative
+# instruct subset; the fastest point that keeps the default options' pass
+# rate becomes the model's recommended options.
+def load_sweep_point(model, options):
+    """Load the model with these options (untimed for the tests); seconds taken, or None if it failed."""
+    start = time.perf_counter()
+    try:
+        generate(model, [{"role": "user", "content": "ping"}], {**options, "num_predict": 1})
+    except Exception as e:
+        print(f"load failed ({e})")
+        return None
+    return time.perf_counter() - start
+
+def run_sweep_point(model, options, tests, budget=None, max_failures=None):
+    """Run the subset once; stops early when over 'max_failures' or already slower than 'budget' seconds.
+
+    A request that errors (Ollama/HTTP) is retried; one that keeps erroring is
+    neither a pass nor a failure, but is counted under 'errors' and left out
+    of the latency.
+    """
+    stats = {"run": 0, "passed": 0, "errors": 0, "latency": 0.0, "tokens": 0, "eval_ms": 0.0, "pruned": None}
+    for test in iter_spans(tests, "test", lambda t: t['name']):
+        is_json_test = "JSON" in test['name'] or "JSON" in test['prompt']
+        for _ in range(1 + SWEEP_RETRIES):
+            start = time.perf_counter()
+            try:
+                reply = generate(model, build_instruct_messages(test['prompt']), options,
+                                 format="json" if is_json_test else None)
+                break
+            except Exception:
+                reply = None
+        if reply is None:
+            stats["errors"] += 1
+            continue
+        content = sanitize_output(reply["content"], test.get("sanitize"))
+        with span("validate", "validate"):
+            is_pass = test["validator"](content)
+        stats["tokens"] += reply["tokens"] or 0
+        stats["eval_ms"] += reply["eval_ms"] or 0
+        stats["latency"] += time.perf_counter() - start
+        stats["run"] += 1
+        stats["passed"] += bool(is_pass)
+        if max_failures is not None and stats["run"] - stats["passed"] > max_failures:
+            stats["pruned"] = "pass rate"
+            break
+        if budget is not None and stats["latency"] > budget and stats["run"] < len(tests):
+            stats["pruned"] = "slower"
+            break
+    return stats
+
+def measure_sweep_point(point, model, options, tests, budget=None, max_failures=None):
+    print(f"   {point['model']:<32} {describe(point):<40}", end=" ", flush=True)
+    load_s = load_sweep_point(point["model"], options)
+    if load_s is None:
+        point.update({"pruned": "load failed", "pass_rate": None, "latency": None})
+        return point
+    host = host_mark()
+    stats = run_sweep_point(point["model"], options, tests, budget, max_failures)
+    if not stats["run"]:
+        stats["pruned"] = "errors"
+    point.update({
+        "load_s": round(load_s, 3),
+        "tests_run": stats["run"],
+        "errors": stats["errors"],
+        "pass_rate": stats["passed"] / stats["run"] * 100 if stats["run"] else None,
+        "latency": stats["latency"],
+        "latencies": [] if stats["errors"] else [stats["latency"]],  # complete runs only
+        "eval_tps": stats["tokens"] / (stats["eval_ms"] / 1000) if stats["eval_ms"] else None,
+        "pruned": stats["pruned"],
+        "host": host_window(host)
+    })
+    note = (f", {stats['errors']} errors" if stats["errors"] else "") + \
+        (f", pruned: {stats['pruned']}" if stats["pruned"] else "")
+    print(f"{stats['passed']}/{stats['run']} ({point['latency']:.2f}s, load {load_s:.2f}s{note})")
+    return point
+
+def retime_sweep_point(point, options, tests, repeats=SWEEP_REPEATS):
+    """Run a finalist 'repeats' more times; its latency becomes the median of the error-free runs."""
+    print(f"   {point['model']:<32} {describe(point):<40}", end=" ", flush=True)
+    runs = point["latencies"]
+    for _ in range(repeats):
+        if load_sweep_point(point["model"], options) is None:
+            continue
+        stats = run_sweep_point(point["model"], options, tests)
+        point["errors"] += stats["errors"]
+        if stats["errors"]:
+            continue
+        point["pass_rate"] = min(point["pass_rate"], stats["passed"] / stats["run"] * 100)
+        runs.append(stats["latency"])
+    if not runs:
+        print(f"no complete run ({point['errors']} errors)")
+        return point
+    point["latency"] = statistics.median(runs)
+    print(f"{point['pass_rate']:.0f}% @ median {point['latency']:.2f}s of {len(runs)} complete runs")
+    return point
+
+def evaluate_model_sweep(model, args):
+    print(f"\n{'='*40}")
+    print(f"🎛️  SWEEPING: {model}")
+    print(f"{'='*40}")
+
+    tests = representative_tests(INSTRUCT_TEST_SUITE, args.sweep_per_category)
+    base = BENCHMARK_CONFIG["options"].copy()
+    base["num_predict"] = MODEL_NUM_PREDICT.get(model, MODEL_NUM_PREDICT["default"])
+    print(f"   Subset: {', '.join(t['name'].split(':')[0] for t in tests)}")
+
+    quants = [None]
+    for quant in parse_grid(args.sweep_quants, str):
+        if not quant:
+            continue
+        tag = quant_tag(model, quant)
+        try:
+            if not args.no_pull:
+                pull_if_missing(tag)
+            if tag in ollama_list():
+                quants.append(quant)
+                continue
+        except Exception:
+            pass
+        print(f"   ⚠️  {tag} is not available; skipping it")
+
+    baseline = measure_sweep_point({"model": model, "quant": None, "num_thread": base.get("num_thread"),
+                                    "num_batch": base.get("num_batch"), "num_ctx": base.get("num_ctx"),
+                                    "baseline": True}, model, base, tests)
+    if baseline["pruned"]:
+        print(f"   ❌ {model} could not be measured with the default options ({baseline['pruned']}); "
+              f"nothing to compare against")
+        return model, [baseline], None
+    target = baseline["pass_rate"] - args.sweep_tolerance
+    max_failures = allowed_failures(tests, target)
+    points = [baseline]
+    best = baseline
+    failed_ctx = {}
+
+    grid = sweep_grid(quants, parse_grid(args.sweep_threads), parse_grid(args.sweep_batch), parse_grid(args.sweep_ctx))
+    for point in iter_spans(grid, "sweep", describe):
+        point["model"] = quant_tag(model, point["quant"])
+        points.append(point)
+        if ctx_ruled_out(point, failed_ctx):
+            point.update({"pruned": "smaller ctx", "pass_rate": None, "latency": None})
+            continue
+        budget = best["latency"] * (1 + SWEEP_SLACK)
+        measure_sweep_point(point, model, sweep_options(base, point), tests, budget, max_failures)
+        if point["errors"]:
+            continue  # incomplete: neither a pass-rate loss nor a timing to compare
+        if point["pruned"] == "pass rate" or (not point["pruned"] and point["pass_rate"] < target):
+            failed_ctx.setdefault((point["quant"], point["num_thread"], point["num_batch"]), point["num_ctx"])
+        elif not point["pruned"] and point["latency"] < best["latency"]:
+            best = point
+
+    # One timed run is noisy: re-run the fastest candidates and the defaults before recommending one
+    finalists = sweep_finalists(points, target)
+    if len(finalists) > 1:
+        print(f"   Re-timing {len(finalists)} configurations ({SWEEP_REPEATS} more runs each)")
+        for point in finalists:
+            retime_sweep_point(point, base if point.get("baseline") else sweep_options(base, point), tests)
+        best = min((p for p in finalists if p is baseline or (p["latencies"] and p["pass_rate"] >= target)),
+                   key=lambda p: p["latency"])
+
+    print_sweep_report(model, points, best, baseline)
+    recommendation = {"model": best["model"], "options": sweep_options(base, best),
+                      "pass_rate": best["pass_rate"], "latency": round(best["latency"], 3),
+                      "baseline_latency": round(baseline["latency"], 3),
+                      "updated": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    return model, points, recommendation
+
 def run_benchmark(args):
     instruct_results = []
     tool_results = []
@@ -732,7 +1431,7 @@ def run_benchmark(args):
         print("\n📚 INSTRUCT BENCHMARK MODE")
         print("=" * 55)
         
-        for model in models:
+        for model in iter_spans(models, "model"):
             result = evaluate_model_instruct(model, args)
             instruct_results.append(result)
             
@@ -744,7 +1443,7 @@ def run_benchmark(args):
         print("\n🛠️  TOOL BENCHMARK MODE")
         print("=" * 55)
         
-        for model in models:
+        for model in iter_spans(models, "model"):
             result = evaluate_model_tool(model, args)
             tool_results.append(result)
             
@@ -755,17 +1454,86 @@ def run_benchmark(args):
     if args.mode in ["all", "agent"]:
         print("\n🛠️  AGENT BENCHMARK MODE")
         print("=======================================================")
-        agent_results = []
-        result = evaluate_model_agent(EXEC_MODEL, PLANNER_MODEL, args)
-        agent_results.append(result)
-        print_agent_report(agent_results)
+        planners, executors = agent_models(args)
+        # Each planner runs once per task; every executor reuses those plans.
+        # Grouping by model keeps Ollama swaps at len(planners) + len(executors).
+        plan_cache = {}
+        for planner in iter_spans(planners, "model"):
+            print(f"🧭 Planning with {planner}...", end=" ", flush=True)
+            plan_cache[planner] = make_plans(planner, args)
+            print(f"done ({sum(p.get('latency', 0) for p in plan_cache[planner].values()):.2f}s)")
+            if args.tool_top_k:
+                print_retrieval_summary(list(plan_cache[planner].values()), args.tool_top_k)
+        agent_matrix = {}
+        for executor in iter_spans(executors, "model"):
+            for planner in planners:
+                result = evaluate_model_agent(executor, planner, args, plans=plan_cache[planner])
+                agent_results.append(result)
+                agent_matrix[(planner, executor)] = result
+        
+        if args.json_output:
+            with open(f"{args.json_output}_agent.json", 'w') as f:
+                json.dump([r[3] for r in agent_results], f, indent=2)
+        if len(agent_matrix) > 1:
+            print_agent_matrix(agent_matrix, planners, executors)
+        else:
+            print_agent_report(agent_results)
                         
+    if args.mode == "conversation":
+        print("\n💬 CONVERSATION BENCHMARK MODE")
+        print("=" * 55)
+        conversation_results = []
+        for model in iter_spans(models, "model"):
+            conversation_results.append(evaluate_model_conversation(model, args))
+            if args.json_output:
+                with open(f"{args.json_output}_conversation.json", 'w') as f:
+                    json.dump([{"summary": r[1], "turns": r[2]} for r in conversation_results], f, indent=2)
+                        
+    if args.mode == "ablation":
+        print("\n✂️  PROMPT ABLATION MODE")
+        print("=" * 55)
+        ablation_results = []
+        for model in iter_spans(models, "model"):
+            ablation_results.append(evaluate_model_ablation(model, args))
+            if args.json_output:
+                with open(f"{args.json_output}_ablation.json", 'w') as f:
+                    json.dump([p for r in ablation_results for p in r[1]], f, indent=2)
+
+    if args.mode == "sweep":
+        print("\n🎛️  PARAMETER SWEEP MODE")
+        print("=" * 55)
+        sweep_points = []
+        recommendations = {}
+        for model in iter_spans(models, "model"):
+            _, points, recommendation = evaluate_model_sweep(model, args)
+            sweep_points.extend(points)
+            if recommendation:
+                recommendations[model] = recommendation
+            if args.json_output:
+                with open(f"{args.json_output}_sweep.json", 'w') as f:
+                    json.dump({"points": sweep_points, "recommended": recommendations}, f, indent=2)
+        if recommendations:
+            print_recommendations(recommendations)
+            save_recommendations(recommendations)
+            print(f"💾 Recommended options saved to {RECOMMENDATIONS_FILE}")
+
     if args.mode in ["instruct", "all"]:
         print_instruct_report(instruct_results)
     
     if args.mode in ["tool", "all"]:
         print_tool_report(tool_results)
 
+def agent_models(args):
+    """Planner and executor lists for agent mode; --models doubles as the executor list."""
+    planners = [m.strip() for m in args.planners.split(",")] if args.planners else [PLANNER_MODEL]
+    if args.executors:
+        executors = [m.strip() for m in args.executors.split(",")]
+    elif args.models:
+        executors = [m.strip() for m in args.models.split(",")]
+    else:
+        executors = [EXEC_MODEL]
+    return planners, executors
+
 def print_instruct_report(results):
     print("\n\n" + "📊 INSTRUCT BENCHMARK REPORT".center(65))
     print("-" * 65)
@@ -804,10 +1572,42 @@ def print_agent_report(results):
     for model, score, lat, res in sorted(results, key=lambda x: x[1], reverse=True):
         print(f"{model:<30} | {score:>10.2f}% | {lat:>11.2f}s | {len(res):>6}")
     print("-" * 65)
+
+def print_agent_matrix(matrix, planners, executors):
+    """Pass rate / average latency for every planner (rows) x executor (columns) pairing."""
+    width = 22
+    line = 28 + (width + 3) * len(executors)
+    print("\n\n" + "📊 AGENT PLANNER x EXECUTOR MATRIX".center(line))
+    print("-" * line)
+    print(f"{'Planner / Executor':<28}" + "".join(f" | {e[:width]:<{width}}" for e in executors))
+    print("-" * line)
+    for planner in planners:
+        cells = []
+        for executor in executors:
+            _, score, lat, _ = matrix[(planner, executor)]
+            cell = f"{score:.0f}% / {lat:.2f}s"
+            cells.append(f" | {cell:<{width}}")
+        print(f"{planner[:28]:<28}" + "".join(cells))
+    print("-" * line)
+    best = max(matrix.items(), key=lambda kv: (kv[1][1], -kv[1][2]))
+    print(f"\n🏆 Best Pairing: {best[0][0]} → {best[0][1]} - {best[1][1]:.2f}% @ {best[1][2]:.2f}s")
         	
 if __name__ == "__main__":
     banner()
     args = parse_arguments()
+    try:
+        configure_network(args.network, args.network_fixture, seed=BENCHMARK_CONFIG["options"].get("seed"))
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    # Tool microbenchmarks exercise only the tool layer; no Ollama server needed
+    if args.mode == "run-tools":
+        run_tool_benchmark(
+            iterations=args.iterations,
+            json_path=f"{args.json_output}_toolbench.json" if args.json_output else None
+        )
+        sys.exit(0)
     
     if not check_server():
         print("❌ Ollama server not running at http://127.0.0.1:11434")
@@ -815,11 +1615,28 @@ if __name__ == "__main__":
     
     if not args.no_pull:
         models = args.models.split(",") if args.models else BENCHMARK_CONFIG["models"]
+        if args.mode in ["agent", "all"]:
+            models = list(dict.fromkeys(models + [m for group in agent_models(args) for m in group]))
         for m in models:
             pull_if_missing(m.strip())
-            
-    if args.mode == "run-tools":
-        run_all_tools_logic()
-        sys.exit(0)
     
-    run_benchmark(args)
\ No newline at end of file
+    if args.trace or args.trace_otlp:
+        TRACER.start()
+    if args.monitor:
+        start_monitor(args.monitor_interval)
+    try:
+        with span("run", "run", mode=args.mode):
+            if args.profile:
+                # One profile per mode, so 'all' yields separate instruct/tool/agent outputs
+                prefix = args.json_output or "gptbench_profile"
+                for mode in (["instruct", "tool", "agent"] if args.mode == "all" else [args.mode]):
+                    with profile_run(args.profile, f"{prefix}_{mode}", label=mode):
+                        run_benchmark(argparse.Namespace(**{**vars(args), "mode": mode}))
+            else:
+                run_benchmark(args)
+    finally:
+        # An interrupted or failed run is what a trace is most needed for
+        stop_monitor()
+        if TRACER.enabled:
+            export_trace(args.trace, args.trace_otlp)
+            print_trace_summary(args.trace, args.trace_otlp)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# ablation.py - Prompt-size ablation: smaller prompt variants and their Pareto frontier
+#
+# Each variant replaces the system prompt and/or few-shot pairs of instruct
+# or tool mode; tool variants may also list fewer tools (a fixed subset, or
+# the top-k retrieved for each test via 'tool_top_k'). Prompt size is the static estimate of system + few-shot text
+# (prompt_eval_count would mostly measure KV-cache hits, not prompt size).
+
+import re
+
+from prompts import INSTRUCT_SYSTEM_PROMPT, INSTRUCT_FEW_SHOT, TOOL_SYSTEM_PROMPT, TOOL_FEW_SHOT
+from agentcontext import estimate_tokens
+from toolretrieval import select_tools, restrict_tool_list
+from tests import TOOL_TEST_SUITE
+
+COMPACT_INSTRUCT_SYSTEM_PROMPT = """Output ONLY the requested data: a shell command, raw JSON (no fences) or a number.
+No explanations."""
+
+COMPACT_TOOL_SYSTEM_PROMPT = """If a tool is needed, output ONLY {{"name": "<tool>", "arguments": {{...}}}} using these tools:
+{tools}
+Otherwise answer directly. After a tool result, answer in plain English using its values."""
+
+RE_SIGNATURE = re.compile(r'^- (\w+)\((.*)\)$', re.M)
+RETRIEVAL_K = (3, 5)       # per-test tool lists of the top-k retrieved signatures
+
+# ============ VARIANTS ============
+def few_shot_pairs(messages, pairs):
+    """First 'pairs' user/assistant exchanges of a few-shot list."""
+    return messages[:2 * pairs]
+
+def tool_signatures(system_prompt=TOOL_SYSTEM_PROMPT):
+    """[(name, 'arg, arg')] from the '- tool(arg: type)' lines of the tool system prompt."""
+    return [(name, ", ".join(a.split(":")[0].strip() for a in args.split(",") if a.strip()))
+            for name, args in RE_SIGNATURE.findall(system_prompt)]
+
+def compact_tool_list(system_prompt=TOOL_SYSTEM_PROMPT, names=None):
+    return ", ".join(f"{name}({args})" for name, args in tool_signatures(system_prompt)
+                     if names is None or name in names)
+
+def suite_tools(suite=TOOL_TEST_SUITE):
+    """Tools some test of the suite expects, in first-use order."""
+    return list(dict.fromkeys(name for test in suite for name in test.get("tools", [])))
+
+def without_section(text, start_marker, end_marker=None):
+    """Drop text from start_marker up to (not including) end_marker, or to the end."""
+    start = text.find(start_marker)
+    if start == -1:
+        return text
+    end = text.find(end_marker, start) if end_marker else -1
+    return text[:start].rstrip() + ("\n\n" + text[end:] if end != -1 else "\n")
+
+def instruct_variants():
+    pairs = len(INSTRUCT_FEW_SHOT) // 2
+    variants = [{"name": "full", "system": INSTRUCT_SYSTEM_PROMPT, "few_shot": INSTRUCT_FEW_SHOT}]
+    for keep in sorted({pairs // 2, 2, 0}, reverse=True):
+        variants.append({"name": f"{keep}-shot", "system": INSTRUCT_SYSTEM_PROMPT,
+                         "few_shot": few_shot_pairs(INSTRUCT_FEW_SHOT, keep)})
+    variants.append({"name": "compact", "system": COMPACT_INSTRUCT_SYSTEM_PROMPT, "few_shot": INSTRUCT_FEW_SHOT})
+    variants.append({"name": "compact 2-shot", "system": COMPACT_INSTRUCT_SYSTEM_PROMPT,
+                     "few_shot": few_shot_pairs(INSTRUCT_FEW_SHOT, 2)})
+    variants.append({"name": "compact 0-shot", "system": COMPACT_INSTRUCT_SYSTEM_PROMPT, "few_shot": []})
+    return variants
+
+def tool_variants():
+    pairs = len(TOOL_FEW_SHOT) // 2
+    no_examples = without_section(TOOL_SYSTEM_PROMPT, "EXAMPLES:")
+    compact_tools = without_section(no_examples, "[AVAILABLE TOOLS & SIGNATURES]", "[STEP 2") \
+        .replace("Use the EXACT argument names listed below.",
+                 f"Use the EXACT argument names: {compact_tool_list()}.")
+    compact = COMPACT_TOOL_SYSTEM_PROMPT.format(tools=compact_tool_list())
+    used = suite_tools()
+    variants = [{"name": "full", "system": TOOL_SYSTEM_PROMPT, "few_shot": TOOL_FEW_SHOT}]
+    for keep in sorted({pairs // 2, 2, 0}, reverse=True):
+        variants.append({"name": f"{keep}-shot", "system": TOOL_SYSTEM_PROMPT,
+                         "few_shot": few_shot_pairs(TOOL_FEW_SHOT, keep)})
+    variants.append({"name": "no examples", "system": no_examples, "few_shot": TOOL_FEW_SHOT})
+    variants.append({"name": "compact tool list", "system": compact_tools, "few_shot": TOOL_FEW_SHOT})
+    variants.append({"name": "compact", "system": compact, "few_shot": few_shot_pairs(TOOL_FEW_SHOT, 2)})
+    variants.append({"name": "compact 0-shot", "system": compact, "few_shot": []})
+    # Fewer tools listed: only those the suite calls, or the top-k retrieved for each test
+    variants.append({"name": "suite tools", "system": restrict_tool_list(TOOL_SYSTEM_PROMPT, used),
+                     "few_shot": TOOL_FEW_SHOT})
+    for k in RETRIEVAL_K:
+        variants.append({"name": f"top-{k} tools", "system": TOOL_SYSTEM_PROMPT, "few_shot": TOOL_FEW_SHOT,
+                         "tool_top_k": k})
+    variants.append({"name": "compact suite tools", "few_shot": [],
+                     "system": COMPACT_TOOL_SYSTEM_PROMPT.format(tools=compact_tool_list(names=used))})
+    return variants
+
+def prompt_size(variant):
+    """Estimated tokens of the fixed part of the prompt (system + few-shot).
+
+    Variants with a per-test tool list ('tool_top_k') are averaged over the suite.
+    """
+    shots = "".join(m["content"] for m in variant["few_shot"])
+    k = variant.get("tool_top_k")
+    systems = [restrict_tool_list(variant["system"], select_tools(t["prompt"], k)[0]) for t in TOOL_TEST_SUITE] \
+        if k else [variant["system"]]
+    return round(sum(estimate_tokens(s + shots) for s in systems) / len(systems)) + 4 * (1 + len(variant["few_shot"]))
+
+# ============ ANALYSIS ============
+def pareto_frontier(points):
+    """Points not dominated on (fewer prompt tokens, higher pass rate, lower latency)."""
+    def dominates(a, b):
+        no_worse = a["prompt_tokens"] <= b["prompt_tokens"] and a["score"] >= b["score"] and a["latency"] <= b["latency"]
+        better = a["prompt_tokens"] < b["prompt_tokens"] or a["score"] > b["score"] or a["latency"] < b["latency"]
+        return no_worse and better
+    return [p for p in points if not any(dominates(q, p) for q in points if q is not p)]
+
+def smallest_keeping_accuracy(points, tolerance=0.0):
+    """Smallest prompt whose pass rate is within 'tolerance' points of the best."""
+    if not points:
+        return None
+    best = max(p["score"] for p in points)
+    return min((p for p in points if p["score"] >= best - tolerance), key=lambda p: (p["prompt_tokens"], p["latency"]))
+
+def ascii_plot(points, frontier, width=60, height=12):
+    """Pass rate (y) against prompt tokens (x); frontier points are '#', others '.'."""
+    if not points:
+        return ""
+    max_x = max(p["prompt_tokens"] for p in points) or 1
+    grid = [[" "] * (width + 1) for _ in range(height + 1)]
+    for p in points:
+        x = round(p["prompt_tokens"] / max_x * width)
+        y = height - round(p["score"] / 100 * height)
+        grid[y][x] = "#" if p in frontier else ("." if grid[y][x] == " " else grid[y][x])
+    lines = [f"{100 - i * 100 / height:>5.0f}% |" + "".join(row) for i, row in enumerate(grid)]
+    lines.append(" " * 7 + "+" + "-" * (width + 1))
+    lines.append(" " * 8 + f"0{'prompt tokens':^{width - 8}}{max_x:>6}")
+    return "\n".join(lines)
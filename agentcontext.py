@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# agentcontext.py - Token-bounded "PREVIOUS RESULTS" for agent step and synthesis prompts
+#
+# Tool results are flattened to leaf fields. Fields the next tool is likely to
+# need are rendered first, the rest only while the token budget lasts, and
+# long values are cut to a preview plus a handle (@ctx<step>.<path>) that
+# resolve() turns back into the full value if the model passes it on. The
+# budget is a hard limit: only the bare list of steps may exceed it.
+
+import json
+import threading
+
+from tools import ToolRegistry, tool_parameters_schema
+
+CHARS_PER_TOKEN = 4      # rough estimate for English/JSON with small-model tokenizers
+MAX_VALUE_CHARS = 160
+ALWAYS_KEEP = ("tool", "status", "error", "response")
+
+# Result fields that usually feed a given parameter of the next tool
+FIELD_SOURCES = {
+    "to": ("email",),
+    "value": ("temperature", "value", "result"),
+    "expression": ("result", "value", "temperature"),
+    "user_id": ("user_id", "id"),
+    "body": ("password", "code", "result", "name"),
+    "message": ("password", "code", "result"),
+    "text": ("password", "content", "content_preview", "result"),
+    "location": ("location", "city"),
+    "city": ("city", "location"),
+    "host": ("host", "url"),
+}
+
+PREVIEW_MARK = "… ("     # start of the '(<size>, full: <handle>)' tail of a preview
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def relevant_fields(next_tool):
+    """Field names worth keeping for 'next_tool' (its parameters plus their usual sources)."""
+    if not isinstance(next_tool, str) or not callable(getattr(ToolRegistry, next_tool, None)) \
+            or next_tool.startswith("_"):
+        return set()
+    params = tool_parameters_schema(next_tool)["properties"]
+    fields = set(params)
+    for param in params:
+        fields.update(FIELD_SOURCES.get(param, ()))
+    return fields
+
+class AgentContext:
+    """Step results for an agent task, rendered under a token budget (0 = unbounded, legacy JSON)."""
+
+    def __init__(self, budget=0, max_value_chars=MAX_VALUE_CHARS):
+        self.budget = budget
+        self.max_value_chars = max_value_chars
+        self._entries = {}
+        self._full = {}          # handle -> full value
+        self._tails = {}         # preview tail '… (<size>, full: <handle>)' -> handle
+        self._lock = threading.Lock()
+
+    def add(self, index, entry):
+        with self._lock:
+            self._entries[index] = entry
+
+    def entries(self, indices=None):
+        with self._lock:
+            keys = sorted(self._entries if indices is None else indices)
+            return [(i, self._entries[i]) for i in keys if i in self._entries]
+
+    def render(self, indices=None, next_tool=None, ensure_ascii=False):
+        """JSON list of the given steps' results (all steps by default), fitted to the budget."""
+        entries = self.entries(indices)
+        if not self.budget:
+            return json.dumps([e for _, e in entries], ensure_ascii=ensure_ascii)
+
+        wanted = relevant_fields(next_tool)
+        leaves = []
+        for i, entry in entries:
+            for position, (path, value) in enumerate(self._flatten(entry, ())):
+                key = path[-1] if path else ""
+                value, cut = self._shorten(i, path, value)
+                rank = 0 if key in ALWAYS_KEEP or key in wanted else (2 if cut else 1)
+                leaves.append((rank, position, i, path, value))
+
+        rendered = {i: {} for i, _ in entries}
+        omitted = {i: 0 for i, _ in entries}
+        # Room for every step's omitted_fields count is reserved up front
+        counts = {i: sum(1 for leaf in leaves if leaf[2] == i) for i, _ in entries}
+        used = estimate_tokens(json.dumps([{"omitted_fields": counts[i]} for i, _ in entries]))
+        # Within a rank, every step gets its first field before any step gets a second
+        for rank, _, i, path, value in sorted(leaves, key=lambda leaf: leaf[:2]):
+            # The full path is charged, so shared parent keys are counted more than once, never less
+            cost = estimate_tokens(json.dumps(self._nest(path, value), ensure_ascii=ensure_ascii))
+            if used + cost > self.budget:
+                omitted[i] += 1
+                continue
+            used += cost
+            self._insert(rendered[i], path, value)
+        for i, count in omitted.items():
+            if count:
+                rendered[i]["omitted_fields"] = count
+        return json.dumps([rendered[i] for i, _ in entries], ensure_ascii=ensure_ascii)
+
+    def resolve(self, args):
+        """Swap handles (or copied previews) in tool arguments for the full values they stand for."""
+        if isinstance(args, dict):
+            return {k: self.resolve(v) for k, v in args.items()}
+        if isinstance(args, list):
+            return [self.resolve(v) for v in args]
+        if isinstance(args, str):
+            handle = self._handle_for(args.strip())
+            if handle:
+                with self._lock:
+                    return self._full[handle]
+        return args
+
+    def _handle_for(self, text):
+        """The handle 'text' stands for: the handle itself or a copied preview, nothing else.
+
+        Text that merely mentions a handle ('see @ctx0.body (attached)') is left alone.
+        """
+        with self._lock:
+            if text in self._full:
+                return text
+            pos = text.find(PREVIEW_MARK)
+            while pos != -1:
+                if text[pos:] in self._tails:
+                    return self._tails[text[pos:]]
+                pos = text.find(PREVIEW_MARK, pos + 1)
+        return None
+
+    def _flatten(self, value, path):
+        if isinstance(value, dict) and value:
+            for k, v in value.items():
+                yield from self._flatten(v, path + (str(k),))
+        else:
+            yield path, value
+
+    def _shorten(self, index, path, value):
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        if len(text) <= self.max_value_chars:
+            return value, False
+        handle = ".".join((f"@ctx{index}",) + path)
+        size = f"{len(value)} items" if isinstance(value, list) else f"{len(text)} chars"
+        tail = f"{PREVIEW_MARK}{size}, full: {handle})"
+        # render() runs on the agent's worker threads while others resolve()
+        with self._lock:
+            self._full[handle] = value
+            self._tails[tail] = handle
+        return text[:self.max_value_chars] + tail, True
+
+    @staticmethod
+    def _nest(path, value):
+        nested = {path[-1] if path else "value": value}
+        for key in reversed(path[:-1]):
+            nested = {key: nested}
+        return nested
+
+    @staticmethod
+    def _insert(target, path, value):
+        if not path:
+            target["value"] = value
+            return
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
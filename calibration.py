@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# calibration.py - Learn per-model generation limits from recorded eval_count history
+#
+# Every calibrated run appends one line per chat turn to HISTORY_FILE. Before
+# a model is benchmarked its history (matched by model digest, so a re-pulled
+# tag starts over) is reduced to a num_predict and stop list per test
+# category, just above what the model has actually needed. Only the most
+# recent HISTORY_WINDOW turns of a category count, so limits can come back
+# down; once the window holds too few turns generated without the blank-line
+# stop, the category runs uncalibrated once and is measured afresh.
+
+import os
+import re
+import json
+import math
+import collections
+from datetime import datetime
+
+HISTORY_FILE = "generation_history.jsonl"
+CALIBRATION_FILE = "generation_calibration.json"
+MIN_SAMPLES = 3          # fewer observations than this: keep the static limit
+HISTORY_WINDOW = 40      # most recent turns per category that calibration looks at
+HEADROOM = 1.25          # num_predict = longest observed need * HEADROOM, rounded up
+ROUND_TO = 16
+BLANK_LINE_STOP = "\n\n"
+
+RE_CATEGORY = re.compile(r'^([A-Za-z]+)\d*:')
+
+# ============ HISTORY ============
+def test_category(test_name, turn=None):
+    """'S1: List Hidden' -> 'S'; tool-mode turns get their own bucket ('TC/call', 'TC/answer')."""
+    m = RE_CATEGORY.match(test_name)
+    category = m.group(1) if m else test_name
+    return f"{category}/{turn}" if turn else category
+
+def record_generation(path, model, digest, category, num_predict, reply, stop=None):
+    """Append one chat turn to the history file.
+
+    'outcome' is 'stop' (model finished), 'decided' (cut by --stream once the
+    verdict was settled) or 'length' (hit num_predict, so the real need is unknown).
+    'stop_applied' marks turns run with the blank-line stop: Ollama strips the
+    stop string, so their 'stop' may be a cut and 'blank_line' is always false.
+    """
+    if reply.get("tokens") is None:
+        return
+    outcome = "decided" if reply.get("aborted") else reply.get("done_reason") or "stop"
+    row = {
+        "timestamp": datetime.now().isoformat(),
+        "model": model,
+        "digest": digest,
+        "category": category,
+        "tokens": reply["tokens"],
+        "num_predict": num_predict,
+        "outcome": outcome,
+        "stop_applied": BLANK_LINE_STOP in (stop or []),
+        "blank_line": BLANK_LINE_STOP in reply.get("content", "")
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(row) + "\n")
+
+def load_history(path, digest, window=HISTORY_WINDOW):
+    """This digest's turns, keeping the last 'window' of each category."""
+    if not os.path.isfile(path):
+        return []
+    by_category = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if row.get("digest") == digest:
+                by_category.setdefault(row.get("category"), collections.deque(maxlen=window)).append(row)
+    return [row for rows in by_category.values() for row in rows]
+
+# ============ CALIBRATION ============
+def calibrate(samples, static_limit):
+    """Per-category {num_predict, stop} from history; categories without enough data are left out."""
+    by_category = {}
+    for row in samples:
+        by_category.setdefault(row["category"], []).append(row)
+
+    table = {}
+    for category, rows in by_category.items():
+        # Only turns the model finished on its own show what it needs. Turns cut
+        # by --stream ('decided') or possibly by the blank-line stop only bound
+        # the need from below (rows from before 'stop_applied' count as cut)
+        unstopped = [r for r in rows if r.get("stop_applied") is False]
+        complete = [r["tokens"] for r in unstopped if r["outcome"] == "stop"]
+        if len(complete) < MIN_SAMPLES:
+            continue
+        lower = [r["tokens"] for r in rows if r["outcome"] == "decided"
+                 or (r["outcome"] == "stop" and r.get("stop_applied") is not False)]
+        need = max(complete + lower)
+        limit = int(math.ceil(need * HEADROOM / ROUND_TO) * ROUND_TO)
+        # Truncated by an earlier calibration: that guess was too low, back off
+        cut_short = [r["num_predict"] for r in rows if r["outcome"] == "length" and r["num_predict"] < static_limit]
+        if cut_short:
+            limit = max(limit, 2 * max(cut_short))
+        limit = min(limit, static_limit)
+        table[category] = {
+            "num_predict": limit,
+            # Judged on turns run without the stop: complete turns without a blank
+            # line justify it; a truncated turn can only count against it
+            "stop": [] if any(r.get("blank_line") for r in unstopped) else [BLANK_LINE_STOP],
+            "samples": len(rows),
+            "max_need": need
+        }
+    return table
+
+def load_calibration(path=CALIBRATION_FILE):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_calibration(table, path=CALIBRATION_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(table, f, indent=2)
+
+def calibrated_options(options, categories, category):
+    """Copy of options with the category's learned num_predict/stop applied (if any)."""
+    entry = categories.get(category)
+    if not entry:
+        return options
+    options = dict(options)
+    options["num_predict"] = entry["num_predict"]
+    if entry["stop"]:
+        options["stop"] = list(options.get("stop", [])) + entry["stop"]
+    return options
+
+def calibration_report(samples, categories, static_limit, test_categories):
+    """Tokens saved against the static table: per-test budget and on the recorded runs."""
+    limit = lambda c: categories.get(c, {}).get("num_predict", static_limit)
+    budget_static = static_limit * len(test_categories)
+    budget_calibrated = sum(limit(c) for c in test_categories)
+    replayed_saving = sum(max(0, r["tokens"] - limit(r["category"])) for r in samples)
+    return {
+        "categories": len(categories),
+        "budget_static": budget_static,
+        "budget_calibrated": budget_calibrated,
+        "recorded_tokens": sum(r["tokens"] for r in samples),
+        "recorded_saving": replayed_saving,
+        "hit_static_limit": sum(1 for r in samples if r["outcome"] == "length" and r["num_predict"] >= static_limit)
+    }
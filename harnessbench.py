@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# harnessbench.py - Offline microbenchmarks for the harness hot path
+#
+# Times output parsing, sanitizing, tool-call validation, argument mapping,
+# message construction and every test validator over a corpus of model
+# outputs. No Ollama server is needed.
+#
+#   python harnessbench.py                          # built-in corpus
+#   python harnessbench.py --corpus run_tool.json   # + outputs from a --json-output run
+#   python harnessbench.py --save-baseline          # store medians for later comparison
+
+import os
+import sys
+import json
+import copy
+import time
+import argparse
+import statistics
+import importlib.util
+
+from tests import INSTRUCT_TEST_SUITE, TOOL_TEST_SUITE, AGENT_TEST_SUITE
+from tools import validate_tool_call, is_tool_call, tool_context
+from sanitizer import StreamSanitizer
+
+BASELINE_FILE = "harness_baseline.json"
+REGRESSION_RATIO = 1.25
+
+# ============ CORPUS ============
+# Typical outputs recorded from tiny models (see README sample runs)
+RECORDED_OUTPUTS = [
+    "ls -a", "df -h", 'grep -r "error" app.log', "chown www-data:www-data web", "netstat -tuln",
+    "kill 1234", "mkdir -p a/b/c", '{"list": ["A", "B", "C"]}', '{"status": "OK"}', '["VTSTech", "101"]',
+    "hello", '{"user": {"id": 1}}', "VTST", "FFFFFF", "ANIBED", "[10]", "No", "4", "2", "false", "5",
+    "Red", "Berlin", "Five", "OFF", "find . -name 'error'", "lso/tcp", "AN-ID", "50 / 2 = 25", "26",
+    '{"name": "get_weather", "arguments": {"location": "London"}}',
+    '```json\n{"name": "calculator", "arguments": {"expression": "15 * 7"}}\n```',
+    '{"tool_calls": [{"type": "function", "function": {"name": "get_weather", "arguments": "{\\"location\\": \\"London\\"}"}}]}',
+    '{"function": "find_user", "params": {"email": "john@example.com"}}',
+    "The weather in London is +3°C overcast with a wind speed of 4 km/h and a humidity of 70%.",
+    "Assistant: The weather in London is 15°C and cloudy.",
+    "The SHA256 hash of the password 'password123' is "
+    "'ef92b778bafe771e89245b89ecbc08a44a4e166c06659911881f383d4473e94f'.",
+    "The date 30 days from 2026-02-13 is March 15, 2026.",
+    "<|assistant|>Paris</s>",
+    "\x1b[1mParis\x1b[0m is the capital of France.",
+]
+
+def pathological_outputs():
+    """Inputs that stress the harness: huge text, deep JSON, long think blocks, many fences."""
+    return [
+        "The answer is 42. " * 60000,                                       # ~1 MB of prose
+        '{"a": ' * 900 + "1" + "}" * 900,                                   # nested just under recursion limits
+        '[' * 5000 + ']' * 5000,                                            # nested past them
+        "<think>" + "Let me reason about this step by step. " * 20000 + "</think>Paris",
+        "<think>unterminated " * 5000,
+        "```json\n" + json.dumps({"name": "list_files", "arguments": {"path": "."},
+                                  "padding": ["x" * 100] * 5000}) + "\n```",
+        "```bash\nls -a\n```\n" * 5000,
+        "\x1b[31m" * 20000 + "ERROR",
+        "ls -a" + "\n" * 100000,
+    ]
+
+def load_corpus(paths=()):
+    """Built-in corpus plus raw/final outputs from --json-output result files."""
+    corpus = {"recorded": list(RECORDED_OUTPUTS), "pathological": pathological_outputs()}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        rows = [r for group in data for r in (group if isinstance(group, list) else [group])]
+        for row in rows:
+            for key in ("raw", "tool_call", "final_response"):
+                if isinstance(row.get(key), str):
+                    corpus["recorded"].append(row[key])
+    return corpus
+
+def load_harness():
+    """Import VTSTech-GPTBench.py (the hyphen rules out a plain import)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "VTSTech-GPTBench.py")
+    spec = importlib.util.spec_from_file_location("gptbench", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# ============ BENCHMARK CASES ============
+ROBUST_EXECUTE_CALLS = [
+    ("calculator", {"expression": "15 * 7"}),
+    ("find_user", {"username": "john@example.com"}),
+    ("get_user", {"id": "42"}),
+    ("get_weather", {"city": "London"}),
+    ("encode_url", {"url": "hello world!"}),
+    ("generate_random_number", {"min": 1, "max": 100}),
+    ("date_calculator", {"base_date": "2026-02-13", "days": 30}),
+    ("convert_units", {"value": 100, "from_unit": "kilometers", "to_unit": "miles"}),
+    ("hash_text", {"input": {"text": "password123"}}),
+]
+
+def stream_sanitize(text, chunk_size=16):
+    """Feed text through StreamSanitizer in token-sized chunks, as a streamed response would arrive."""
+    sanitizer = StreamSanitizer()
+    for i in range(0, len(text), chunk_size):
+        sanitizer.feed(text[i:i + chunk_size])
+    return sanitizer.finish()
+
+def build_cases(harness, corpus):
+    """Return [(name, items, fn)]; each benchmark round calls fn(item) for every item."""
+    cases = []
+    for group, texts in corpus.items():
+        cases.append((f"sanitize_output[{group}]", texts, harness.sanitize_output))
+        cases.append((f"stream_sanitize[{group}]", texts, stream_sanitize))
+        cases.append((f"is_tool_call[{group}]", texts, is_tool_call))
+        cases.append((f"validate_tool_call[{group}]", texts,
+                      lambda x: validate_tool_call(x, "get_weather", {"location": "London"})))
+
+    def run_robust(call):
+        with tool_context(0, call[0]):
+            return harness.robust_execute(call[0], copy.deepcopy(call[1]))
+    cases.append(("robust_execute", ROBUST_EXECUTE_CALLS, run_robust))
+
+    instruct_prompts = [t["prompt"] for t in INSTRUCT_TEST_SUITE]
+    tool_prompts = [t["prompt"] for t in TOOL_TEST_SUITE]
+    cases.append(("build_instruct_messages", instruct_prompts, harness.build_instruct_messages))
+    cases.append(("build_tool_messages", tool_prompts, harness.build_tool_messages))
+    sample_result = {"status": "found", "user": {"user_id": 42, "name": "John Doe", "projects": ["A", "C"]}}
+    cases.append(("build_tool_followup_messages", tool_prompts,
+                  lambda p: harness.build_tool_followup_messages(p, RECORDED_OUTPUTS[30], "find_user", sample_result)))
+
+    all_texts = [t for texts in corpus.values() for t in texts]
+    for suite_name, suite in (("instruct", INSTRUCT_TEST_SUITE), ("tool", TOOL_TEST_SUITE), ("agent", AGENT_TEST_SUITE)):
+        for test in suite:
+            cases.append((f"validator:{suite_name}:{test['name']}", all_texts, test["validator"]))
+    return cases
+
+# ============ RUNNER ============
+def time_case(items, fn, rounds):
+    """pytest-benchmark style: one warmup pass, then 'rounds' timed passes over all items."""
+    errors = 0
+    for item in items:
+        try:
+            fn(item)
+        except Exception:
+            errors += 1
+    per_op = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            try:
+                fn(item)
+            except Exception:
+                pass
+        per_op.append((time.perf_counter() - start) / len(items))
+    return {
+        "ops": len(items),
+        "min_us": round(min(per_op) * 1e6, 3),
+        "median_us": round(statistics.median(per_op) * 1e6, 3),
+        "mean_us": round(statistics.fmean(per_op) * 1e6, 3),
+        "ops_per_s": round(1 / statistics.median(per_op), 1) if statistics.median(per_op) > 0 else None,
+        "exceptions": errors
+    }
+
+def run_harness_benchmark(rounds=5, corpus_files=(), baseline_path=BASELINE_FILE, save_baseline=False,
+                          only=None, json_path=None):
+    harness = load_harness()
+    corpus = load_corpus(corpus_files)
+    baseline = {}
+    if baseline_path and os.path.isfile(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get("median_us", {})
+
+    print(f"\n⏱️  HARNESS MICROBENCHMARK ({rounds} rounds, "
+          + ", ".join(f"{len(v)} {k}" for k, v in corpus.items()) + " outputs)")
+    print("-" * 100)
+    print(f"{'Benchmark':<52} | {'median µs':>10} | {'min µs':>10} | {'ops/s':>11} | {'vs base':>8}")
+    print("-" * 100)
+
+    results = {}
+    regressions = []
+    # Deep/huge inputs recurse in json and re; stdout capture is not needed here
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    for name, items, fn in build_cases(harness, corpus):
+        if only and only not in name:
+            continue
+        r = time_case(items, fn, rounds)
+        results[name] = r
+        ratio = ""
+        if name in baseline and baseline[name] > 0:
+            factor = r["median_us"] / baseline[name]
+            ratio = f"{factor:.2f}x"
+            if factor > REGRESSION_RATIO:
+                regressions.append((name, factor))
+                ratio += " ⚠️"
+        print(f"{name[:52]:<52} | {r['median_us']:>10.2f} | {r['min_us']:>10.2f} | {r['ops_per_s'] or 0:>11.1f} | {ratio:>8}")
+    print("-" * 100)
+
+    if regressions:
+        print(f"⚠️  {len(regressions)} benchmark(s) slower than baseline by more than {REGRESSION_RATIO:.2f}x:")
+        for name, factor in sorted(regressions, key=lambda x: -x[1]):
+            print(f"    {name}: {factor:.2f}x")
+    elif baseline:
+        print("✅ No regressions against baseline")
+
+    if save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({"median_us": {k: v["median_us"] for k, v in results.items()}}, f, indent=2)
+        print(f"💾 Saved baseline to {baseline_path}")
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return results, regressions
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="VTSTech-GPTBench – harness hot-path microbenchmarks")
+    parser.add_argument("--rounds", "-r", type=int, default=5, help="Timed passes over the corpus per benchmark")
+    parser.add_argument("--corpus", "-c", action="append", default=[],
+                        help="Result JSON from --json-output to add to the corpus (repeatable)")
+    parser.add_argument("--baseline", "-b", type=str, default=BASELINE_FILE, help="Baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's medians as the new baseline")
+    parser.add_argument("--only", "-k", type=str, help="Only run benchmarks whose name contains this string")
+    parser.add_argument("--json-output", "-j", type=str, help="Save full results as JSON")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    _, regressions = run_harness_benchmark(
+        rounds=args.rounds,
+        corpus_files=args.corpus,
+        baseline_path=args.baseline,
+        save_baseline=args.save_baseline,
+        only=args.only,
+        json_path=args.json_output
+    )
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# hostmonitor.py - /proc and /api/ps sampling, attributed to each test's time window
+#
+# A background thread samples host CPU (per core), load average, CPU
+# frequency and the Ollama processes' CPU time, RSS and page faults, plus
+# the resident model size from /api/ps. mark() at the start of a test and
+# window(mark) at its end summarise exactly that interval.
+
+import os
+import glob
+import time
+import threading
+import weakref
+
+import requests
+
+OLLAMA_PS_URL = "http://127.0.0.1:11434/api/ps"
+SAMPLE_INTERVAL = 0.5
+PS_INTERVAL = 2.0          # /api/ps is an HTTP call; poll it less often than /proc
+PID_REFRESH = 5.0          # Ollama starts a runner process per loaded model
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# ============ /proc READERS ============
+def read_cpu_times():
+    """[(busy, total)] jiffies per core from /proc/stat."""
+    cores = []
+    with open("/proc/stat", 'r') as f:
+        for line in f:
+            if line.startswith("cpu") and line[3].isdigit():
+                values = [int(v) for v in line.split()[1:]]
+                idle = values[3] + (values[4] if len(values) > 4 else 0)
+                total = sum(values[:8])
+                cores.append((total - idle, total))
+    return cores
+
+def read_loadavg():
+    with open("/proc/loadavg", 'r') as f:
+        return float(f.read().split()[0])
+
+def read_cpu_mhz():
+    """Mean current frequency over cores (cpufreq if exposed, else /proc/cpuinfo)."""
+    freqs = []
+    for path in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq"):
+        try:
+            with open(path, 'r') as f:
+                freqs.append(int(f.read()) / 1000)
+        except (OSError, ValueError):
+            pass
+    if not freqs:
+        with open("/proc/cpuinfo", 'r') as f:
+            freqs = [float(line.split(":")[1]) for line in f if line.startswith("cpu MHz")]
+    return sum(freqs) / len(freqs) if freqs else None
+
+def find_ollama_pids():
+    pids = []
+    for comm in glob.glob("/proc/[0-9]*/comm"):
+        try:
+            with open(comm, 'r') as f:
+                if f.read().startswith("ollama"):
+                    pids.append(int(comm.split("/")[2]))
+        except (OSError, ValueError):
+            pass
+    return pids
+
+def read_process(pid):
+    """(cpu seconds, rss bytes, minor faults, major faults) from /proc/<pid>/stat."""
+    with open(f"/proc/{pid}/stat", 'r') as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return ((int(fields[11]) + int(fields[12])) / CLK_TCK, int(fields[21]) * PAGE_SIZE,
+            int(fields[7]), int(fields[9]))
+
+def read_ollama_ps():
+    """Loaded models from /api/ps: {name: {size, size_vram}}."""
+    try:
+        resp = requests.get(OLLAMA_PS_URL, timeout=1)
+        resp.raise_for_status()
+        return {m["name"]: {"size": m.get("size", 0), "size_vram": m.get("size_vram", 0)}
+                for m in resp.json().get("models", [])}
+    except Exception:
+        return None
+
+# ============ SAMPLER ============
+class _Window:
+    """Running aggregate from one mark(); updated by every sample until window() closes it."""
+
+    def __init__(self, first):
+        self.first = first
+        self.load1_max = first["load1"]
+        self.mhz = [first["mhz"]] if first["mhz"] else []
+        self.rss_max = first["ollama_rss"]
+        self.model_bytes = first["model_bytes"]
+
+    def add(self, row):
+        self.load1_max = max(self.load1_max, row["load1"])
+        if row["mhz"]:
+            self.mhz.append(row["mhz"])
+        self.rss_max = max(self.rss_max, row["ollama_rss"])
+        if row["model_bytes"] is not None:
+            self.model_bytes = max(self.model_bytes or 0, row["model_bytes"])
+
+class HostMonitor:
+    """Background sampler; cumulative Ollama counters survive runner processes exiting.
+
+    No sample history is kept: each open mark aggregates the samples taken
+    while it is open, and a mark dropped without window() is forgotten.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._open = weakref.WeakSet()
+        self._pids = []
+        self._proc_last = {}       # pid -> (cpu_s, rss, minflt, majflt), kept after the pid exits
+        self._mhz = None
+        self._ps = None
+        self._ps_at = 0.0
+
+    @staticmethod
+    def available():
+        return os.path.isfile("/proc/stat")
+
+    def start(self):
+        self.sample(background=True)
+        self._thread = threading.Thread(target=self._loop, name="gptbench-hostmonitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _loop(self):
+        pids_at = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            try:
+                refresh = time.perf_counter() - pids_at >= PID_REFRESH
+                if refresh:
+                    pids_at = time.perf_counter()
+                self.sample(background=True, refresh_pids=refresh)
+            except OSError:
+                pass
+
+    def sample(self, background=False, refresh_pids=False):
+        """Take one sample and fold it into every open window.
+
+        The slow parts (the /api/ps HTTP call, the CPU frequency and the pid
+        scan) run only on the background thread, so mark() and window() on
+        the test's own thread just read /proc/stat and the known Ollama pids.
+        """
+        now = time.perf_counter()
+        row = {"t": now, "cores": read_cpu_times(), "load1": read_loadavg()}
+        ps = read_ollama_ps() if background and now - self._ps_at >= PS_INTERVAL else False
+        mhz = read_cpu_mhz() if background else None
+        pids = find_ollama_pids() if background and (refresh_pids or not self._pids) else None
+        with self._lock:
+            if pids is not None:
+                self._pids = pids
+            if mhz:
+                self._mhz = mhz
+            if ps is not False:
+                self._ps, self._ps_at = ps, now
+            rss = 0
+            for pid in list(self._pids):
+                try:
+                    self._proc_last[pid] = read_process(pid)
+                    rss += self._proc_last[pid][1]
+                except (OSError, IndexError, ValueError):
+                    self._pids.remove(pid)
+            row.update({
+                "mhz": mhz if background else self._mhz,
+                "ollama_cpu_s": sum(v[0] for v in self._proc_last.values()),
+                "ollama_minflt": sum(v[2] for v in self._proc_last.values()),
+                "ollama_majflt": sum(v[3] for v in self._proc_last.values()),
+                "ollama_rss": rss,
+                "model_bytes": sum(m["size"] for m in self._ps.values()) if self._ps else None
+            })
+            for window in self._open:
+                window.add(row)
+            return row
+
+    def mark(self):
+        """Start a window now; pass the result to window() when the test ends."""
+        row = self.sample()
+        window = _Window(row)
+        with self._lock:
+            self._open.add(window)
+        return window
+
+    def window(self, mark):
+        """Summary of host/Ollama activity from mark() until now."""
+        last = self.sample()
+        with self._lock:
+            self._open.discard(mark)
+        first = mark.first
+        wall = last["t"] - first["t"]
+        per_core = []
+        for (b0, t0), (b1, t1) in zip(first["cores"], last["cores"]):
+            per_core.append((b1 - b0) / (t1 - t0) if t1 > t0 else 0.0)
+        busy_cores = sum(per_core)
+        ollama_cpu = last["ollama_cpu_s"] - first["ollama_cpu_s"]
+        ollama_cores = ollama_cpu / wall if wall > 0 else 0.0
+        return {
+            "wall_s": round(wall, 4),
+            "cpu_per_core": [round(c * 100, 1) for c in per_core],
+            "host_cpu_pct": round(busy_cores / len(per_core) * 100, 1) if per_core else None,
+            "ollama_cpu_s": round(ollama_cpu, 3),
+            "ollama_cores": round(ollama_cores, 2),
+            # Busy cores not accounted for by Ollama: the harness plus any noisy neighbour
+            "other_cores": round(max(0.0, busy_cores - ollama_cores), 2),
+            "load1_max": mark.load1_max,
+            "mhz_mean": round(sum(mark.mhz) / len(mark.mhz)) if mark.mhz else None,
+            "ollama_rss_max": mark.rss_max,
+            "minor_faults": last["ollama_minflt"] - first["ollama_minflt"],
+            "major_faults": last["ollama_majflt"] - first["ollama_majflt"],
+            "model_bytes": mark.model_bytes
+        }
+
+MONITOR = None
+
+def start_monitor(interval=SAMPLE_INTERVAL):
+    global MONITOR
+    if not HostMonitor.available():
+        print("⚠️  Host monitoring needs /proc (Linux); continuing without it")
+        return None
+    MONITOR = HostMonitor(interval)
+    MONITOR.start()
+    return MONITOR
+
+def stop_monitor():
+    global MONITOR
+    if MONITOR:
+        MONITOR.stop()
+        MONITOR = None
+
+def host_mark():
+    return MONITOR.mark() if MONITOR else None
+
+def host_window(mark):
+    return MONITOR.window(mark) if MONITOR and mark is not None else None
+
+def host_summary(results):
+    """Per-model totals over the tests' windows: tokens per Ollama CPU-second, peak memory, contention.
+
+    A result's "host_tokens" (tokens generated inside its window) is used
+    over "tokens" when the two differ, e.g. agent tasks with cached plans.
+    """
+    windows = [(r, r["host"]) for r in results if r.get("host")]
+    if not windows:
+        return None
+    cpu = sum(w["ollama_cpu_s"] for _, w in windows)
+    tokens = sum(r.get("host_tokens", r.get("tokens")) or 0 for r, _ in windows)
+    wall = sum(w["wall_s"] for _, w in windows)
+    sizes = [w["model_bytes"] for _, w in windows if w["model_bytes"]]
+    mhz = [w["mhz_mean"] for _, w in windows if w["mhz_mean"]]
+    return {
+        "tests": len(windows),
+        "tokens_per_cpu_s": round(tokens / cpu, 2) if cpu else None,
+        "ollama_cpu_s": round(cpu, 2),
+        "ollama_cores": round(cpu / wall, 2) if wall else None,
+        "other_cores": round(sum(w["other_cores"] * w["wall_s"] for _, w in windows) / wall, 2) if wall else None,
+        "peak_rss": max(w["ollama_rss_max"] for _, w in windows),
+        "peak_model_bytes": max(sizes) if sizes else None,
+        "load1_max": max(w["load1_max"] for _, w in windows),
+        "mhz_mean": round(sum(mhz) / len(mhz)) if mhz else None,
+        "major_faults": sum(w["major_faults"] for _, w in windows)
+    }
+
+def print_host_summary(results):
+    s = host_summary(results)
+    if not s:
+        return s
+    gib = lambda b: f"{b / 2**30:.2f} GiB" if b else "n/a"
+    print(f"🖥️  Host: {s['tokens_per_cpu_s'] or 0:.1f} tok/CPU-s, Ollama {s['ollama_cores'] or 0:.2f} cores "
+          f"(other load {s['other_cores'] or 0:.2f} cores), peak RSS {gib(s['peak_rss'])}, "
+          f"model {gib(s['peak_model_bytes'])}, load1 max {s['load1_max']:.2f}, "
+          f"{s['mhz_mean'] or '?'} MHz, {s['major_faults']} major faults")
+    return s
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# profiling.py - Profile harness code only (--profile cprofile|tracemalloc|sampling)
+#
+# The harness marks every blocking read from Ollama with socket_wait(); the
+# profilers pause (cprofile) or skip samples (sampling) inside it, so the
+# output shows Python-side overhead instead of time spent waiting on a model.
+
+import os
+import sys
+import time
+import random
+import cProfile
+import pstats
+import threading
+import contextlib
+import tracemalloc
+from collections import Counter
+
+PROFILE_KINDS = ("cprofile", "tracemalloc", "sampling")
+SAMPLE_INTERVAL = 0.005
+# Short harness bursts hold the GIL for less than the default 5 ms switch
+# interval, so the sampler would only ever wake during socket waits
+SAMPLING_SWITCH_INTERVAL = 0.0005
+TRACEMALLOC_FRAMES = 25
+TRACEMALLOC_TOP = 40
+# Python 3.12+ cProfile hooks sys.monitoring: one profiler sees every thread
+CPROFILE_PER_THREAD = sys.version_info < (3, 12)
+# Allocations made by the HTTP client while talking to Ollama are not harness code
+NETWORK_MODULES = ("*/requests/*", "*/urllib3/*", "*/http/*", "*/socket.py", "*/ssl.py", "*/selectors.py")
+
+class HarnessProfiler:
+    """One profiling session; start() ... stop(path_prefix) -> summary dict."""
+
+    def __init__(self, kind, interval=SAMPLE_INTERVAL):
+        if kind not in PROFILE_KINDS:
+            raise ValueError(f"unknown profiler '{kind}' (choose from {', '.join(PROFILE_KINDS)})")
+        self.kind = kind
+        self.interval = interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profiles = []
+        self._shared = None        # the single cProfile when it covers every thread
+        self._shared_on = False
+        self._active = set()       # threads running harness code (sampling mode)
+        self._waiting = set()      # threads blocked on Ollama
+        self._stacks = Counter()
+        self._sampler = None
+        self._stop = threading.Event()
+        self._sampler_cpu = 0.0
+        self._switch_interval = None
+        self._main = None
+        self.wait_s = 0.0
+
+    def start(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._main = threading.get_ident()
+        if self.kind == "tracemalloc":
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._enter_thread()
+        if self.kind == "sampling":
+            self._switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(SAMPLING_SWITCH_INTERVAL)
+            self._sampler = threading.Thread(target=self._sample_loop, name="gptbench-sampler", daemon=True)
+            self._sampler.start()
+
+    def _enter_thread(self):
+        if self.kind == "cprofile" and CPROFILE_PER_THREAD:
+            profile = cProfile.Profile()
+            profile.enable()
+            self._local.profile = profile
+            with self._lock:
+                self._profiles.append(profile)
+        elif self.kind == "cprofile" and self._shared is None:
+            self._shared = cProfile.Profile()
+            self._profiles.append(self._shared)
+        with self._lock:
+            self._active.add(threading.get_ident())
+            self._sync_shared()
+
+    def _exit_thread(self):
+        profile = getattr(self._local, "profile", None)
+        if profile:
+            profile.disable()
+            self._local.profile = None
+        with self._lock:
+            self._active.discard(threading.get_ident())
+            self._sync_shared()
+
+    def _sync_shared(self):
+        """Run the shared profiler only while some thread is in harness code (lock held).
+
+        It cannot be paused per thread: while one thread does harness work,
+        the others' Ollama waits are profiled too (as time in socket reads).
+        """
+        if self._shared is None:
+            return
+        running = bool(self._active - self._waiting)
+        if running != self._shared_on:
+            (self._shared.enable if running else self._shared.disable)()
+            self._shared_on = running
+
+    @contextlib.contextmanager
+    def thread(self):
+        """Profile a worker thread's body (agent steps run on a thread pool)."""
+        self._enter_thread()
+        try:
+            yield
+        finally:
+            self._exit_thread()
+
+    @contextlib.contextmanager
+    def socket_wait(self):
+        """Blocked on Ollama: profiling paused; time spent here on the main thread is not harness time."""
+        tid = threading.get_ident()
+        profile = getattr(self._local, "profile", None)
+        if profile:
+            profile.disable()
+        with self._lock:
+            self._waiting.add(tid)
+            self._sync_shared()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._waiting.discard(tid)
+                if tid == self._main:
+                    self.wait_s += elapsed
+                self._sync_shared()
+            if profile:
+                profile.enable()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        # Jittered so samples don't lock onto the request/response cadence
+        while not self._stop.wait(self.interval * random.uniform(0.5, 1.5)):
+            with self._lock:
+                threads = self._active - self._waiting - {own}
+            frames = sys._current_frames()
+            for tid in threads:
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+        self._sampler_cpu = time.thread_time()
+
+    def stop(self, path_prefix):
+        """Stop profiling, write the output file and return the run summary."""
+        wall = time.perf_counter() - self._wall
+        self._exit_thread()
+        if self._sampler:
+            self._stop.set()
+            self._sampler.join()
+            sys.setswitchinterval(self._switch_interval)
+        cpu = time.process_time() - self._cpu - self._sampler_cpu
+
+        if self.kind == "cprofile":
+            path = f"{path_prefix}.prof"
+            stats = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(path)
+        elif self.kind == "sampling":
+            # Folded stacks: flamegraph.pl, speedscope and inferno read this directly
+            path = f"{path_prefix}.folded"
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        else:
+            path = f"{path_prefix}.tracemalloc.txt"
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, pattern) for pattern in NETWORK_MODULES + (tracemalloc.__file__,)])
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"# current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB (network modules excluded below)\n")
+                for stat in snapshot.statistics("traceback")[:TRACEMALLOC_TOP]:
+                    f.write(f"\n{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                    f.write("\n".join(stat.traceback.format()) + "\n")
+
+        return {
+            "kind": self.kind,
+            "path": path,
+            "wall_s": wall,
+            "ollama_wait_s": self.wait_s,
+            "harness_wall_s": max(0.0, wall - self.wait_s),
+            "cpu_s": cpu,
+            "cpu_pct": cpu / wall * 100 if wall else 0.0,
+            "samples": sum(self._stacks.values())
+        }
+
+ACTIVE = None
+
+def socket_wait():
+    """Mark a blocking read from Ollama; not counted as harness time while profiling."""
+    return ACTIVE.socket_wait() if ACTIVE else contextlib.nullcontext()
+
+def wait_iter(iterable):
+    """Iterate a streamed response, treating each blocking next() as socket wait."""
+    if not ACTIVE:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with ACTIVE.socket_wait():
+            item = next(iterator, StopIteration)
+        if item is StopIteration:
+            return
+        yield item
+
+def profiled_thread():
+    return ACTIVE.thread() if ACTIVE else contextlib.nullcontext()
+
+@contextlib.contextmanager
+def profile_run(kind, path_prefix, label=""):
+    """Profile the enclosed block and print where its wall time went."""
+    global ACTIVE
+    ACTIVE = HarnessProfiler(kind)
+    ACTIVE.start()
+    try:
+        yield ACTIVE
+    finally:
+        profiler, ACTIVE = ACTIVE, None
+        s = profiler.stop(path_prefix)
+        print(f"\n🩺 Profile ({kind}{', ' + label if label else ''}): wall {s['wall_s']:.2f}s, "
+              f"waiting on Ollama {s['ollama_wait_s']:.2f}s, harness {s['harness_wall_s']:.2f}s")
+        samples = f", {s['samples']} samples" if kind == "sampling" else ""
+        print(f"   └─ Harness CPU {s['cpu_s']:.2f}s = {s['cpu_pct']:.1f}% of wall{samples} → {s['path']}")
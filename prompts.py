@@ -1,9 +1,7 @@
 # -*- coding: utf-8 -*-
 
 # ============ PLANNER BENCHMARK PROMPTS ============
-PLANNER_SYSTEM_PROMPT = """You are a router. Output ONLY a JSON array of strings listing the tools needed in order.
-
-Available tools:
+PLANNER_TOOL_LIST = """Available tools:
 - get_weather(location: str) - Get current weather
 - get_air_quality(city: str) - Get air quality
 - calculator(expression: str) - Calculate math
@@ -29,7 +27,11 @@ Available tools:
 - generate_confirmation_code() - Generate code
 - current_time(timezone: str) - Get time
 - date_calculator(start_date, days_to_add) - Date math
-- timezone_converter(time_str, from_tz, to_tz) - Convert timezone
+- timezone_converter(time_str, from_tz, to_tz) - Convert timezone"""
+
+PLANNER_SYSTEM_PROMPT = f"""You are a router. Output ONLY a JSON array of strings listing the tools needed in order.
+
+{PLANNER_TOOL_LIST}
 
 RULES:
 1. Output ONLY a JSON array of strings, e.g., ["get_weather", "convert_units"]
@@ -57,6 +59,31 @@ User: "Find user with email john@example.com"
 Output: ["find_user"]
 """
 
+PLANNER_DAG_SYSTEM_PROMPT = f"""You are a router. Output ONLY a JSON array of steps; each step names a tool and the earlier steps it needs.
+
+{PLANNER_TOOL_LIST}
+
+RULES:
+1. Output ONLY a JSON array of objects: {{"tool": "<tool name>", "after": [<indexes of earlier steps whose results it needs>]}}
+2. Include ALL tools needed to complete the request
+3. Steps are numbered from 0; "after" may only list smaller numbers
+4. Use "after": [] when a step needs nothing from other steps, so it can run at the same time as them
+5. If the request can be answered directly, output [] (empty array)
+
+Examples:
+User: "What's the weather in London and convert to Fahrenheit?"
+Output: [{{"tool": "get_weather", "after": []}}, {{"tool": "convert_units", "after": [0]}}]
+
+User: "What's the weather in London and in Paris?"
+Output: [{{"tool": "get_weather", "after": []}}, {{"tool": "get_weather", "after": []}}]
+
+User: "Find user 42, generate a password, and email it to them"
+Output: [{{"tool": "get_user", "after": []}}, {{"tool": "generate_password", "after": []}}, {{"tool": "send_email", "after": [0, 1]}}]
+
+User: "What's the capital of France?"
+Output: []
+"""
+
 PLANNER_FEW_SHOT = [
     {"role": "user", "content": "What is 15 * 7?"},
     {"role": "assistant", "content": '["calculator"]'},
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# sanitizer.py - Cleanup of raw model output: single pass over whole text, or incremental while streaming
+
+import re
+
+from tracing import traced
+
+# ============ SANITIZER OPTIONS ============
+# Defaults reproduce what the harness has always applied. Tests can override
+# any of these through a "sanitize" dict in their suite entry.
+SANITIZE_DEFAULTS = {
+    "strip_think": True,        # drop <think>...</think> reasoning blocks
+    "strip_tokens": True,       # drop chat-template tokens (<|user|>, </s>, ...)
+    "strip_fences": True,       # drop markdown code fences, keep their content
+    "strip_ansi": True,         # drop ANSI escape sequences
+    "printable_only": False,    # drop non-printable characters (newlines and tabs are kept)
+    "strip_whitespace": False,  # trim leading/trailing whitespace of the final text
+    "strip_quotes": False,      # trim, then remove one pair of surrounding quotes/backticks
+}
+
+STOP_TOKENS = ("<|system|>", "<|user|>", "<|assistant|>", "<|end|>", "</s>")
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+RE_ANSI = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+RE_FENCE = re.compile(r'```[a-z]*\n?')
+# Tails that may still grow into (or extend) a fence or ANSI match
+RE_FENCE_PARTIAL = re.compile(r'`{1,2}|```[a-z]*')
+RE_ANSI_PARTIAL = re.compile(r'\x1B(?:\[[0-?]*[ -/]*)?')
+
+class _Stage:
+    """One removal pass run incrementally.
+
+    Text is released up to the first position whose outcome more input could
+    still change: a tail that partial.fullmatch()es, or a match that ends at
+    the buffer edge and may extend. Everything before it is final, so the
+    chunked result equals one sub() over the whole text.
+    """
+
+    def __init__(self, pattern, partial, trigger):
+        self.pattern = pattern
+        self.partial = partial
+        self.trigger = trigger     # first character of every match
+        self.pending = ""
+
+    @property
+    def holding(self):
+        return bool(self.pending)
+
+    def feed(self, text):
+        buf = self.pending + text
+        if self.trigger not in buf:
+            self.pending = ""
+            return buf
+        out = []
+        pos = 0
+        for m in self.pattern.finditer(buf):
+            if m.end() == len(buf) and self.partial.fullmatch(buf, m.start()):
+                break
+            out.append(buf[pos:m.start()])
+            pos = m.end()
+        hold = self._partial_start(buf, pos)
+        out.append(buf[pos:hold])
+        self.pending = buf[hold:]
+        return "".join(out)
+
+    def finish(self):
+        buf, self.pending = self.pending, ""
+        return self.pattern.sub('', buf)
+
+    def _partial_start(self, buf, pos):
+        i = buf.find(self.trigger, pos)
+        while i != -1:
+            if self.partial.fullmatch(buf, i):
+                return i
+            i = buf.find(self.trigger, i + 1)
+        return len(buf)
+
+class _ThinkStage:
+    """Drops <think>...</think> (first open to first close, like a non-greedy regex).
+
+    An unterminated block is kept as text; it is only released by finish().
+    """
+
+    trigger = "<"
+
+    def __init__(self):
+        self.pending = ""
+        self.in_think = False
+        self.think_buf = []
+
+    @property
+    def holding(self):
+        return self.in_think or bool(self.pending)
+
+    def feed(self, text):
+        buf = self.pending + text
+        self.pending = ""
+        out = []
+        pos = 0
+        while pos < len(buf):
+            if self.in_think:
+                end = buf.find(THINK_CLOSE, pos)
+                if end == -1:
+                    keep = _partial_suffix(buf, pos, THINK_CLOSE)
+                    self.think_buf.append(buf[pos:len(buf) - keep])
+                    self.pending = buf[len(buf) - keep:]
+                    break
+                self.in_think = False
+                self.think_buf = []
+                pos = end + len(THINK_CLOSE)
+                continue
+            start = buf.find(THINK_OPEN, pos)
+            if start == -1:
+                keep = _partial_suffix(buf, pos, THINK_OPEN)
+                out.append(buf[pos:len(buf) - keep])
+                self.pending = buf[len(buf) - keep:]
+                break
+            out.append(buf[pos:start])
+            self.in_think = True
+            pos = start + len(THINK_OPEN)
+        return "".join(out)
+
+    def finish(self):
+        tail, self.pending = self.pending, ""
+        if self.in_think:
+            tail = THINK_OPEN + "".join(self.think_buf) + tail
+            self.in_think = False
+            self.think_buf = []
+        return tail
+
+def _partial_suffix(buf, pos, tag):
+    """Length of the tail of buf[pos:] that is a proper prefix of tag."""
+    for k in range(min(len(tag) - 1, len(buf) - pos), 0, -1):
+        if tag.startswith(buf[len(buf) - k:]):
+            return k
+    return 0
+
+# (removal, partial, trigger) per chat token; a partial is any proper prefix of the token
+TOKEN_PATTERNS = tuple((re.compile(re.escape(t)), re.compile("|".join(re.escape(t[:k]) for k in range(len(t) - 1, 0, -1))), t[0])
+                       for t in STOP_TOKENS)
+
+def _stages(options):
+    """The passes the old sanitize_output ran, in its order; each sees the previous one's output."""
+    stages = []
+    if options["strip_think"]:
+        stages.append(_ThinkStage())
+    if options["strip_tokens"]:
+        stages.extend(_Stage(*patterns) for patterns in TOKEN_PATTERNS)
+    if options["strip_fences"]:
+        stages.append(_Stage(RE_FENCE, RE_FENCE_PARTIAL, "`"))
+    if options["strip_ansi"]:
+        stages.append(_Stage(RE_ANSI, RE_ANSI_PARTIAL, "\x1b"))
+    return stages
+
+# ============ WHOLE TEXT ============
+def _strip_think(text):
+    """re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL) without its quadratic
+    rescans when an opening tag is never closed."""
+    out = []
+    pos = 0
+    while True:
+        start = text.find(THINK_OPEN, pos)
+        end = text.find(THINK_CLOSE, start + len(THINK_OPEN)) if start != -1 else -1
+        if end == -1:
+            out.append(text[pos:])
+            return "".join(out)
+        out.append(text[pos:start])
+        pos = end + len(THINK_CLOSE)
+
+def _strip_tokens(text):
+    for token in STOP_TOKENS:
+        text = text.replace(token, "")
+    return text
+
+# (option, trigger, pass) in stage order; a pass only runs if its trigger is in the text
+WHOLE_TEXT_PASSES = (
+    ("strip_think", "<", _strip_think),
+    ("strip_tokens", "<", _strip_tokens),
+    ("strip_fences", "`", lambda text: RE_FENCE.sub('', text)),
+    ("strip_ansi", "\x1b", lambda text: RE_ANSI.sub('', text)),
+)
+
+def _printable(text, options):
+    if options["printable_only"] and not text.isprintable():
+        text = "".join(c for c in text if c.isprintable() or c in "\n\t")
+    return text
+
+def _trim(text, options):
+    if options["strip_whitespace"] or options["strip_quotes"]:
+        text = text.strip()
+    if options["strip_quotes"] and len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'`":
+        text = text[1:-1].strip()
+    return text
+
+# ============ STREAMING ============
+class StreamSanitizer:
+    """Incremental sanitizer: feed() raw chunks as they stream in, finish() for the final text.
+
+    Each removal runs as its own stage in the old function's order, so a
+    removal can still expose a match for a later pass (e.g. a fence split by
+    a think block). A stage holds back only the tail whose outcome depends on
+    text not seen yet; feeding any chunking of a response gives the same
+    result as sanitize_output() on the whole of it.
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(SANITIZE_DEFAULTS, **(options or {}))
+        self._stages = _stages(self.options)
+        self._triggers = tuple({stage.trigger for stage in self._stages})
+        self._holding = False
+        self._out = []
+
+    @property
+    def text(self):
+        """Sanitized text emitted so far (before final whitespace/quote trimming)."""
+        return "".join(self._out)
+
+    def feed(self, chunk):
+        """Consume a raw chunk; return the newly sanitized text it released."""
+        # Plain text with nothing held back passes every stage unchanged
+        if self._holding or any(t in chunk for t in self._triggers):
+            for stage in self._stages:
+                if not chunk:
+                    break
+                chunk = stage.feed(chunk)
+            self._holding = any(stage.holding for stage in self._stages)
+        delta = self._printable(chunk)
+        if delta:
+            self._out.append(delta)
+        return delta
+
+    def finish(self):
+        """Flush held-back text and return the complete sanitized output."""
+        tail = ""
+        if self._holding:
+            for stage in self._stages:
+                tail = stage.feed(tail) + stage.finish()
+            self._holding = False
+        tail = self._printable(tail)
+        if tail:
+            self._out.append(tail)
+
+        return _trim("".join(self._out), self.options)
+
+    def _printable(self, segment):
+        return _printable(segment, self.options)
+
+@traced("sanitize")
+def sanitize_output(text, options=None):
+    """Clean model output of special tokens and formatting (same result as StreamSanitizer)."""
+    options = dict(SANITIZE_DEFAULTS, **options) if options else SANITIZE_DEFAULTS
+    for option, trigger, strip in WHOLE_TEXT_PASSES:
+        if trigger in text and options[option]:
+            text = strip(text)
+    return _trim(_printable(text, options), options)
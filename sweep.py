@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# sweep.py - num_thread / num_batch / num_ctx / quantization sweeps over a test subset
+#
+# Every grid point runs a representative slice of the instruct suite. The
+# default options are measured first; a point is dropped as soon as it can
+# no longer keep that pass rate or has already run longer than the fastest
+# point that did, and a context size that loses accuracy rules out the
+# smaller ones for the same thread/batch/quant setting. Requests that error
+# are retried, then counted apart from failures; they never prune anything. The fastest
+# candidates are re-run before one is recommended, using their median time.
+
+import os
+import json
+import math
+import itertools
+
+from calibration import test_category
+
+RECOMMENDATIONS_FILE = "sweep_recommendations.json"
+SWEEP_SLACK = 0.10         # a point may run this much longer than the best so far before it is dropped
+SWEEP_FINALISTS = 3        # fastest points re-timed (with the defaults) before picking the best
+SWEEP_REPEATS = 2          # extra runs per finalist
+SWEEP_RETRIES = 1          # retries of a request that errors before it counts as an error
+DEFAULT_BATCHES = "512"
+
+# ============ GRID ============
+def parse_grid(text, cast=int):
+    """'2,4,8' -> [2, 4, 8]; empty -> [None] (leave the option at Ollama's default)."""
+    values = [cast(v.strip()) for v in (text or "").split(",") if v.strip()]
+    return values or [None]
+
+def default_threads():
+    """Quarter, half and all of the logical CPUs."""
+    cpus = os.cpu_count() or 1
+    return ",".join(str(n) for n in sorted({max(1, cpus // 4), max(1, cpus // 2), cpus}))
+
+def quant_tag(model, quant):
+    """Model name for a quantization: a full 'name:tag' is used as is, otherwise it extends the tag."""
+    if not quant:
+        return model
+    if ":" in quant:
+        return quant
+    return f"{model}-{quant}" if ":" in model else f"{model}:{quant}"
+
+def representative_tests(suite, per_category=2):
+    """The first 'per_category' tests of every category (S, F, L, C...)."""
+    taken = {}
+    subset = []
+    for test in suite:
+        category = test_category(test["name"])
+        if taken.get(category, 0) < per_category:
+            taken[category] = taken.get(category, 0) + 1
+            subset.append(test)
+    return subset
+
+def sweep_grid(quants, threads, batches, ctxs):
+    """Grid points, largest context first so accuracy losses prune the smaller sizes."""
+    ctxs = sorted(ctxs, key=lambda c: -(c or 0))
+    return [{"quant": q, "num_thread": t, "num_batch": b, "num_ctx": c}
+            for q, t, b, c in itertools.product(quants, threads, batches, ctxs)]
+
+def sweep_options(base, point):
+    options = dict(base)
+    for key in ("num_thread", "num_batch", "num_ctx"):
+        if point.get(key) is not None:
+            options[key] = point[key]
+    return options
+
+def allowed_failures(tests, target_pass):
+    """Failures a point can have and still reach target_pass (%) on 'tests'."""
+    return math.floor(len(tests) * (1 - target_pass / 100) + 1e-9)
+
+def ctx_ruled_out(point, failed_ctx):
+    """True if a larger context with the same thread/batch/quant already lost accuracy."""
+    key = (point["quant"], point["num_thread"], point["num_batch"])
+    return point["num_ctx"] is not None and key in failed_ctx and point["num_ctx"] < failed_ctx[key]
+
+def sweep_finalists(points, target, count=SWEEP_FINALISTS):
+    """The 'count' fastest unpruned points that kept 'target' pass rate, plus the defaults.
+
+    Points with errors qualify too: re-timing is what gives them a complete run.
+    """
+    kept = sorted((p for p in points if not p.get("pruned") and not p.get("baseline")
+                   and p["pass_rate"] >= target), key=lambda p: p["latency"])
+    return [p for p in points if p.get("baseline")] + kept[:count]
+
+# ============ RESULTS ============
+def describe(point):
+    parts = [f"{k}={point[k]}" for k in ("num_thread", "num_batch", "num_ctx") if point.get(k) is not None]
+    return " ".join(parts) or "defaults"
+
+def print_sweep_report(model, points, best, baseline):
+    print("\n" + f"📊 PARAMETER SWEEP: {model}".center(100))
+    print("-" * 100)
+    print(f"{'Model tag':<32} | {'Threads':>7} | {'Batch':>6} | {'Ctx':>6} | {'Pass':>6} | {'Latency':>8} | "
+          f"{'Eval tok/s':>10} | Status")
+    print("-" * 100)
+    dash = lambda v: "-" if v is None else v
+    for p in points:
+        status = "★ best" if p is best else (f"pruned: {p['pruned']}" if p.get("pruned") else "")
+        if p.get("errors"):
+            status = f"{status} ({p['errors']} errors)".strip()
+        if len(p.get("latencies", [])) > 1:
+            status = f"{status} median of {len(p['latencies'])}".strip()
+        rate = f"{p['eval_tps']:.1f}" if p.get("eval_tps") else "-"
+        score = f"{p['pass_rate']:.0f}%" if p.get("pass_rate") is not None else "-"
+        latency = f"{p['latency']:.2f}s" if p.get("latency") is not None else "-"
+        print(f"{p['model'][:32]:<32} | {dash(p['num_thread']):>7} | {dash(p['num_batch']):>6} | "
+              f"{dash(p['num_ctx']):>6} | {score:>6} | {latency:>8} | {rate:>10} | {status}")
+    print("-" * 100)
+    if best is baseline:
+        print("🏆 Recommended: keep the default options (no faster configuration kept the pass rate)")
+    else:
+        gain = (1 - best["latency"] / baseline["latency"]) * 100 if baseline["latency"] else 0
+        print(f"🏆 Recommended: {best['model']} {describe(best)} - {best['pass_rate']:.0f}% "
+              f"@ {best['latency']:.2f}s ({gain:.0f}% faster than defaults)")
+
+def print_recommendations(table):
+    print("\n" + "📋 RECOMMENDED OPTIONS".center(100))
+    print("-" * 100)
+    for model, rec in table.items():
+        options = {k: v for k, v in rec["options"].items() if k in ("num_thread", "num_batch", "num_ctx")}
+        print(f"{model:<32} → {rec['model']:<32} {json.dumps(options)}")
+    print("-" * 100)
+
+def save_recommendations(table, path=RECOMMENDATIONS_FILE):
+    """Merge this run's picks into the recommendations file (other models' entries are kept)."""
+    existing = {}
+    if os.path.isfile(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+    existing.update(table)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(existing, f, indent=2)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# test_calibration.py - History -> num_predict/stop calibration (python -m pytest)
+
+from calibration import BLANK_LINE_STOP, HISTORY_WINDOW, record_generation, load_history, calibrate
+
+STATIC = 256
+
+def turn(path, tokens, content, stop, reason="stop", num_predict=STATIC):
+    record_generation(path, "m", "d", "S", num_predict,
+                      {"tokens": tokens, "content": content, "done_reason": reason}, stop)
+
+def table(path):
+    return calibrate(load_history(path, "d"), STATIC).get("S")
+
+def test_blank_line_stop_is_rechecked_once_stopped_turns_fill_the_window(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    for _ in range(3):
+        turn(path, 20, "one line", None)
+    assert table(path)["stop"] == [BLANK_LINE_STOP]
+    # Turns under the stop never show a blank line and only bound the need from below
+    for _ in range(HISTORY_WINDOW):
+        turn(path, 30, "cut", [BLANK_LINE_STOP])
+    assert table(path) is None
+    turn(path, 80, "para\n\nmore", None)
+    for _ in range(2):
+        turn(path, 20, "x", None)
+    assert table(path)["stop"] == []
+    assert table(path)["max_need"] == 80
+
+def test_cut_short_floor_leaves_the_window(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    for _ in range(3):
+        turn(path, 20, "x", [])
+    for _ in range(3):
+        turn(path, 64, "", [], "length", num_predict=64)
+    assert table(path)["num_predict"] == 128
+    for _ in range(HISTORY_WINDOW):
+        turn(path, 20, "x", [])
+    assert table(path)["num_predict"] == 32
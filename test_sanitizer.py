@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# test_sanitizer.py - Streamed vs whole-text vs pre-sanitizer.py output (python -m pytest)
+
+import re
+import random
+
+import pytest
+
+from harnessbench import RECORDED_OUTPUTS, pathological_outputs
+from sanitizer import StreamSanitizer, sanitize_output
+
+def baseline_sanitize(text):
+    """sanitize_output as it was before sanitizer.py (the default options must match it)."""
+    text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
+    for token in ["<|system|>", "<|user|>", "<|assistant|>", "<|end|>", "</s>"]:
+        text = text.replace(token, "")
+    text = re.sub(r'```[a-z]*\n?', '', text)
+    text = text.replace('```', '')
+    return re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])').sub('', text)
+
+def stream(text, chunk_size, options=None):
+    sanitizer = StreamSanitizer(options)
+    released = "".join(sanitizer.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size))
+    final = sanitizer.finish()
+    if not (sanitizer.options["strip_whitespace"] or sanitizer.options["strip_quotes"]):
+        assert final.startswith(released)  # nothing released early is taken back
+    return final
+
+# Cases that split fences, escapes and tags, or only match once an earlier pass removed something
+TRICKY = [
+    "````json\n[```<th",
+    "```<think>x</think>json\n[1]```",
+    "``<think>a</think>`js\nok",
+    "<|e<|user|>nd|>done",
+    "<|us</s>er|>",
+    "\x1b[```31mred",
+    "\x1b[`x",
+    "\x1b<think>..</think>[1mbold",
+    "<thi<think>n</think>nk>kept",
+    "<think>a<think>b</think>c</think>",
+    "<think>never closed ```json\n",
+    "`````` ``` `` ` ```abc```\n",
+    "```pyth",
+    "<|assistant|",
+    "\x1b[38;2;255;0",
+    "</think></s><|end|>\x1b[0m```",
+]
+
+FRAGMENTS = ["<think>", "</think>", "<|user|>", "<|end|>", "</s>", "<|", "|>", "<", "`", "``", "```", "json",
+             "\n", "\x1b", "[", "31", "m", "@", " ", "a", "{", "}", "th", "ink", ">"]
+
+def fuzz_corpus(count=400, seed=7):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 24))) for _ in range(count)]
+
+CORPUS = RECORDED_OUTPUTS + TRICKY + fuzz_corpus()
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_defaults_match_baseline(text):
+    assert sanitize_output(text) == baseline_sanitize(text)
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_chunked_matches_whole_text(text):
+    whole = sanitize_output(text)
+    for chunk_size in (1, 2, 3, 5, 8):
+        assert stream(text, chunk_size) == whole, chunk_size
+
+@pytest.mark.parametrize("text", pathological_outputs(), ids=lambda t: repr(t[:20]))
+def test_pathological_outputs(text):
+    whole = sanitize_output(text)
+    assert whole == baseline_sanitize(text)
+    assert stream(text, 16) == whole
+
+@pytest.mark.parametrize("options", [
+    {"strip_think": False},
+    {"strip_tokens": False, "strip_ansi": False},
+    {"strip_fences": False, "printable_only": True},
+    {"strip_whitespace": True, "strip_quotes": True},
+])
+def test_chunked_matches_whole_text_with_options(options):
+    for text in TRICKY + fuzz_corpus(100, seed=11):
+        assert stream(text, 1, options) == sanitize_output(text, options)
+
+def test_opt_in_cleanup():
+    assert sanitize_output(' "Paris" \n', {"strip_quotes": True}) == "Paris"
+    assert sanitize_output("a\x07b\tc\n", {"printable_only": True}) == "ab\tc\n"
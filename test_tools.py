@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# test_tools.py - Regression checks for ToolRegistry (python -m pytest)
+
+import collections
+
+import pytest
+
+import tools
+from tools import ToolRegistry
+
+def python_stats(monkeypatch, numbers):
+    """calculate_stats on the pure-Python path (numpy hidden)."""
+    with monkeypatch.context() as m:
+        m.setattr(tools, "np", None)
+        return ToolRegistry.calculate_stats(numbers)
+
+# ============ calculate_stats ============
+@pytest.mark.parametrize("numbers", [
+    [2**62, 2**62],
+    [-2**63, -1],
+    [2**63 - 1, 1, 5],
+    [1, 2, 3, 3],
+    [0.5, 2, 7.25, -3],
+])
+def test_calculate_stats_matches_python(monkeypatch, numbers):
+    fast = ToolRegistry.calculate_stats(numbers)
+    slow = python_stats(monkeypatch, numbers)
+    assert fast["sum"] == slow["sum"] == sum(numbers)
+    for key in ("count", "mean", "median", "mode", "min", "max", "range", "percentiles"):
+        assert fast[key] == slow[key], key
+
+def test_calculate_stats_large_ints_do_not_wrap():
+    r = ToolRegistry.calculate_stats([2**62, 2**62])
+    assert r["sum"] == 2**63
+    assert r["mean"] > 0
+
+# ============ read_file ============
+LINES = "".join(f"line {i} ਊ\n" for i in range(10)) + "last"   # U+0A0A holds 0x0A bytes in UTF-16/32
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-16", "utf-16-be", "utf-32", "utf-32-be"])
+def test_read_file_lines_in_wide_encodings(tmp_path, encoding):
+    path = tmp_path / "text.txt"
+    path.write_bytes(("﻿" if encoding.endswith("-be") else "").encode(encoding) + LINES.encode(encoding))
+    lines = LINES.splitlines(True)
+    r = ToolRegistry.read_file(str(path), offset=3, limit=2)
+    assert r["content"] == "".join(lines[3:5])
+    assert r["lines"] == len(lines)
+    assert ToolRegistry.read_file(str(path), tail=2)["content"] == "".join(lines[-2:])
+
+def test_read_file_explicit_utf16_without_bom(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_bytes(LINES.encode("utf-16-le"))
+    r = ToolRegistry.read_file(str(path), encoding="utf-16-le", offset=10)
+    assert r["status"] == "success" and r["content"] == "last"
+
+@pytest.mark.parametrize("text", ["a\nb", "a\nb\n", ""])
+def test_read_file_tail_zero(tmp_path, text):
+    path = tmp_path / "text.txt"
+    path.write_text(text)
+    r = ToolRegistry.read_file(str(path), tail=0)
+    assert r["content"] == ""
+    assert r["byte_range"] == [len(text), len(text)]
+
+def test_line_index_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(ToolRegistry, "_line_index_cache", collections.OrderedDict())
+    monkeypatch.setattr(ToolRegistry, "_LINE_INDEX_CACHE_SIZE", 3)
+    for i in range(8):
+        path = tmp_path / f"f{i}.txt"
+        path.write_text("x\n" * (i + 1))
+        ToolRegistry.read_file(str(path), count_lines=True)
+    assert len(ToolRegistry._line_index_cache) == 3
+
+# ============ calculator_batch ============
+def test_calculator_batch_counts_only_its_own_cache_use():
+    ToolRegistry.calculator("1234 + 5678")
+    r = ToolRegistry.calculator_batch(["1234 + 5678", "9 * 87654", "9 * 87654"])
+    assert (r["cache_hits"], r["cache_misses"]) == (2, 1)
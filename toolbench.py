@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# toolbench.py - Microbenchmarks for the ToolRegistry layer (no model involved)
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+from tools import ToolRegistry, execute_tool, tool_context, canonical_tool_names
+
+# Input sizes; each generator scales its arguments by one of these
+SCALES = [1, 10, 100]
+CITIES = ["London", "Paris", "Tokyo", "New York", "Berlin", "Toronto", "Sydney"]
+UNIT_PAIRS = [("kilometers", "miles"), ("kg", "lbs"), ("celsius", "fahrenheit"), ("liters", "gallons")]
+
+# ============ INPUT GENERATORS ============
+# Each entry: tool name -> f(i, n, sandbox) returning the kwargs for call i at scale n.
+# Generators may create files; that setup happens outside the timed region.
+
+def _touch(path, content="bench\n"):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+TOOL_INPUTS = {
+    # 1. WEATHER & ENVIRONMENT
+    "get_weather": lambda i, n, sb: {"location": CITIES[i % len(CITIES)]},
+    "get_forecast": lambda i, n, sb: {"location": CITIES[i % len(CITIES)], "days": min(n, 30)},
+    "get_air_quality": lambda i, n, sb: {"city": CITIES[i % len(CITIES)]},
+
+    # 2. MATHEMATICS & CALCULATIONS
+    "calculator": lambda i, n, sb: {"expression": " + ".join(f"{k}*{i + 1}" for k in range(min(n, 30))) or "0"},
+    "calculator_batch": lambda i, n, sb: {"expressions": [f"sqrt({k * k}) + {i}" for k in range(n)]},
+    "convert_units": lambda i, n, sb: dict(zip(("from_unit", "to_unit"), UNIT_PAIRS[i % len(UNIT_PAIRS)]), value=i * n),
+    "generate_random_number": lambda i, n, sb: {"min_val": 0, "max_val": n * 100},
+    "calculate_stats": lambda i, n, sb: {"numbers": [(k * 7919 + i) % 1000 for k in range(n * 100)]},
+
+    # 3. DATABASE & USER MANAGEMENT
+    "find_user": lambda i, n, sb: {"email": ["john@example.com", "jane@example.com", "nobody@example.com"][i % 3]},
+    "get_user": lambda i, n, sb: {"user_id": 42 + i % 5},
+    "list_users": lambda i, n, sb: {"active_only": bool(i % 2)},
+    "create_user": lambda i, n, sb: {"name": f"Bench User {i}", "email": f"bench{n}_{i}@example.com"},
+
+    # 4. COMMUNICATION
+    "send_email": lambda i, n, sb: {"to": "test@example.com", "subject": f"Bench {i}", "body": "Hello " * n},
+    "send_sms": lambda i, n, sb: {"phone_number": "555-0199", "message": "Test SMS " * n},
+    "generate_confirmation_code": lambda i, n, sb: {},
+
+    # 5. FILE SYSTEM
+    "create_directory": lambda i, n, sb: {"path": os.path.join(sb, "mkdir", f"n{n}", f"d{i}")},
+    "list_files": lambda i, n, sb: {"path": os.path.join(sb, f"dir_{n}")},
+    "read_file": lambda i, n, sb: {"path": os.path.join(sb, f"lines_{n}.txt"), "offset": i},
+    "write_file": lambda i, n, sb: {"path": os.path.join(sb, f"write_{n}_{i}.txt"), "content": "x" * (n * 1024)},
+    "delete_file": lambda i, n, sb: {"path": _touch(os.path.join(sb, f"delete_{n}_{i}.txt"))},
+    "hash_file": lambda i, n, sb: {"path": os.path.join(sb, f"blob_{n}.bin")},
+    "hash_directory": lambda i, n, sb: {"path": os.path.join(sb, f"dir_{n}")},
+
+    # 6. WEB & NETWORK
+    "fetch_url": lambda i, n, sb: {"url": "https://www.example.com/"},
+    "ping_host": lambda i, n, sb: {"host": f"10.0.0.{i % 255}"},
+    "encode_url": lambda i, n, sb: {"text": "hello world! " * n},
+    "decode_url": lambda i, n, sb: {"encoded": "hello%20world%21" * n},
+
+    # 7. SECURITY & HASHING
+    "hash_text": lambda i, n, sb: {"text": "password123" * n, "algorithm": ["sha256", "sha512", "md5"][i % 3]},
+    "generate_password": lambda i, n, sb: {"length": 12 + n % 20},
+
+    # 8. TIME & DATE
+    "current_time": lambda i, n, sb: {},
+    "date_calculator": lambda i, n, sb: {"start_date": "2026-02-13", "days_to_add": i * n},
+    "timezone_converter": lambda i, n, sb: {"time_str": f"{i % 24:02d}:30", "from_tz": "EST", "to_tz": "PST"},
+}
+
+# ============ HELPERS ============
+def prepare_sandbox(root):
+    """Create the scaled fixture files the input generators point at."""
+    for n in SCALES:
+        with open(os.path.join(root, f"lines_{n}.txt"), 'w', encoding='utf-8') as f:
+            for k in range(n * 1000):
+                f.write(f"{k:08d} INFO benchmark log line with some padding text\n")
+        with open(os.path.join(root, f"blob_{n}.bin"), 'wb') as f:
+            f.write(os.urandom(n * 64 * 1024))
+        directory = os.path.join(root, f"dir_{n}")
+        os.makedirs(directory)
+        for k in range(n * 10):
+            _touch(os.path.join(directory, f"file_{k:05d}.txt"), "x" * k)
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+def measure_allocations(tool_name, args):
+    """Run one call under tracemalloc; return (new live blocks, peak traced bytes)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        with contextlib.redirect_stdout(io.StringIO()), tool_context(0, tool_name):
+            result = execute_tool(tool_name, args)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+    return blocks, peak
+
+def benchmark_tool(tool_name, iterations, sandbox):
+    """Time 'iterations' calls per scale; allocations are measured in a separate traced call."""
+    gen = TOOL_INPUTS.get(tool_name, lambda i, n, sb: {})
+    timings = []
+    payload_sizes = []
+    errors = 0
+    alloc_blocks = 0
+    peak_bytes = 0
+
+    for n in SCALES:
+        for i in range(iterations):
+            args = gen(i, n, sandbox)
+            with contextlib.redirect_stdout(io.StringIO()), tool_context(i, tool_name):
+                start = time.perf_counter()
+                result = execute_tool(tool_name, args)
+                timings.append(time.perf_counter() - start)
+            if isinstance(result, dict) and ("error" in result or result.get("status") == "error"):
+                errors += 1
+            payload_sizes.append(len(json.dumps(result, default=str)))
+
+        blocks, peak = measure_allocations(tool_name, gen(iterations, n, sandbox))
+        alloc_blocks = max(alloc_blocks, blocks)
+        peak_bytes = max(peak_bytes, peak)
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        "tool": tool_name,
+        "calls": len(timings),
+        "errors": errors,
+        "p50_ms": round(percentile(timings, 50) * 1000, 4),
+        "p99_ms": round(percentile(timings, 99) * 1000, 4),
+        "mean_ms": round(total / len(timings) * 1000, 4),
+        "calls_per_s": round(len(timings) / total, 1) if total > 0 else None,
+        "alloc_blocks": alloc_blocks,
+        "peak_alloc_kb": round(peak_bytes / 1024, 1),
+        "payload_bytes_p50": percentile(sorted(payload_sizes), 50),
+        "payload_bytes_max": max(payload_sizes)
+    }
+
+# ============ RUNNER ============
+def run_tool_benchmark(iterations=20, tools=None, json_path=None):
+    """Benchmark every canonical tool in a temp sandbox and print a latency table."""
+    print(f"\n🛠️  TOOL MICROBENCHMARK ({iterations} calls x {len(SCALES)} scales per tool)")
+    print("-" * 104)
+    print(f"{'Tool':<26} | {'p50 ms':>9} | {'p99 ms':>9} | {'calls/s':>9} | {'allocs':>7} | "
+          f"{'peak KB':>8} | {'payload B':>9} | {'errors':>6}")
+    print("-" * 104)
+
+    saved_users = {k: dict(v) for k, v in ToolRegistry._mock_users.items()}
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="gptbench_tools_") as sandbox:
+            prepare_sandbox(sandbox)
+            for tool_name in tools or canonical_tool_names():
+                r = benchmark_tool(tool_name, iterations, sandbox)
+                results.append(r)
+                print(f"{tool_name:<26} | {r['p50_ms']:>9.3f} | {r['p99_ms']:>9.3f} | {r['calls_per_s'] or 0:>9.1f} | "
+                      f"{r['alloc_blocks']:>7} | {r['peak_alloc_kb']:>8.1f} | {r['payload_bytes_p50']:>9} | {r['errors']:>6}")
+    finally:
+        # create_user mutates the shared mock table; put it back
+        ToolRegistry._mock_users.clear()
+        ToolRegistry._mock_users.update(saved_users)
+    print("-" * 104)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "iterations": iterations,
+        "scales": SCALES,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "network_backend": ToolRegistry._network["backend"],
+        "results": results
+    }
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved tool benchmark to {json_path}")
+    return report
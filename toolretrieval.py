@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# toolretrieval.py - Pick the few relevant tools for a request (BM25 over ToolRegistry)
+#
+# Each tool is indexed once from its name, docstring, parameter names and a
+# short keyword list. select_tools() ranks them against the user prompt so
+# only the top-k signatures go into the tool/planner prompt.
+
+import re
+import math
+import time
+import inspect
+import functools
+from collections import Counter
+
+from tools import ToolRegistry, canonical_tool_names
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+RE_WORD = re.compile(r'[a-z0-9]+')
+RE_TOOL_LINE = re.compile(r'^- (\w+)\(')
+
+STOPWORDS = frozenset("""a an and are as at be by can for from get give i in is it me my of on or please
+show the this to what whats with you your""".split())
+
+# Words users say that the terse docstrings don't
+TOOL_KEYWORDS = {
+    "get_weather": "weather temperature celsius fahrenheit rain sunny cloudy wind humidity",
+    "get_forecast": "weather forecast days tomorrow week next",
+    "get_air_quality": "air quality aqi pollution pm2.5 smog",
+    "calculator": "calculate math compute square root multiply divide plus minus times sum percent",
+    "calculator_batch": "calculate math expressions batch several",
+    "convert_units": "convert conversion kilometers miles celsius fahrenheit kg pounds meters feet",
+    "generate_random_number": "random number between pick dice",
+    "calculate_stats": "stats statistics mean average median percentile numbers",
+    "find_user": "user email lookup find account",
+    "get_user": "user id profile lookup account",
+    "list_users": "users list active all accounts",
+    "create_user": "user new create add account register named",
+    "send_email": "email mail send message saying",
+    "send_sms": "sms text message phone",
+    "generate_confirmation_code": "confirmation code verification otp",
+    "create_directory": "directory folder mkdir create",
+    "list_files": "files directory folder list contents ls",
+    "read_file": "read file contents open",
+    "write_file": "write save file content",
+    "delete_file": "delete remove file",
+    "fetch_url": "fetch url webpage website http https content download",
+    "ping_host": "ping host reachable network latency",
+    "encode_url": "url encode percent escape string",
+    "decode_url": "url decode unescape",
+    "hash_text": "hash sha256 md5 sha1 digest checksum text",
+    "hash_file": "hash file checksum sha256 digest",
+    "hash_directory": "hash directory folder manifest checksum",
+    "generate_password": "password strong secure random generate",
+    "current_time": "time now date today clock",
+    "date_calculator": "date days add subtract after before from",
+    "timezone_converter": "timezone convert time est pst utc gmt zone",
+}
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords; plural 's' folded so 'users' matches 'user'."""
+    words = []
+    for w in RE_WORD.findall(text.lower()):
+        if w in STOPWORDS:
+            continue
+        words.append(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w)
+    return words
+
+def tool_document(name):
+    """Indexed text of a tool: name parts, docstring, parameter names and keywords."""
+    func = getattr(ToolRegistry, name)
+    params = " ".join(inspect.signature(func).parameters)
+    return " ".join((name.replace("_", " "), inspect.getdoc(func) or "", params.replace("_", " "),
+                     TOOL_KEYWORDS.get(name, "")))
+
+def signature_line(name):
+    """'- tool(arg, arg)' for tools the prompt's own listing doesn't cover."""
+    params = inspect.signature(getattr(ToolRegistry, name)).parameters.values()
+    required = [p.name for p in params if p.default is inspect.Parameter.empty]
+    return f"- {name}({', '.join(required or [p.name for p in params][:2])})"
+
+class ToolIndex:
+    """Okapi BM25 over one document per tool."""
+
+    def __init__(self, documents, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.names = list(documents)
+        self.tf = {name: Counter(tokenize(text)) for name, text in documents.items()}
+        self.length = {name: sum(tf.values()) for name, tf in self.tf.items()}
+        self.avg_length = sum(self.length.values()) / max(1, len(self.length))
+        df = Counter(term for tf in self.tf.values() for term in tf)
+        n = len(self.names)
+        self.idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def scores(self, query):
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        scores = {}
+        for name in self.names:
+            tf, norm = self.tf[name], self.k1 * (1 - self.b + self.b * self.length[name] / self.avg_length)
+            score = sum(self.idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm) for t in terms if t in tf)
+            if score > 0:
+                scores[name] = score
+        return scores
+
+    def search(self, query, k):
+        """Up to k tool names, best first; tools sharing no term with the query are never returned."""
+        scores = self.scores(query)
+        return sorted(scores, key=lambda name: (-scores[name], name))[:k]
+
+@functools.lru_cache(maxsize=1)
+def tool_index():
+    return ToolIndex({name: tool_document(name) for name in canonical_tool_names()})
+
+def select_tools(prompt, k):
+    """(top-k tool names, selection time in ms) for a user prompt."""
+    start = time.perf_counter()
+    names = tool_index().search(prompt, k)
+    return names, (time.perf_counter() - start) * 1000
+
+def tool_recall(selected, expected):
+    """Share of the expected tools that made the selection (None when nothing is expected)."""
+    if not expected:
+        return None
+    return sum(1 for name in expected if name in selected) / len(expected)
+
+def restrict_tool_list(text, names):
+    """Keep only the '- tool(...)' lines for 'names' in a prompt's tool listing.
+
+    Selected tools the listing lacks are added from their signature; prompts
+    without a listing are returned unchanged.
+    """
+    lines = text.split("\n")
+    listed = [i for i, line in enumerate(lines) if RE_TOOL_LINE.match(line)]
+    if not listed:
+        return text
+    first, last = listed[0], listed[-1]
+    present = {RE_TOOL_LINE.match(lines[i]).group(1): lines[i] for i in listed}
+    keep = [present[name] if name in present else signature_line(name) for name in names]
+    return "\n".join(lines[:first] + keep + lines[last + 1:])
@@ -7,27 +7,80 @@ import math
 import time
 import random
 import hashlib
+import heapq
+import bisect
+import array
+import codecs
+import mmap
+import stat
+import collections
+import fnmatch
 import urllib.parse
 from datetime import datetime, timedelta
 import subprocess
 import tempfile
 import shutil
 import re
+import ast
+import operator
+import functools
+import contextlib
+import contextvars
+import inspect
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Per-test tool state (seeded RNG, frozen clock); see tool_context()
+_TOOL_CONTEXT = contextvars.ContextVar("tool_context", default=None)
+
+def _read_umask():
+    """Process umask: /proc/self/status where available, else set-and-restore os.umask."""
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except OSError:
+        pass
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+# Read once at import: setting os.umask per write would briefly give files
+# created concurrently by other threads (parallel agent steps) a umask of 0
+_UMASK = _read_umask()
 
 class ToolRegistry:
     """Registry of actual callable tools - 25+ tools across 8 categories."""
+
+    @staticmethod
+    def _rng():
+        """RNG for simulated tools: the active tool_context's, else the global module."""
+        ctx = _TOOL_CONTEXT.get()
+        return ctx["rng"] if ctx and ctx["rng"] is not None else random
+
+    @staticmethod
+    def _now():
+        """Current time, or the frozen clock of the active tool_context."""
+        ctx = _TOOL_CONTEXT.get()
+        return ctx["now"] if ctx and ctx["now"] is not None else datetime.now()
+
     # ============ 1. WEATHER & ENVIRONMENT ============
     @staticmethod
     def get_weather(location, unit="celsius"):
         """Fetch real-time weather from wttr.in (free, no API key)."""
         try:
-            import requests
-            response = requests.get(
+            resp = ToolRegistry._http_get(
                 f"https://wttr.in/{location}?format=%t+%C+%w+%h",
-                timeout=10
+                timeout=10,
+                max_bytes=1024
             )
-            if response.status_code == 200:
-                parts = response.text.strip().split()
+            if resp["status_code"] == 200:
+                parts = resp["body"].decode(resp["encoding"] or "utf-8", errors="replace").strip().split()
                 temp = parts[0]
                 condition = " ".join(parts[1:-2]) if len(parts) > 3 else "unknown"
                 wind = parts[-2] if len(parts) > 2 else "?"
@@ -40,53 +93,56 @@ class ToolRegistry:
                     "wind": wind,
                     "humidity": humidity,
                     "unit": unit,
-                    "source": "wttr.in",
-                    "timestamp": datetime.now().isoformat()
+                    "source": "wttr.in" if resp["source"] == "live" else "wttr.in (recorded)",
+                    "timestamp": ToolRegistry._now().isoformat()
                 }
         except Exception as e:
             pass
         
         # Fallback simulation
+        rng = ToolRegistry._sim_rng("weather", location)
         conditions = ["sunny", "cloudy", "rainy", "clear", "partly cloudy", "mist", "overcast", "stormy"]
-        temps_c = random.randint(-5, 35)
+        temps_c = rng.randint(-5, 35)
         temps_f = int(temps_c * 9/5 + 32)
         
         return {
             "location": location,
             "temperature": f"{temps_c}°C" if unit == "celsius" else f"{temps_f}°F",
-            "condition": random.choice(conditions),
-            "wind": f"{random.randint(5, 30)} km/h",
-            "humidity": f"{random.randint(30, 95)}%",
+            "condition": rng.choice(conditions),
+            "wind": f"{rng.randint(5, 30)} km/h",
+            "humidity": f"{rng.randint(30, 95)}%",
             "unit": unit,
             "source": "simulated",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": ToolRegistry._now().isoformat()
         }
     
     @staticmethod
     def get_forecast(location, days=5):
         """Get weather forecast for multiple days."""
+        rng = ToolRegistry._rng()
         forecast = []
         for i in range(days):
-            date = (datetime.now() + timedelta(days=i+1)).strftime("%Y-%m-%d")
+            date = (ToolRegistry._now() + timedelta(days=i+1)).strftime("%Y-%m-%d")
             conditions = ["sunny", "cloudy", "rainy", "partly cloudy", "clear"]
             forecast.append({
                 "date": date,
-                "temperature_high": f"{random.randint(15, 30)}°C",
-                "temperature_low": f"{random.randint(5, 15)}°C",
-                "condition": random.choice(conditions),
-                "precipitation": f"{random.randint(0, 80)}%"
+                "temperature_high": f"{rng.randint(15, 30)}°C",
+                "temperature_low": f"{rng.randint(5, 15)}°C",
+                "condition": rng.choice(conditions),
+                "precipitation": f"{rng.randint(0, 80)}%"
             })
         
         return {
             "location": location,
             "forecast": forecast,
             "days": days,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": ToolRegistry._now().isoformat()
         }
     
     @staticmethod
     def get_air_quality(city):
         """Get air quality index (simulated)."""
+        rng = ToolRegistry._rng()
         aqi_ranges = {
             "good": (0, 50),
             "moderate": (51, 100),
@@ -96,18 +152,18 @@ class ToolRegistry:
             "hazardous": (301, 500)
         }
         
-        aqi = random.randint(20, 200)
+        aqi = rng.randint(20, 200)
         for level, (low, high) in aqi_ranges.items():
             if low <= aqi <= high:
                 status = level.replace("_", " ")
                 break
         
         pollutants = {
-            "pm2.5": random.randint(5, 50),
-            "pm10": random.randint(10, 100),
-            "o3": random.randint(10, 100),
-            "no2": random.randint(5, 60),
-            "so2": random.randint(1, 30)
+            "pm2.5": rng.randint(5, 50),
+            "pm10": rng.randint(10, 100),
+            "o3": rng.randint(10, 100),
+            "no2": rng.randint(5, 60),
+            "so2": rng.randint(1, 30)
         }
         
         return {
@@ -116,44 +172,43 @@ class ToolRegistry:
             "status": status,
             "pollutants": pollutants,
             "dominant_pollutant": max(pollutants, key=pollutants.get),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": ToolRegistry._now().isoformat()
         }
     
     # ============ 2. MATHEMATICS & CALCULATIONS ============
     
+    # Built once; the evaluator only ever resolves names from here
+    _CALC_NAMES = {k: v for k, v in math.__dict__.items() if not k.startswith("_")}
+    _CALC_NAMES.update({"abs": abs, "round": round, "min": min, "max": max, "sum": sum, "pow": pow})
+    _CALC_LIMITS = {
+        "max_exponent": 10000,
+        "max_int_digits": 4000,
+        "max_nodes": 200,
+        "max_depth": 32,
+        "max_factorial": 2000
+    }
+    _CALC_BINOPS = {
+        ast.Add: operator.add,
+        ast.Sub: operator.sub,
+        ast.Mult: operator.mul,
+        ast.Div: operator.truediv,
+        ast.FloorDiv: operator.floordiv,
+        ast.Mod: operator.mod,
+        ast.Pow: operator.pow
+    }
+    _CALC_UNARYOPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+    _CALC_CMPOPS = {
+        ast.Eq: operator.eq, ast.NotEq: operator.ne,
+        ast.Lt: operator.lt, ast.LtE: operator.le,
+        ast.Gt: operator.gt, ast.GtE: operator.ge
+    }
+
     @staticmethod
     def calculator(expression):
         """Safe mathematical expression evaluator."""
-        allowed_names = {
-            k: v for k, v in math.__dict__.items() 
-            if not k.startswith("__")
-        }
-        allowed_names.update({
-            "abs": abs,
-            "round": round,
-            "min": min,
-            "max": max,
-            "sum": sum,
-            "pow": pow,
-            "sqrt": math.sqrt,
-            "sin": math.sin,
-            "cos": math.cos,
-            "tan": math.tan,
-            "log": math.log,
-            "log10": math.log10,
-            "exp": math.exp,
-            "pi": math.pi,
-            "e": math.e
-        })
-        
         try:
-            code = compile(expression, "<string>", "eval")
-            
-            for name in code.co_names:
-                if name not in allowed_names:
-                    raise NameError(f"Use of '{name}' not allowed")
-            
-            result = eval(code, {"__builtins__": {}}, allowed_names)
+            tree = ToolRegistry._calc_compile(str(expression))
+            result = ToolRegistry._calc_eval(tree)
             
             return {
                 "expression": expression,
@@ -166,6 +221,115 @@ class ToolRegistry:
                 "error": str(e),
                 "status": "error"
             }
+
+    @staticmethod
+    def calculator_batch(expressions):
+        """Evaluate a list of expressions in one call."""
+        if isinstance(expressions, str):
+            expressions = [e for e in expressions.split(";") if e.strip()]
+        before = ToolRegistry._calc_compile.cache_info()
+        results = [ToolRegistry.calculator(expr) for expr in expressions]
+        after = ToolRegistry._calc_compile.cache_info()
+        return {
+            "results": results,
+            "count": len(results),
+            "errors": sum(1 for r in results if r["status"] == "error"),
+            # The cache counters are process-wide: report this batch's share
+            "cache_hits": after.hits - before.hits,
+            "cache_misses": after.misses - before.misses,
+            "status": "success"
+        }
+
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _calc_compile(expression):
+        """Parse and validate an expression once; the tree is reused on cache hits."""
+        tree = ast.parse(expression.strip(), mode="eval").body
+        limits = ToolRegistry._CALC_LIMITS
+        nodes = 0
+        stack = [(tree, 1)]
+        while stack:
+            node, depth = stack.pop()
+            nodes += 1
+            if nodes > limits["max_nodes"]:
+                raise ValueError(f"Expression too large (over {limits['max_nodes']} nodes)")
+            if depth > limits["max_depth"]:
+                raise ValueError(f"Expression nested too deeply (over {limits['max_depth']} levels)")
+            if isinstance(node, ast.Name) and node.id not in ToolRegistry._CALC_NAMES:
+                raise NameError(f"Use of '{node.id}' not allowed")
+            if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.keywords):
+                raise ValueError("Only plain calls to math functions are allowed")
+            stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node)
+                         if not isinstance(child, (ast.operator, ast.unaryop, ast.cmpop, ast.expr_context)))
+        return tree
+
+    @staticmethod
+    def _calc_eval(node):
+        """Evaluate a validated AST node, failing fast on runaway integer growth."""
+        R = ToolRegistry
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError(f"Unsupported constant {node.value!r}")
+            return node.value
+        if isinstance(node, ast.Name):
+            return R._CALC_NAMES[node.id]
+        if isinstance(node, ast.BinOp) and type(node.op) in R._CALC_BINOPS:
+            left, right = R._calc_eval(node.left), R._calc_eval(node.right)
+            if not all(isinstance(v, (int, float)) for v in (left, right)):
+                raise TypeError("Arithmetic is only supported on numbers")
+            if isinstance(node.op, ast.Pow):
+                R._calc_check_pow(left, right)
+            elif isinstance(node.op, ast.Mult) and isinstance(left, int) and isinstance(right, int):
+                R._calc_check_digits(abs(left).bit_length() + abs(right).bit_length())
+            return R._calc_check_result(R._CALC_BINOPS[type(node.op)](left, right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in R._CALC_UNARYOPS:
+            return R._CALC_UNARYOPS[type(node.op)](R._calc_eval(node.operand))
+        if isinstance(node, ast.Compare) and all(type(op) in R._CALC_CMPOPS for op in node.ops):
+            left = R._calc_eval(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = R._calc_eval(comparator)
+                if not R._CALC_CMPOPS[type(op)](left, right):
+                    return False
+                left = right
+            return True
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [R._calc_eval(elt) for elt in node.elts]
+        if isinstance(node, ast.Call):
+            func = R._CALC_NAMES[node.func.id]
+            if not callable(func):
+                raise TypeError(f"'{node.func.id}' is not callable")
+            args = [R._calc_eval(arg) for arg in node.args]
+            if func is pow and len(args) == 2:
+                R._calc_check_pow(*args)
+            elif node.func.id in ("factorial", "comb", "perm") and args:
+                if any(isinstance(a, int) and a > R._CALC_LIMITS["max_factorial"] for a in args):
+                    raise ValueError(f"{node.func.id}() argument exceeds {R._CALC_LIMITS['max_factorial']}")
+            return R._calc_check_result(func(*args))
+        raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+    @staticmethod
+    def _calc_check_pow(base, exponent):
+        """Reject powers whose exponent or integer result would be huge."""
+        if isinstance(exponent, (int, float)) and abs(exponent) > ToolRegistry._CALC_LIMITS["max_exponent"]:
+            raise ValueError(f"Exponent {exponent} exceeds limit of {ToolRegistry._CALC_LIMITS['max_exponent']}")
+        if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+            ToolRegistry._calc_check_digits(abs(base).bit_length() * exponent)
+
+    @staticmethod
+    def _calc_check_digits(bits):
+        """Raise if an integer of 'bits' bits would exceed the digit limit."""
+        digits = int(bits * 0.30103) + 1
+        if digits > ToolRegistry._CALC_LIMITS["max_int_digits"]:
+            raise ValueError(f"Result too large (~{digits} digits, limit {ToolRegistry._CALC_LIMITS['max_int_digits']})")
+
+    @staticmethod
+    def _calc_check_result(value):
+        """Apply the digit limit to integer results and reject complex ones."""
+        if isinstance(value, complex):
+            raise ValueError("Complex results are not supported")
+        if isinstance(value, int) and not isinstance(value, bool):
+            ToolRegistry._calc_check_digits(value.bit_length() - 1)
+        return value
     
     @staticmethod
     def convert_units(value, from_unit, to_unit):
@@ -208,41 +372,122 @@ class ToolRegistry:
     @staticmethod
     def generate_random_number(min_val=0, max_val=100):
         """Generate a random number between min and max."""
+        rng = ToolRegistry._rng()
         return {
             "min": min_val,
             "max": max_val,
-            "random": random.randint(min_val, max_val),
-            "timestamp": datetime.now().isoformat()
+            "random": rng.randint(min_val, max_val),
+            "timestamp": ToolRegistry._now().isoformat()
         }
     
+    _STATS_CHUNK = 1 << 20
+    _RE_NUMBER_SEP = re.compile(r'[\s,;]+')
+
     @staticmethod
-    def calculate_stats(numbers):
-        """Calculate statistics for a list of numbers."""
-        if isinstance(numbers, str):
-            numbers = [float(x.strip()) for x in numbers.split(",")]
-        
-        n = len(numbers)
+    def calculate_stats(numbers, percentiles=(25, 75, 90, 99)):
+        """Calculate statistics for a list of numbers, a CSV string, or a file of numbers."""
+        try:
+            values, source = ToolRegistry._load_numbers(numbers)
+        except (ValueError, TypeError, OSError) as e:
+            return {"error": str(e), "status": "error"}
+
+        n = len(values)
         if n == 0:
             return {"error": "Empty list"}
-        
-        mean = sum(numbers) / n
-        variance = sum((x - mean) ** 2 for x in numbers) / n
-        std_dev = variance ** 0.5
-        
-        numbers.sort()
-        
+
+        if np is not None and not isinstance(values, np.ndarray):
+            values = np.asarray(values)
+            if values.dtype == object:  # ints too large for int64
+                values = values.tolist()
+
+        if np is not None and isinstance(values, np.ndarray):
+            backend = "numpy"
+            ordered = np.sort(values)
+            lo, hi = ordered[0].item(), ordered[-1].item()
+            if ordered.dtype.kind in "iu" and n * max(abs(lo), abs(hi)) > np.iinfo(np.int64).max:
+                total = sum(ordered.tolist())  # an int64 sum would wrap silently
+            else:
+                total = ordered.sum().item()
+            mean = total / n
+            variance = float(np.square(ordered - mean).sum()) / n
+            # Mode from run lengths of the sorted array; first max is the smallest tied value
+            starts = np.concatenate(([0], np.flatnonzero(ordered[1:] != ordered[:-1]) + 1))
+            counts = np.diff(np.append(starts, n))
+            mode = ordered[starts[counts.argmax()]].item()
+            pick = lambda i: ordered[i].item()
+        else:
+            backend = "python"
+            ordered = sorted(values)
+            total = sum(ordered)
+            mean = total / n
+            variance = sum((x - mean) ** 2 for x in ordered) / n
+            freq = collections.Counter(ordered)
+            top = max(freq.values())
+            mode = min(v for v, c in freq.items() if c == top)
+            pick = ordered.__getitem__
+
+        lo, hi = pick(0), pick(n - 1)
         return {
             "count": n,
-            "sum": sum(numbers),
+            "sum": total,
             "mean": round(mean, 4),
-            "median": numbers[n//2] if n % 2 else (numbers[n//2-1] + numbers[n//2])/2,
-            "mode": max(set(numbers), key=numbers.count) if n > 1 else numbers[0],
-            "min": min(numbers),
-            "max": max(numbers),
-            "range": max(numbers) - min(numbers),
+            "median": pick(n // 2) if n % 2 else (pick(n // 2 - 1) + pick(n // 2)) / 2,
+            "mode": mode,
+            "min": lo,
+            "max": hi,
+            "range": hi - lo,
             "variance": round(variance, 4),
-            "std_deviation": round(std_dev, 4)
+            "std_deviation": round(variance ** 0.5, 4),
+            "percentiles": {
+                f"p{q:g}": round(ToolRegistry._percentile(pick, n, float(q)), 4) for q in percentiles
+            },
+            "source": source,
+            "backend": backend
         }
+
+    @staticmethod
+    def _percentile(pick, n, q):
+        """Linear-interpolated percentile over a sorted sequence accessed by index."""
+        pos = (n - 1) * q / 100.0
+        i = int(pos)
+        if i >= n - 1:
+            return pick(n - 1)
+        return pick(i) + (pick(i + 1) - pick(i)) * (pos - i)
+
+    @staticmethod
+    def _load_numbers(numbers):
+        """Return (values, source) from a list, CSV string, or path to a numbers file."""
+        if isinstance(numbers, str):
+            path = os.path.expanduser(numbers.strip())
+            if "," not in numbers and os.path.isfile(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    chunks = ToolRegistry._parse_number_chunks(iter(lambda: f.read(ToolRegistry._STATS_CHUNK), ""))
+                    if np is not None:
+                        parts = [np.asarray(chunk, dtype=float) for chunk in chunks]
+                        return (np.concatenate(parts) if parts else np.empty(0)), "file"
+                    return [x for chunk in chunks for x in chunk], "file"
+            values = [x for chunk in ToolRegistry._parse_number_chunks([numbers]) for x in chunk]
+            return values, "csv"
+
+        values = []
+        for x in numbers:
+            if isinstance(x, bool) or not isinstance(x, (int, float)):
+                x = float(x)
+            if x == x:  # drop NaN
+                values.append(x)
+        return values, "list"
+
+    @staticmethod
+    def _parse_number_chunks(text_chunks):
+        """Yield lists of floats from streamed text, carrying tokens split across chunk edges."""
+        carry = ""
+        for text in text_chunks:
+            tokens = ToolRegistry._RE_NUMBER_SEP.split(carry + text)
+            # The last token may continue in the next chunk
+            carry = tokens.pop()
+            yield [v for v in map(float, filter(None, tokens)) if v == v]
+        if carry:
+            yield [v for v in [float(carry)] if v == v]
     
     # ============ 3. DATABASE & USER MANAGEMENT ============
     
@@ -333,7 +578,7 @@ class ToolRegistry:
             "email": email,
             "role": role,
             "department": "New",
-            "joined": datetime.now().strftime("%Y-%m-%d"),
+            "joined": ToolRegistry._now().strftime("%Y-%m-%d"),
             "active": True,
             "projects": []
         }
@@ -350,6 +595,7 @@ class ToolRegistry:
     @staticmethod
     def send_email(to, subject, body, cc=None, bcc=None):
         """Simulate email sending with CC/BCC support."""
+        rng = ToolRegistry._rng()
         print(f"\n      📧 SIMULATED EMAIL:")
         print(f"      To: {to}")
         if cc:
@@ -365,18 +611,19 @@ class ToolRegistry:
             "cc": cc,
             "bcc": bcc,
             "subject": subject,
-            "timestamp": datetime.now().isoformat(),
-            "message_id": f"msg_{int(time.time())}_{random.randint(1000, 9999)}"
+            "timestamp": ToolRegistry._now().isoformat(),
+            "message_id": f"msg_{int(ToolRegistry._now().timestamp())}_{rng.randint(1000, 9999)}"
         }
     
     @staticmethod
     def generate_confirmation_code():
         """Generate a random confirmation code."""
-        code = ''.join(random.choices('ABCDEFGHJKLMNPQRSTUVWXYZ23456789', k=8))
+        rng = ToolRegistry._rng()
+        code = ''.join(rng.choices('ABCDEFGHJKLMNPQRSTUVWXYZ23456789', k=8))
         return {
             "code": code,
             "expires_in": "15 minutes",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": ToolRegistry._now().isoformat()
         }
     
     @staticmethod
@@ -390,7 +637,7 @@ class ToolRegistry:
             "status": "sent",
             "to": phone_number,
             "message_length": len(message),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": ToolRegistry._now().isoformat()
         }
     
     # ============ 5. FILE SYSTEM ============
@@ -417,37 +664,63 @@ class ToolRegistry:
             }
     
     @staticmethod
-    def list_files(path=".", pattern=None):
-        """List files in a directory, optionally filtered by pattern."""
+    def list_files(path=".", pattern=None, cursor=None, limit=50, recursive=False, max_depth=3, max_bytes=8192):
+        """List files in a directory, optionally filtered by pattern. Paginate with 'cursor'."""
         try:
             path = os.path.expanduser(path)
-            files = os.listdir(path)
-            
-            if pattern:
-                import fnmatch
-                files = [f for f in files if fnmatch.fnmatch(f, pattern)]
-            
+            limit = max(1, int(limit))
+            max_depth = int(max_depth) if recursive else 0
+
+            # Single scandir pass: count everything, keep only the next page of
+            # names (sorted, after the cursor) without sorting the full listing
+            counts = {"total": 0, "matched": 0}
+
+            def candidates():
+                for name, entry in ToolRegistry._iter_entries(path, pattern, max_depth):
+                    counts["total"] += 1
+                    if entry is None:
+                        continue
+                    counts["matched"] += 1
+                    if cursor is None or name > cursor:
+                        yield name, entry
+
+            page = heapq.nsmallest(limit + 1, candidates(), key=lambda item: item[0])
+            has_more = len(page) > limit
+            page = page[:limit]
+
             file_details = []
-            for f in sorted(files)[:50]:  # Limit to 50 files
-                full_path = os.path.join(path, f)
+            payload_size = 0
+            next_cursor = None
+            for name, entry in page:
                 try:
-                    stat = os.stat(full_path)
-                    file_details.append({
-                        "name": f,
-                        "type": "directory" if os.path.isdir(full_path) else "file",
-                        "size": stat.st_size,
-                        "size_human": ToolRegistry._human_readable_size(stat.st_size),
-                        "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                        "permissions": oct(stat.st_mode)[-3:]
-                    })
-                except:
-                    pass
-            
+                    st = entry.stat(follow_symlinks=False)
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                detail = {
+                    "name": name,
+                    "type": "directory" if is_dir else "file",
+                    "size": st.st_size,
+                    "size_human": ToolRegistry._human_readable_size(st.st_size),
+                    "modified": datetime.fromtimestamp(st.st_mtime).isoformat(),
+                    "permissions": oct(st.st_mode)[-3:]
+                }
+                # Result size cap keeps tool output inside the model context
+                payload_size += len(json.dumps(detail))
+                if file_details and payload_size > max_bytes:
+                    has_more = True
+                    break
+                file_details.append(detail)
+                next_cursor = name
+
             return {
                 "path": path,
                 "files": file_details,
                 "count": len(file_details),
-                "total_items": len(os.listdir(path)),
+                "total_items": counts["total"],
+                "matched": counts["matched"],
+                "next_cursor": next_cursor if has_more else None,
+                "truncated": has_more,
                 "status": "success"
             }
         except Exception as e:
@@ -456,6 +729,33 @@ class ToolRegistry:
                 "error": str(e),
                 "status": "error"
             }
+
+    @staticmethod
+    def _iter_entries(path, pattern=None, max_depth=0, _prefix="", _depth=0):
+        """Stream (relative_name, DirEntry) pairs via os.scandir.
+
+        Entries rejected by 'pattern' are yielded as (name, None) so callers can
+        still count them. Recursion stops at 'max_depth' and never follows symlinks.
+        """
+        with os.scandir(path) as it:
+            for entry in it:
+                name = _prefix + entry.name
+                if pattern and not fnmatch.fnmatch(entry.name, pattern):
+                    yield name, None
+                else:
+                    yield name, entry
+                if _depth < max_depth:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        try:
+                            yield from ToolRegistry._iter_entries(
+                                entry.path, pattern, max_depth, name + "/", _depth + 1
+                            )
+                        except OSError:
+                            pass
     
     @staticmethod
     def _human_readable_size(size):
@@ -466,24 +766,106 @@ class ToolRegistry:
             size /= 1024.0
         return f"{size:.1f} PB"
     
+    # Chunk-level newline index, LRU: {(path, size, mtime_ns, layout): {"chunk_lines": [...], "lines": n}}
+    _line_index_cache = collections.OrderedDict()
+    _line_index_lock = threading.Lock()
+    _LINE_INDEX_CACHE_SIZE = 16
+    _LINE_INDEX_CHUNK = 1 << 20
+    _LINE_INDEX_MIN_OFFSET = 4096
+    _LINE_COUNT_AUTO_LIMIT = 64 << 20
+    # (newline bytes, code unit size, offset of the first code unit) of an 8-bit encoding
+    _BYTE_LAYOUT = (b"\n", 1, 0)
+
     @staticmethod
-    def read_file(path, encoding="utf-8", max_lines=50):
-        """Read a text file."""
+    def read_file(path, encoding="utf-8", max_lines=50, offset=0, limit=None, tail=None,
+                  byte_offset=None, byte_limit=None, max_bytes=65536, count_lines=None):
+        """Read a text file by line range (offset/limit), last 'tail' lines, or byte range."""
         try:
             path = os.path.expanduser(path)
-            with open(path, 'r', encoding=encoding) as f:
-                lines = f.readlines()
-            
-            content = ''.join(lines[:max_lines])
-            truncated = len(lines) > max_lines
-            
+            limit = int(limit if limit is not None else max_lines)
+            max_bytes = int(max_bytes)
+
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                size = st.st_size
+                # mmap maps lazily, so only the pages we touch are read from disk.
+                # Pseudo-files report size 0 and fall back to a bounded read.
+                if size > 0:
+                    buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    buf = f.read(max_bytes + 1)
+                try:
+                    sample = buf[:8192]
+                    encoding, is_binary = ToolRegistry._detect_encoding(sample, encoding)
+                    if is_binary:
+                        return {
+                            "path": path,
+                            "exists": True,
+                            "size": size,
+                            "binary": True,
+                            "error": "Binary file, content not shown",
+                            "status": "error"
+                        }
+
+                    end_of_data = len(buf)
+                    codec, bom, unit = ToolRegistry._wide_codec(sample, encoding)
+                    layout = ToolRegistry._BYTE_LAYOUT
+                    if codec:
+                        # UTF-16/32: a 0x0A byte can be half of another code unit, so
+                        # newlines are only matched as whole, aligned code units
+                        encoding = codec
+                        layout = ("\n".encode(codec), unit, bom)
+                    key = (path, size, st.st_mtime_ns, layout)
+                    index = None
+                    if count_lines or (count_lines is None and size <= ToolRegistry._LINE_COUNT_AUTO_LIMIT):
+                        index = ToolRegistry._line_index(buf, key, layout)
+
+                    if byte_offset is not None or byte_limit is not None:
+                        mode = "bytes"
+                        start = min(max(0, int(byte_offset or 0)), end_of_data)
+                        span = int(byte_limit) if byte_limit is not None else max_bytes
+                        end = min(end_of_data, start + span)
+                        # Whole code units only, and never the BOM
+                        start = max(bom, start - (start - bom) % unit)
+                        end = max(start, end - (end - bom) % unit)
+                        start_line = None
+                    elif tail is not None:
+                        mode = "tail"
+                        end = end_of_data
+                        start = ToolRegistry._tail_start(buf, int(tail), layout)
+                        start_line = None
+                        if index is not None:
+                            start_line = index["lines"] - int(tail) if index["lines"] > int(tail) else 0
+                    else:
+                        mode = "lines"
+                        offset = max(0, int(offset))
+                        if index is None and offset >= ToolRegistry._LINE_INDEX_MIN_OFFSET:
+                            index = ToolRegistry._line_index(buf, key, layout)
+                        start = ToolRegistry._line_start(buf, offset, index, layout)
+                        end = ToolRegistry._skip_lines(buf, start, limit, start + max_bytes + unit, layout)
+                        start_line = offset
+
+                    budget_hit = end - start > max_bytes
+                    if budget_hit:
+                        end = max(start, start + max_bytes - max_bytes % unit)
+                    data = buf[start:end]
+                finally:
+                    if isinstance(buf, mmap.mmap):
+                        buf.close()
+
+            content = data.decode(encoding, errors="replace")
             return {
                 "path": path,
                 "exists": True,
-                "size": os.path.getsize(path),
-                "lines": len(lines),
+                "size": size,
+                "lines": index["lines"] if index else None,
+                "mode": mode,
+                "start_line": start_line,
+                "byte_range": [start, end],
                 "content": content,
-                "truncated": truncated,
+                "truncated": start > bom or end < end_of_data,
+                "budget_exceeded": budget_hit,
+                "encoding": encoding,
                 "status": "success"
             }
         except Exception as e:
@@ -492,28 +874,230 @@ class ToolRegistry:
                 "error": str(e),
                 "status": "error"
             }
-    
+
+    @staticmethod
+    def _detect_encoding(sample, encoding="utf-8"):
+        """Guess (encoding, is_binary) from the first bytes of a file."""
+        if sample.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig", False
+        if sample.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+            return "utf-32", False
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16", False
+        if ToolRegistry._wide_codec(sample, encoding)[0]:
+            return encoding, False  # NUL bytes are expected in UTF-16/32 text
+        if b"\x00" in sample:
+            return encoding, True
+        try:
+            # Incremental decode so a multi-byte char cut at the sample edge is not an error
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding, False
+        except UnicodeDecodeError:
+            return "latin-1", False
+
     @staticmethod
-    def write_file(path, content, append=False):
-        """Write or append to a file."""
+    def _wide_codec(sample, encoding):
+        """(byte-order-specific codec, BOM length, code unit size) for UTF-16/32, else (None, 0, 1)."""
+        for bom, codec, unit in ((codecs.BOM_UTF32_LE, "utf-32-le", 4), (codecs.BOM_UTF32_BE, "utf-32-be", 4),
+                                 (codecs.BOM_UTF16_LE, "utf-16-le", 2), (codecs.BOM_UTF16_BE, "utf-16-be", 2)):
+            if sample.startswith(bom):
+                return codec, len(bom), unit
+        try:
+            name = codecs.lookup(encoding).name
+        except LookupError:
+            return None, 0, 1
+        if name.startswith(("utf-16", "utf-32")):
+            # Without a BOM Python's utf-16/utf-32 decoders read little-endian
+            return (name if name.endswith(("-le", "-be")) else name + "-le"), 0, 4 if "32" in name else 2
+        return None, 0, 1
+
+    @staticmethod
+    def _line_index(buf, key, layout=_BYTE_LAYOUT):
+        """Count newlines once per 1 MB chunk and cache the running totals (LRU, per file version)."""
+        with ToolRegistry._line_index_lock:
+            cached = ToolRegistry._line_index_cache.get(key)
+            if cached:
+                ToolRegistry._line_index_cache.move_to_end(key)
+                return cached
+        newline, unit, base = layout
+        if unit > 1:
+            # Count whole code units equal to the newline, not 0x0A bytes
+            typecode = "H" if unit == 2 else next(c for c in "IL" if array.array(c).itemsize == 4)
+            value = array.array(typecode, newline)[0]
+        chunk = ToolRegistry._LINE_INDEX_CHUNK
+        chunk_lines = [0]
+        total = 0
+        for pos in range(base, len(buf), chunk):
+            piece = buf[pos:pos + chunk]
+            if unit > 1:
+                total += array.array(typecode, piece[:len(piece) - len(piece) % unit]).count(value)
+            else:
+                total += piece.count(newline)
+            chunk_lines.append(total)
+        ends_with_newline = ToolRegistry._rfind_newline(buf, len(buf), layout) == len(buf) - len(newline)
+        lines = total + (1 if len(buf) > base and not ends_with_newline else 0)
+        index = {"chunk_lines": chunk_lines, "lines": lines}
+        with ToolRegistry._line_index_lock:
+            cache = ToolRegistry._line_index_cache
+            # An older size/mtime of the same file will not be asked for again
+            for stale in [k for k in cache if k[0] == key[0] and k[3] == key[3]]:
+                del cache[stale]
+            cache[key] = index
+            while len(cache) > ToolRegistry._LINE_INDEX_CACHE_SIZE:
+                cache.popitem(last=False)
+        return index
+
+    @staticmethod
+    def _find_newline(buf, pos, end, layout=_BYTE_LAYOUT):
+        """First newline code unit in buf[pos:end] (aligned for UTF-16/32), or -1."""
+        newline, unit, base = layout
+        nl = buf.find(newline, pos, end)
+        while nl != -1 and (nl - base) % unit:
+            nl = buf.find(newline, nl + 1, end)
+        return nl
+
+    @staticmethod
+    def _rfind_newline(buf, end, layout=_BYTE_LAYOUT):
+        """Last newline code unit ending at or before 'end', or -1."""
+        newline, unit, base = layout
+        nl = buf.rfind(newline, base, end)
+        while nl != -1 and (nl - base) % unit:
+            nl = buf.rfind(newline, base, nl + len(newline) - 1)
+        return nl
+
+    @staticmethod
+    def _skip_lines(buf, pos, count, stop=None, layout=_BYTE_LAYOUT):
+        """Return the byte position after 'count' newlines from 'pos' (or 'stop'/EOF)."""
+        end_of_data = len(buf) if stop is None else min(stop, len(buf))
+        for _ in range(count):
+            nl = ToolRegistry._find_newline(buf, pos, end_of_data, layout)
+            if nl == -1:
+                return end_of_data
+            pos = nl + len(layout[0])
+        return pos
+
+    @staticmethod
+    def _line_start(buf, line_no, index=None, layout=_BYTE_LAYOUT):
+        """Byte offset of line 'line_no' (0-based), using the chunk index when available."""
+        base = layout[2]
+        if line_no == 0:
+            return base
+        if index is None:
+            return ToolRegistry._skip_lines(buf, base, line_no, layout=layout)
+        chunk_lines = index["chunk_lines"]
+        if line_no > chunk_lines[-1]:
+            return len(buf)
+        # Last chunk that starts with fewer than 'line_no' newlines behind it
+        k = bisect.bisect_left(chunk_lines, line_no) - 1
+        return ToolRegistry._skip_lines(buf, base + k * ToolRegistry._LINE_INDEX_CHUNK,
+                                        line_no - chunk_lines[k], layout=layout)
+
+    @staticmethod
+    def _tail_start(buf, count, layout=_BYTE_LAYOUT):
+        """Byte offset where the last 'count' lines begin (end of data for 0)."""
+        if count <= 0:
+            return len(buf)
+        newline, _, base = layout
+        pos = len(buf)
+        if ToolRegistry._rfind_newline(buf, pos, layout) == pos - len(newline):
+            pos -= len(newline)
+        for _ in range(count):
+            nl = ToolRegistry._rfind_newline(buf, pos, layout)
+            if nl == -1:
+                return base
+            pos = nl
+        return pos + len(newline)
+
+    _WRITE_CHUNK_CHARS = 1 << 18
+
+    @staticmethod
+    def write_file(path, content, append=False, encoding="utf-8", atomic=True, fsync="none"):
+        """Write or append to a file. Writes go to a temp file and are renamed into place."""
+        tmp_path = None
         try:
             path = os.path.expanduser(path)
-            mode = 'a' if append else 'w'
-            with open(path, mode, encoding='utf-8') as f:
-                f.write(content)
-            
+            if fsync not in ("none", "file", "full"):
+                raise ValueError(f"fsync must be 'none', 'file' or 'full', not '{fsync}'")
+            atomic = bool(atomic) and not append
+            start = time.perf_counter()
+
+            if atomic:
+                directory = os.path.dirname(os.path.abspath(path))
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+                f = os.fdopen(fd, 'wb')
+            else:
+                f = open(path, 'ab' if append else 'wb')
+
+            with f:
+                bytes_written = ToolRegistry._write_chunks(f, content, encoding)
+                if fsync != "none":
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            if atomic:
+                # mkstemp creates 0600; match what a plain open() would have produced
+                try:
+                    mode = stat.S_IMODE(os.stat(path).st_mode)
+                except FileNotFoundError:
+                    mode = 0o666 & ~_UMASK
+                os.chmod(tmp_path, mode)
+                os.replace(tmp_path, path)
+                tmp_path = None
+                if fsync == "full":
+                    ToolRegistry._fsync_dir(os.path.dirname(os.path.abspath(path)))
+            elapsed = time.perf_counter() - start
+
             return {
                 "path": path,
                 "operation": "append" if append else "write",
-                "bytes_written": len(content),
+                "bytes_written": bytes_written,
+                "chars_written": len(content),
+                "encoding": encoding,
+                "atomic": atomic,
+                "fsync": fsync,
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "throughput_mb_s": round(bytes_written / (1 << 20) / elapsed, 2) if elapsed > 0 else None,
                 "status": "success"
             }
         except Exception as e:
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
             return {
                 "path": path,
                 "error": str(e),
                 "status": "error"
             }
+
+    @staticmethod
+    def _write_chunks(f, content, encoding="utf-8"):
+        """Encode and write 'content' in fixed-size slices; return encoded byte count."""
+        encoder = codecs.getincrementalencoder(encoding)()
+        step = ToolRegistry._WRITE_CHUNK_CHARS
+        total = 0
+        for i in range(0, len(content), step):
+            data = encoder.encode(content[i:i + step])
+            f.write(data)
+            total += len(data)
+        data = encoder.encode("", final=True)
+        f.write(data)
+        return total + len(data)
+
+    @staticmethod
+    def _fsync_dir(directory):
+        """Flush a directory entry so a rename survives a crash (no-op where unsupported)."""
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
     
     @staticmethod
     def delete_file(path):
@@ -542,44 +1126,245 @@ class ToolRegistry:
     
     # ============ 6. WEB & NETWORK ============
     
+    # Per-thread pooled sessions and a bounded (LRU) conditional-GET cache for the web tools
+    _http_local = threading.local()
+    _http_cache = collections.OrderedDict()
+    _http_cache_lock = threading.Lock()
+    HTTP_CACHE_SIZE = 128
+    _http_dead_hosts = {}
+    _network = {"backend": "live", "fixture_path": None, "fixture": {}, "seed": None, "negative_ttl": 300}
+    _fixture_lock = threading.Lock()   # agent steps record from several threads
+    _HTTP_HEADER_ALLOWLIST = ("content-type", "content-length", "content-encoding", "last-modified",
+                              "etag", "cache-control", "date", "server", "location")
+
     @staticmethod
-    def fetch_url(url, timeout=10):
+    def fetch_url(url, timeout=10, max_bytes=16384):
         """Fetch content from a URL."""
         try:
-            import requests
-            headers = {
-                'User-Agent': 'VTSTech-Benchmark/1.0'
-            }
-            response = requests.get(url, timeout=timeout, headers=headers)
+            resp = ToolRegistry._http_get(url, timeout=timeout, max_bytes=int(max_bytes))
+            text = resp["body"].decode(resp["encoding"] or "utf-8", errors="replace")
+            # Full body length: the server's Content-Length, else unknown once the read was cut
+            length = resp["headers"].get("content-length", "")
+            if length.isdigit():
+                length = int(length)
+            else:
+                length = None if resp["truncated"] else len(text)
             
             return {
                 "url": url,
-                "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "content_length": len(response.text),
-                "content_preview": response.text[:500],
-                "encoding": response.encoding,
+                "status_code": resp["status_code"],
+                "headers": resp["headers"],
+                "content_length": length,
+                "content_preview": text[:500],
+                "bytes_read": len(resp["body"]),
+                "truncated": resp["truncated"],
+                "encoding": resp["encoding"],
+                "cached": resp["cached"],
+                "source": resp["source"],
                 "status": "success"
             }
         except Exception as e:
+            if ToolRegistry._network["backend"] in ("simulated", "replay"):
+                return ToolRegistry._simulated_page(url)
             return {
                 "url": url,
                 "error": str(e),
                 "status": "error"
             }
+
+    @staticmethod
+    def _simulated_page(url):
+        """Deterministic stand-in for fetch_url when the network is not used."""
+        host = urllib.parse.urlsplit(url).hostname or url
+        content = (f"<!doctype html><html><head><title>{host}</title></head>"
+                   f"<body><h1>{host}</h1><p>Simulated response for {url}</p></body></html>")
+        return {
+            "url": url,
+            "status_code": 200,
+            "headers": {"content-type": "text/html; charset=utf-8", "content-length": str(len(content))},
+            "content_length": len(content),
+            "content_preview": content[:500],
+            "bytes_read": len(content),
+            "truncated": False,
+            "encoding": "utf-8",
+            "cached": False,
+            "source": "simulated",
+            "status": "success"
+        }
+
+    @staticmethod
+    def _sim_rng(*key):
+        """Random source for simulated data, seeded per key when a tool or network seed is set."""
+        ctx = _TOOL_CONTEXT.get()
+        seed = ctx["seed"] if ctx and ctx["seed"] is not None else ToolRegistry._network["seed"]
+        if seed is None:
+            return random
+        return random.Random(":".join(str(k) for k in (seed,) + key))
+
+    @staticmethod
+    def _get_http_session():
+        """Lazily build this thread's pooled requests.Session (Sessions are not thread-safe)."""
+        session = getattr(ToolRegistry._http_local, "session", None)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({'User-Agent': 'VTSTech-Benchmark/1.0'})
+            ToolRegistry._http_local.session = session
+        return session
+
+    @staticmethod
+    def _http_cache_get(url):
+        with ToolRegistry._http_cache_lock:
+            entry = ToolRegistry._http_cache.get(url)
+            if entry is not None:
+                ToolRegistry._http_cache.move_to_end(url)
+            return entry
+
+    @staticmethod
+    def _http_cache_put(url, entry):
+        """Cache 'entry', evicting the least recently used beyond HTTP_CACHE_SIZE."""
+        with ToolRegistry._http_cache_lock:
+            ToolRegistry._http_cache[url] = entry
+            ToolRegistry._http_cache.move_to_end(url)
+            while len(ToolRegistry._http_cache) > ToolRegistry.HTTP_CACHE_SIZE:
+                ToolRegistry._http_cache.popitem(last=False)
+
+    @staticmethod
+    def _http_get(url, timeout=10, max_bytes=16384):
+        """GET 'url' through the configured network backend (see configure_network).
+
+        Live failures at the connection level mark the host dead for
+        'negative_ttl' seconds so later calls fail immediately instead of
+        waiting out another timeout.
+        """
+        net = ToolRegistry._network
+        if net["backend"] == "simulated":
+            raise ConnectionError("Network backend is 'simulated'")
+        if net["backend"] == "replay":
+            entry = net["fixture"].get(url)
+            if entry is None:
+                raise ConnectionError(f"No recorded response for {url}")
+            body = entry["body"].encode("latin-1")
+            return {
+                "status_code": entry["status_code"],
+                "headers": entry["headers"],
+                "body": body[:max_bytes],
+                "truncated": entry["truncated"] or len(body) > max_bytes,
+                "encoding": entry["encoding"],
+                "cached": False,
+                "source": "recorded"
+            }
+
+        host = urllib.parse.urlsplit(url).hostname
+        failure = ToolRegistry._http_dead_hosts.get(host)
+        if failure and time.monotonic() < failure[0]:
+            raise ConnectionError(f"{failure[1]} (cached failure for {host})")
+
+        import requests
+        try:
+            result = ToolRegistry._http_get_live(url, timeout, max_bytes)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            ToolRegistry._http_dead_hosts[host] = (time.monotonic() + net["negative_ttl"], str(e))
+            raise
+        result["source"] = "live"
+
+        if net["backend"] == "record":
+            ToolRegistry._record_response(url, result)
+        return result
+
+    @staticmethod
+    def _record_response(url, result):
+        """Add a live response to the fixture and atomically rewrite the fixture file."""
+        net = ToolRegistry._network
+        entry = {
+            "status_code": result["status_code"],
+            "headers": result["headers"],
+            # latin-1 maps bytes 1:1 onto code points, so the body round-trips exactly
+            "body": result["body"].decode("latin-1"),
+            "truncated": result["truncated"],
+            "encoding": result["encoding"]
+        }
+        with ToolRegistry._fixture_lock:
+            net["fixture"][url] = entry
+            if not net["fixture_path"]:
+                return
+            path = os.path.abspath(net["fixture_path"])
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".fixture-")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(net["fixture"], f, indent=2)
+                os.chmod(tmp_path, 0o666 & ~_UMASK)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    @staticmethod
+    def _http_get_live(url, timeout=10, max_bytes=16384):
+        """GET 'url', reading at most 'max_bytes' of the body.
+
+        Responses carrying an ETag or Last-Modified are cached and revalidated
+        with If-None-Match / If-Modified-Since; a 304 is served from the cache.
+        """
+        session = ToolRegistry._get_http_session()
+        cached = ToolRegistry._http_cache_get(url)
+        if cached and cached["truncated"] and len(cached["body"]) < max_bytes:
+            cached = None  # cached copy is shorter than this caller's budget
+        headers = {}
+        if cached:
+            if cached["headers"].get("etag"):
+                headers["If-None-Match"] = cached["headers"]["etag"]
+            if cached["headers"].get("last-modified"):
+                headers["If-Modified-Since"] = cached["headers"]["last-modified"]
+
+        with session.get(url, timeout=timeout, headers=headers, stream=True) as response:
+            if response.status_code == 304 and cached:
+                body = cached["body"][:max_bytes]
+                return dict(cached, body=body, truncated=cached["truncated"] or len(body) < len(cached["body"]), cached=True)
+
+            body = bytearray()
+            truncated = False
+            chunks = response.iter_content(chunk_size=8192)
+            for chunk in chunks:
+                body += chunk
+                if len(body) >= max_bytes:
+                    # Stop at the budget; the rest of the body is never downloaded
+                    truncated = len(body) > max_bytes or next(chunks, None) is not None
+                    del body[max_bytes:]
+                    break
+
+            kept = {k.lower(): v for k, v in response.headers.items()
+                    if k.lower() in ToolRegistry._HTTP_HEADER_ALLOWLIST}
+            result = {
+                "status_code": response.status_code,
+                "headers": kept,
+                "body": bytes(body),
+                "truncated": truncated,
+                "encoding": response.encoding,
+                "cached": False
+            }
+
+        if response.status_code == 200 and ("etag" in kept or "last-modified" in kept):
+            ToolRegistry._http_cache_put(url, result)
+        return result
     
     @staticmethod
     def ping_host(host):
         """Ping a host (simulated)."""
-        latencies = [random.randint(10, 100) for _ in range(4)]
+        rng = ToolRegistry._rng()
+        latencies = [rng.randint(10, 100) for _ in range(4)]
         return {
             "host": host,
             "packets_sent": 4,
-            "packets_received": random.randint(3, 4),
+            "packets_received": rng.randint(3, 4),
             "latency_ms": latencies,
             "average_latency": sum(latencies) / len(latencies),
-            "status": "alive" if random.random() > 0.1 else "timeout",
-            "timestamp": datetime.now().isoformat()
+            "status": "alive" if rng.random() > 0.1 else "timeout",
+            "timestamp": ToolRegistry._now().isoformat()
         }
     
     @staticmethod
@@ -602,17 +1387,19 @@ class ToolRegistry:
     
     # ============ 7. SECURITY & HASHING ============
     
+    _HASH_ALGORITHMS = {
+        "md5": hashlib.md5,
+        "sha1": hashlib.sha1,
+        "sha256": hashlib.sha256,
+        "sha512": hashlib.sha512,
+        "blake2b": hashlib.blake2b
+    }
+    _HASH_CHUNK = 1 << 20
+
     @staticmethod
     def hash_text(text, algorithm="sha256"):
         """Generate hash of text."""
-        algorithms = {
-            "md5": hashlib.md5,
-            "sha1": hashlib.sha1,
-            "sha256": hashlib.sha256,
-            "sha512": hashlib.sha512
-        }
-        
-        algo = algorithms.get(algorithm.lower(), hashlib.sha256)
+        algo = ToolRegistry._HASH_ALGORITHMS.get(algorithm.lower(), hashlib.sha256)
         hash_obj = algo(text.encode())
         
         return {
@@ -621,10 +1408,105 @@ class ToolRegistry:
             "hash": hash_obj.hexdigest(),
             "hash_length": len(hash_obj.hexdigest())
         }
+
+    @staticmethod
+    def hash_file(path, algorithm="sha256"):
+        """Hash a file by streaming it through a fixed-size buffer."""
+        try:
+            path = os.path.expanduser(path)
+            algo = ToolRegistry._HASH_ALGORITHMS.get(algorithm.lower())
+            if algo is None:
+                return {
+                    "path": path,
+                    "error": f"Unsupported algorithm '{algorithm}' (use: {', '.join(ToolRegistry._HASH_ALGORITHMS)})",
+                    "status": "error"
+                }
+
+            start = time.perf_counter()
+            hash_obj = algo()
+            # One reusable buffer: readinto() fills it in place, memoryview avoids copies
+            buf = bytearray(ToolRegistry._HASH_CHUNK)
+            view = memoryview(buf)
+            size = 0
+            with open(path, 'rb', buffering=0) as f:
+                while True:
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+                    hash_obj.update(view[:n])
+                    size += n
+            elapsed = time.perf_counter() - start
+
+            return {
+                "path": path,
+                "algorithm": algorithm.lower(),
+                "hash": hash_obj.hexdigest(),
+                "size": size,
+                "size_human": ToolRegistry._human_readable_size(size),
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "throughput_mb_s": round(size / (1 << 20) / elapsed, 2) if elapsed > 0 else None,
+                "status": "success"
+            }
+        except Exception as e:
+            return {
+                "path": path,
+                "error": str(e),
+                "status": "error"
+            }
+
+    @staticmethod
+    def hash_directory(path=".", algorithm="sha256", pattern=None, recursive=False, max_depth=3, max_files=100):
+        """Hash every file in a directory and return a combined manifest digest."""
+        try:
+            path = os.path.expanduser(path)
+            if algorithm.lower() not in ToolRegistry._HASH_ALGORITHMS:
+                return ToolRegistry.hash_file(path, algorithm)
+
+            start = time.perf_counter()
+            files = []
+            total_bytes = 0
+            skipped = 0
+            entries = ToolRegistry._iter_entries(path, pattern, int(max_depth) if recursive else 0)
+            for name, entry in sorted((n, e) for n, e in entries if e is not None and e.is_file(follow_symlinks=False)):
+                if len(files) >= int(max_files):
+                    skipped += 1
+                    continue
+                result = ToolRegistry.hash_file(entry.path, algorithm)
+                if result["status"] != "success":
+                    files.append({"name": name, "error": result["error"]})
+                    continue
+                files.append({"name": name, "hash": result["hash"], "size": result["size"]})
+                total_bytes += result["size"]
+            elapsed = time.perf_counter() - start
+
+            # Manifest digest changes if any name or content changes
+            manifest = ToolRegistry._HASH_ALGORITHMS[algorithm.lower()]()
+            for f in files:
+                manifest.update(f"{f.get('hash', 'error')}  {f['name']}\n".encode())
+
+            return {
+                "path": path,
+                "algorithm": algorithm.lower(),
+                "files": files,
+                "count": len(files),
+                "skipped": skipped,
+                "manifest_hash": manifest.hexdigest(),
+                "total_bytes": total_bytes,
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "throughput_mb_s": round(total_bytes / (1 << 20) / elapsed, 2) if elapsed > 0 else None,
+                "status": "success"
+            }
+        except Exception as e:
+            return {
+                "path": path,
+                "error": str(e),
+                "status": "error"
+            }
     
     @staticmethod
     def generate_password(length=12):
         """Generate a secure random password."""
+        rng = ToolRegistry._rng()
         lowercase = 'abcdefghijklmnopqrstuvwxyz'
         uppercase = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
         digits = '0123456789'
@@ -633,14 +1515,14 @@ class ToolRegistry:
         all_chars = lowercase + uppercase + digits + symbols
         
         password = [
-            random.choice(lowercase),
-            random.choice(uppercase),
-            random.choice(digits),
-            random.choice(symbols)
+            rng.choice(lowercase),
+            rng.choice(uppercase),
+            rng.choice(digits),
+            rng.choice(symbols)
         ]
         
-        password += random.choices(all_chars, k=length-4)
-        random.shuffle(password)
+        password += rng.choices(all_chars, k=length-4)
+        rng.shuffle(password)
         
         password_str = ''.join(password)
         
@@ -648,7 +1530,7 @@ class ToolRegistry:
             "password": password_str,
             "length": length,
             "strength": "strong" if length >= 12 else "moderate",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": ToolRegistry._now().isoformat()
         }
     
     # ============ 8. TIME & DATE ============
@@ -656,14 +1538,14 @@ class ToolRegistry:
     @staticmethod
     def current_time(timezone="UTC"):
         """Get current date and time."""
-        now = datetime.now()
+        now = ToolRegistry._now()
         return {
             "timezone": timezone,
             "datetime": now.isoformat(),
             "date": now.strftime("%Y-%m-%d"),
             "time": now.strftime("%H:%M:%S"),
-            "timestamp": time.time(),
-            "unix_timestamp": int(time.time()),
+            "timestamp": now.timestamp(),
+            "unix_timestamp": int(now.timestamp()),
             "day_of_week": now.strftime("%A"),
             "day_of_year": now.timetuple().tm_yday,
             "week_number": now.isocalendar()[1]
@@ -730,7 +1612,7 @@ class ToolRegistry:
         try:
             from datetime import time as dttime
             t = datetime.strptime(time_str, "%H:%M").time()
-            dt = datetime.combine(datetime.today(), t)
+            dt = datetime.combine(ToolRegistry._now().date(), t)
             dt += timedelta(hours=offset_diff)
             converted_time = dt.strftime("%H:%M")
             
@@ -764,6 +1646,52 @@ def execute_tool(tool_name, arguments):
     except Exception as e:
         return {"error": str(e)}
 
+@contextlib.contextmanager
+def tool_context(seed=None, key="", now=None):
+    """Run tool calls with a RNG seeded from (seed, key) and an optional frozen clock.
+
+    With the same seed, key and clock every simulated tool returns identical
+    output, so second-turn prompts are byte-identical across runs.
+    """
+    if isinstance(now, str):
+        now = datetime.fromisoformat(now)
+    ctx = {
+        "seed": seed,
+        "key": key,
+        "rng": random.Random(f"{seed}:{key}") if seed is not None else None,
+        "now": now
+    }
+    token = _TOOL_CONTEXT.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _TOOL_CONTEXT.reset(token)
+
+def configure_network(backend="live", fixture_path=None, seed=None, negative_ttl=300):
+    """Select how network tools reach the outside world.
+
+    live      - real requests; failed hosts are negatively cached
+    record    - live, and every response is saved to 'fixture_path'
+    replay    - answer from 'fixture_path' only; misses fall back to simulation
+    simulated - never touch the network; simulated data is seeded by 'seed'
+    """
+    if backend not in ("live", "record", "replay", "simulated"):
+        raise ValueError(f"Unknown network backend '{backend}'")
+    fixture = {}
+    if backend == "replay" and not (fixture_path and os.path.isfile(fixture_path)):
+        raise FileNotFoundError(f"Replay fixture '{fixture_path}' not found; create it with the 'record' backend first")
+    if backend == "replay" or (backend == "record" and fixture_path and os.path.isfile(fixture_path)):
+        with open(fixture_path, 'r', encoding='utf-8') as f:
+            fixture = json.load(f)
+    ToolRegistry._network.update({
+        "backend": backend,
+        "fixture_path": fixture_path,
+        "fixture": fixture,
+        "seed": seed,
+        "negative_ttl": negative_ttl
+    })
+    ToolRegistry._http_dead_hosts.clear()
+
 def get_all_tools():
     """Return a list of all available tools with their signatures."""
     tools = []
@@ -779,6 +1707,89 @@ def get_all_tools():
             })
     return sorted(tools, key=lambda x: x["name"])
 
+# ============ JSON SCHEMAS ============
+# Schemas for Ollama's structured outputs ("format": <schema>), derived from
+# the ToolRegistry signatures. Required parameters carry no default to infer a
+# type from, so the non-string ones are listed here.
+_ARG_SCHEMAS = {
+    "value": {"type": "number"},
+    "user_id": {"type": "integer"},
+    "numbers": {"type": "array", "items": {"type": "number"}},
+    "expressions": {"type": "array", "items": {"type": "string"}},
+}
+
+def canonical_tool_names():
+    """Public ToolRegistry tools, skipping alias names (ToolRegistry.calc -> calculator)."""
+    names = []
+    for name in dir(ToolRegistry):
+        attr = getattr(ToolRegistry, name)
+        if not name.startswith("_") and callable(attr) and getattr(attr, "__name__", name) == name:
+            names.append(name)
+    return names
+
+def _default_schema(default):
+    if isinstance(default, bool):
+        return {"type": "boolean"}
+    if isinstance(default, int):
+        return {"type": "integer"}
+    if isinstance(default, float):
+        return {"type": "number"}
+    if isinstance(default, str):
+        return {"type": "string"}
+    if isinstance(default, (list, tuple)):
+        return {"type": "array", "items": {"type": "number"}} if all(
+            isinstance(v, (int, float)) for v in default) else {"type": "array"}
+    return {}
+
+@functools.lru_cache(maxsize=None)
+def _parameters_schema(tool_name):
+    func = getattr(ToolRegistry, tool_name)
+    properties = {}
+    required = []
+    for param in inspect.signature(func).parameters.values():
+        if param.name in _ARG_SCHEMAS:
+            properties[param.name] = dict(_ARG_SCHEMAS[param.name])
+        elif param.default is inspect.Parameter.empty:
+            properties[param.name] = {"type": "string"}
+        else:
+            properties[param.name] = _default_schema(param.default)
+        if param.default is inspect.Parameter.empty:
+            required.append(param.name)
+    return json.dumps({"type": "object", "properties": properties, "required": required,
+                       "additionalProperties": False})
+
+def tool_parameters_schema(tool_name):
+    """JSON Schema for a tool's arguments object; aliases resolve to the canonical tool."""
+    return json.loads(_parameters_schema(getattr(ToolRegistry, tool_name).__name__))
+
+def tool_call_schema(tool_names=None, allow_answer=False):
+    """Schema for {"name": ..., "arguments": {...}} over the given tools (default: all).
+
+    With allow_answer the model may instead reply {"answer": "..."} when no
+    tool is needed.
+    """
+    names = [getattr(ToolRegistry, n).__name__ for n in tool_names] if tool_names else canonical_tool_names()
+    variants = [{
+        "type": "object",
+        "properties": {"name": {"const": name}, "arguments": tool_parameters_schema(name)},
+        "required": ["name", "arguments"]
+    } for name in dict.fromkeys(names)]
+    if allow_answer:
+        variants.append({"type": "object", "properties": {"answer": {"type": "string"}}, "required": ["answer"]})
+    return variants[0] if len(variants) == 1 else {"anyOf": variants}
+
+def plan_schema(tool_names=None, dag=False):
+    """Schema for the planner's output: a JSON array of tool names, or of {"tool", "after"} steps."""
+    tool = {"type": "string", "enum": tool_names or canonical_tool_names()}
+    if not dag:
+        return {"type": "array", "items": tool}
+    step = {
+        "type": "object",
+        "properties": {"tool": tool, "after": {"type": "array", "items": {"type": "integer", "minimum": 0}}},
+        "required": ["tool", "after"]
+    }
+    return {"type": "array", "items": step}
+
 def validate_tool_call(response, expected_name, expected_args):
     """Validate that a response contains the expected tool call."""
     try:
@@ -882,4 +1893,9 @@ ToolRegistry.calc = ToolRegistry.calculator
 ToolRegistry.math = ToolRegistry.calculator
 ToolRegistry.ping = ToolRegistry.ping_host
 ToolRegistry.hash = ToolRegistry.hash_text
-ToolRegistry.sha256 = ToolRegistry.hash_text
\ No newline at end of file
+ToolRegistry.sha256 = ToolRegistry.hash_text
+ToolRegistry.checksum = ToolRegistry.hash_file
+ToolRegistry.file_hash = ToolRegistry.hash_file
+ToolRegistry.sha256sum = ToolRegistry.hash_file
+ToolRegistry.hash_dir = ToolRegistry.hash_directory
+ToolRegistry.checksum_dir = ToolRegistry.hash_directory
\ No newline at end of file
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# tracing.py - Hierarchical timing spans with Chrome-trace/Perfetto and OTLP JSON export
+#
+# Spans nest per thread (run > model > test > turn > http, plus tool,
+# sanitize and validate). While tracing is off span() hands back a shared
+# null context, so instrumented code pays one attribute check.
+
+import os
+import json
+import time
+import functools
+import itertools
+import threading
+import contextlib
+
+SERVICE_NAME = "vtstech-gptbench"
+
+class Tracer:
+    """Collects finished spans; start() enables it, exports read the collected list."""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._origin_ns = 0
+        self._wall_ns = 0
+        self.trace_id = ""
+
+    def start(self):
+        self.spans = []
+        self._origin_ns = time.perf_counter_ns()
+        self._wall_ns = time.time_ns()
+        self.trace_id = os.urandom(16).hex()
+        self.enabled = True
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, name, cat, parent=None, **attrs):
+        stack = self._stack()
+        if parent is None and stack:
+            parent = stack[-1]["id"]
+        record = {"id": next(self._ids), "parent": parent, "name": str(name),
+                  "cat": cat, "tid": threading.get_ident(), "start": time.perf_counter_ns(), "args": attrs}
+        stack.append(record)
+        try:
+            yield
+        except Exception as e:
+            attrs["error"] = repr(e)[:200]
+            raise
+        finally:
+            self._close(stack, record)
+
+    def _close(self, stack, record):
+        """End 'record' and any span still open above it.
+
+        Those belong to an iter_spans generator whose consumer raised: it is
+        only closed when collected, so it would otherwise sit on the stack and
+        be popped in place of its enclosing span.
+        """
+        if "end" in record:
+            return  # already ended by an enclosing span
+        end = time.perf_counter_ns()
+        index = next((i for i in range(len(stack) - 1, -1, -1) if stack[i] is record), None)
+        closed = stack[index:] if index is not None else [record]
+        if index is not None:
+            del stack[index:]
+        for r in closed:
+            r["end"] = end
+        with self._lock:
+            self.spans.extend(closed)
+
+    def current(self):
+        stack = self._stack()
+        return stack[-1]["id"] if stack else None
+
+    def annotate(self, **attrs):
+        stack = self._stack()
+        if stack:
+            stack[-1]["args"].update(attrs)
+
+    # ============ EXPORT ============
+    def chrome_trace(self):
+        """Chrome trace event format (chrome://tracing, ui.perfetto.dev): one complete ('X') event per span."""
+        pid = os.getpid()
+        tids = {}
+        events = []
+        for s in sorted(self.spans, key=lambda s: s["start"]):
+            tid = tids.setdefault(s["tid"], len(tids) + 1)
+            events.append({"name": s["name"], "cat": s["cat"], "ph": "X", "pid": pid, "tid": tid,
+                           "ts": (s["start"] - self._origin_ns) / 1000, "dur": (s["end"] - s["start"]) / 1000,
+                           "args": s["args"]})
+        for thread, tid in tids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": "main" if tid == 1 else f"worker {thread}"}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp_trace(self):
+        """OTLP/JSON ExportTraceServiceRequest (as accepted by an OTLP/HTTP collector)."""
+        unix_ns = lambda t: str(self._wall_ns + t - self._origin_ns)
+        spans = []
+        for s in self.spans:
+            span = {"traceId": self.trace_id, "spanId": f"{s['id']:016x}", "name": s["name"], "kind": 1,
+                    "startTimeUnixNano": unix_ns(s["start"]), "endTimeUnixNano": unix_ns(s["end"]),
+                    "attributes": [otlp_attribute("gptbench.category", s["cat"])]
+                    + [otlp_attribute(k, v) for k, v in s["args"].items()]}
+            if s["parent"]:
+                span["parentSpanId"] = f"{s['parent']:016x}"
+            if "error" in s["args"]:
+                span["status"] = {"code": 2, "message": s["args"]["error"]}
+            spans.append(span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "gptbench.tracing"}, "spans": spans}]
+        }]}
+
+    def category_times(self):
+        """{category: (self seconds, spans)}: each span's time minus its children's, so categories add up."""
+        child_ns = {}
+        for s in self.spans:
+            if s["parent"]:
+                child_ns[s["parent"]] = child_ns.get(s["parent"], 0) + s["end"] - s["start"]
+        totals = {}
+        for s in self.spans:
+            own = max(0, s["end"] - s["start"] - child_ns.get(s["id"], 0))
+            seconds, count = totals.get(s["cat"], (0.0, 0))
+            totals[s["cat"]] = (seconds + own / 1e9, count + 1)
+        return totals
+
+def otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+    return {"key": key, "value": typed}
+
+TRACER = Tracer()
+_NULL_SPAN = contextlib.nullcontext()
+
+def span(name, cat, parent=None, **attrs):
+    """Context manager timing one phase; a no-op unless tracing was started.
+
+    'parent' (from current_span()) links spans opened on worker threads.
+    """
+    if not TRACER.enabled:
+        return _NULL_SPAN
+    return TRACER.span(name, cat, parent, **attrs)
+
+def current_span():
+    return TRACER.current() if TRACER.enabled else None
+
+def annotate(**attrs):
+    """Attach attributes (tokens, status...) to the innermost open span."""
+    if TRACER.enabled:
+        TRACER.annotate(**attrs)
+
+def iter_spans(items, cat, name=str):
+    """Iterate 'items' with each loop body inside its own span (closed on continue/break too).
+
+    If the body raises while the generator is still referenced, the item's
+    span stays open until the enclosing span ends.
+    """
+    if not TRACER.enabled:
+        yield from items
+        return
+    for item in items:
+        with TRACER.span(name(item), cat):
+            yield item
+
+def traced(cat, name=None):
+    """Decorator: run the function inside a span named name(*args, **kwargs) or the function name."""
+    def wrap(func):
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            with TRACER.span(name(*args, **kwargs) if name else func.__name__, cat):
+                return func(*args, **kwargs)
+        return inner
+    return wrap
+
+def export_trace(chrome_path=None, otlp_path=None):
+    for path, data in ((chrome_path, TRACER.chrome_trace), (otlp_path, TRACER.otlp_trace)):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data(), f, default=str)
+
+def print_trace_summary(chrome_path=None, otlp_path=None):
+    totals = TRACER.category_times()
+    wall = sum(seconds for seconds, _ in totals.values())
+    files = ", ".join(p for p in (chrome_path, otlp_path) if p)
+    print(f"\n🧵 Trace: {len(TRACER.spans)} spans → {files}")
+    for cat, (seconds, count) in sorted(totals.items(), key=lambda kv: -kv[1][0]):
+        share = seconds / wall * 100 if wall else 0
+        print(f"   {cat:<10} {seconds:>10.3f}s {share:>5.1f}%  ({count} spans)")